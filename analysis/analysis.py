@@ -8,6 +8,7 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import json
@@ -28,15 +29,45 @@ try:
     from .benchmarks import BaseBenchmark
     from .mmlu import MMLUBenchmark
     from .hellaswag import HellaSwagBenchmark
+    from .invalid_responses import classificar_respostas, mascara_respostas_validas
+    from .tokenizacao import TokenizadorLexico
+    from .bleu_rouge import COLUNAS_ESTATISTICAS_LEXICAS, agregar_metricas_lexicas, contexto_processos
+    from .servidor_metricas import ClienteMetricas
+    from .cache_metricas import obter_cache_metricas, relatorio_cache_metricas
+    from .incremental import (agregados_parciais, hash_arquivo, metricas_de_agregados,
+                              obter_manifesto, snapshot_configuracao)
 except ImportError:
     # Fallback para import absoluto (quando executado diretamente)
     from benchmarks import BaseBenchmark
     from mmlu import MMLUBenchmark
     from hellaswag import HellaSwagBenchmark
+    from invalid_responses import classificar_respostas, mascara_respostas_validas
+    from tokenizacao import TokenizadorLexico
+    from bleu_rouge import COLUNAS_ESTATISTICAS_LEXICAS, agregar_metricas_lexicas, contexto_processos
+    from servidor_metricas import ClienteMetricas
+    from cache_metricas import obter_cache_metricas, relatorio_cache_metricas
+    from incremental import (agregados_parciais, hash_arquivo, metricas_de_agregados,
+                             obter_manifesto, snapshot_configuracao)
 
 class AnalysisSystem:
     """Sistema principal de análise consolidada."""
     
+    # Benchmarks reconhecidos pela inferência estrutural (categorias de 'benchmark_final')
+    TIPOS_BENCHMARK = ('mmlu', 'hellaswag')
+    
+    # Colunas lidas de cada resultados_todos.csv e seus tipos (as demais são ignoradas)
+    COLUNAS_RESULTADOS = {
+        'model': 'str',
+        'prompt': 'str',
+        'reference': 'str',
+        'prediction': 'str',
+        'time': 'float64',
+        'response_length': 'Int64',
+        'is_error': 'boolean',
+        'error_type': 'str',
+        'subject': 'str',
+    }
+    
     def __init__(self):
         self.config = get_config()
         self.pasta_analysis = "analysis"
@@ -52,6 +83,19 @@ class AnalysisSystem:
         except Exception as e:
             print(f"⚠️ Erro ao inicializar benchmarks: {e}")
             self.benchmarks = {}
+        
+        # Tokenização das métricas lexicais compartilhada por todos os modelos e execuções
+        self.tokenizador = TokenizadorLexico()
+        
+        # Servidor local de métricas, se estiver no ar (senão as métricas são calculadas aqui)
+        self.cliente_metricas = ClienteMetricas.conectar()
+        
+        # Vazão (sentenças/s) das métricas semânticas, para o comparativo nos relatórios
+        self.vazao_metricas: Dict[str, float] = {}
+        
+        # Métricas que falharam no último calcular_metricas_academicas (a análise
+        # incremental não registra no manifesto uma execução com falhas)
+        self.falhas_metricas: List[str] = []
     
     def encontrar_execucoes(self) -> List[str]:
         """Encontra todas as execuções disponíveis na pasta de resultados."""
@@ -78,112 +122,169 @@ class AnalysisSystem:
             return None
         
         try:
-            df = pd.read_csv(arquivo_csv, encoding=self.config.ENCODING_CSV)
+            df = pd.read_csv(arquivo_csv, encoding=self.config.ENCODING_CSV,
+                             usecols=lambda coluna: coluna in self.COLUNAS_RESULTADOS,
+                             dtype=self.COLUNAS_RESULTADOS)
             print(f"✅ Dados carregados: {len(df)} registros de {caminho_execucao}")
             return df
         except Exception as e:
             print(f"❌ Erro ao carregar {arquivo_csv}: {e}")
             return None
 
-    def consolidar_dados_por_modelo(self, execucoes: List[str]) -> Dict[str, pd.DataFrame]:
-        """Consolida dados agrupando por modelo."""
-        print("🔄 Consolidando dados por modelo...")
+    def carregar_execucoes(self, execucoes: List[str]) -> pd.DataFrame:
+        """
+        Carrega todas as execuções em um único DataFrame.
         
-        dados_por_modelo = {}
+        Cada arquivo é lido uma vez (só as colunas de COLUNAS_RESULTADOS, com tipos
+        explícitos) e as execuções são concatenadas uma única vez. 'model' e 'execucao'
+        viram categóricas e as linhas de cada modelo ficam contíguas (modelos na ordem
+        de aparição, execuções em ordem), para que fatias_por_modelo devolva fatias
+        sem cópia. Os benchmarks são classificados uma vez para o conjunto inteiro.
         
+        Args:
+            execucoes: Caminhos das pastas das execuções
+            
+        Returns:
+            DataFrame consolidado (vazio se nenhuma execução puder ser carregada)
+        """
+        print("🔄 Consolidando dados por modelo...")
+        
+        dfs = []
+        nomes = []
         for execucao in execucoes:
             nome_execucao = os.path.basename(execucao)
             print(f"📁 Processando {nome_execucao}...")
             
-            # Carregar dados da execução
             df = self.carregar_dados_execucao(execucao)
             if df is None:
                 continue
-            
-            # Adicionar coluna de execução
-            df['execucao'] = nome_execucao
-            
-            # Agrupar por modelo
-            for modelo in df['model'].unique():
-                df_modelo = df[df['model'] == modelo].copy()
-                
-                if modelo not in dados_por_modelo:
-                    dados_por_modelo[modelo] = []
-                
-                dados_por_modelo[modelo].append(df_modelo)
+            dfs.append(df.assign(execucao=nome_execucao))
+            nomes.append(nome_execucao)
         
-        # Concatenar dados de cada modelo
-        dados_consolidados = {}
-        for modelo, lista_dfs in dados_por_modelo.items():
-            if lista_dfs:
-                dados_consolidados[modelo] = pd.concat(lista_dfs, ignore_index=True)
-                print(f"✅ {modelo}: {len(dados_consolidados[modelo])} registros consolidados")
+        if not dfs:
+            return pd.DataFrame()
         
-        return dados_consolidados
-
-    def _inferir_tipo_benchmark(self, prompt: str, reference: str) -> Optional[str]:
+        df = pd.concat(dfs, ignore_index=True)
+        df['execucao'] = pd.Categorical(df['execucao'], categories=nomes)
+        
+        # Categorias em ordem alfabética (ordenações por modelo inalteradas); linhas
+        # agrupadas por modelo na ordem em que os modelos aparecem
+        ordem_modelos = pd.unique(df['model'])
+        df['model'] = df['model'].astype('category')
+        posicao_modelo = pd.Categorical(df['model'], categories=ordem_modelos).codes
+        df = df.take(np.argsort(posicao_modelo, kind='stable')).reset_index(drop=True)
+        
+        self._adicionar_contexto_benchmark(df)
+        return df
+    
+    @staticmethod
+    def fatias_por_modelo(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         """
-        Infere o benchmark pelo formato do prompt e referência.
+        Divide o DataFrame de carregar_execucoes nas fatias de cada modelo.
+        
+        As linhas de cada modelo são contíguas, então cada fatia é um iloc[início:fim]
+        (view sem cópia; com Copy-on-Write, alterações na fatia não afetam o original).
+        
+        Args:
+            df: DataFrame consolidado de carregar_execucoes
+            
+        Returns:
+            Dicionário modelo -> fatia do DataFrame, na ordem das linhas
         """
-        prompt_str = str(prompt or "").strip()
-        reference_str = str(reference or "").strip().upper()
+        if df.empty:
+            return {}
+        
+        codigos = df['model'].cat.codes.to_numpy()
+        inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+        fins = np.r_[inicios[1:], len(df)]
+        return {
+            df['model'].iat[inicio]: df.iloc[inicio:fim]
+            for inicio, fim in zip(inicios, fins)
+        }
+    
+    def consolidar_dados_por_modelo(self, execucoes: List[str]) -> Dict[str, pd.DataFrame]:
+        """Consolida dados agrupando por modelo."""
+        dados_por_modelo = self.fatias_por_modelo(self.carregar_execucoes(execucoes))
+        for modelo, df_modelo in dados_por_modelo.items():
+            print(f"✅ {modelo}: {len(df_modelo)} registros consolidados")
+        return dados_por_modelo
 
-        # Benchmarks locais usam resposta de múltipla escolha (A/B/C/D).
-        if reference_str not in {"A", "B", "C", "D"}:
-            return None
+    def _inferir_tipos_benchmark(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Infere o benchmark de todas as linhas pelo formato do prompt e referência.
 
-        # Prompt de benchmark sempre contém bloco de choices e termina com "Answer:".
-        has_choices = "Choices:" in prompt_str
-        ends_with_answer = prompt_str.rstrip().endswith("Answer:")
-        if not (has_choices and ends_with_answer):
-            return None
+        Classificação vetorizada: benchmarks locais usam resposta de múltipla escolha
+        (A/B/C/D) e prompt com bloco "Choices:" terminando em "Answer:"; o prefixo
+        do prompt ("Context:" ou "Question:") distingue HellaSwag de MMLU.
 
-        if prompt_str.startswith("Context:"):
-            return "hellaswag"
-        if prompt_str.startswith("Question:"):
-            return "mmlu"
-        return None
+        Args:
+            df: DataFrame com as colunas 'prompt' e 'reference'
+
+        Returns:
+            Série categórica ('mmlu', 'hellaswag' ou NaN) com o mesmo índice do DataFrame
+        """
+        vazia = pd.Series("", index=df.index, dtype=object)
+        prompt = df.get('prompt', vazia).fillna("").astype(str).str.strip()
+        reference = df.get('reference', vazia).fillna("").astype(str).str.strip().str.upper()
+
+        formato_benchmark = (
+            reference.isin(["A", "B", "C", "D"])
+            & prompt.str.contains("Choices:", regex=False)
+            & prompt.str.endswith("Answer:")
+        )
+
+        tipos = np.select(
+            [
+                formato_benchmark & prompt.str.startswith("Context:"),
+                formato_benchmark & prompt.str.startswith("Question:"),
+            ],
+            ["hellaswag", "mmlu"],
+            default=None
+        )
+        return pd.Series(
+            pd.Categorical(tipos, categories=list(self.TIPOS_BENCHMARK)),
+            index=df.index
+        )
 
     def _adicionar_contexto_benchmark(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Enriquecimento defensivo para identificar benchmarks mesmo quando o mapeamento
         da coluna 'benchmark' da coleta estiver incorreto.
-        """
-        df_contexto = df.copy()
 
-        if 'prompt' not in df_contexto.columns:
-            df_contexto['prompt'] = ""
-        if 'reference' not in df_contexto.columns:
-            df_contexto['reference'] = ""
-
-        benchmark_inferido = df_contexto.apply(
-            lambda row: self._inferir_tipo_benchmark(row.get('prompt', ''), row.get('reference', '')),
-            axis=1
-        )
+        A classificação é feita uma única vez por conjunto consolidado: as colunas
+        'benchmark_final' (categórica) e 'is_benchmark_prompt' ficam no próprio
+        DataFrame e são reaproveitadas pelas etapas seguintes.
+        """
+        if 'benchmark_final' in df.columns and 'is_benchmark_prompt' in df.columns:
+            return df
 
         # Usa apenas inferência por estrutura de prompt para evitar contaminação por
         # metadados antigos/incorretos na coluna "benchmark".
-        df_contexto['benchmark_final'] = benchmark_inferido
+        df['benchmark_final'] = self._inferir_tipos_benchmark(df)
+        df['is_benchmark_prompt'] = df['benchmark_final'].notna()
 
-        df_contexto['benchmark_final'] = df_contexto['benchmark_final'].where(
-            df_contexto['benchmark_final'].isin(['mmlu', 'hellaswag']),
-            np.nan
-        )
-        df_contexto['is_benchmark_prompt'] = df_contexto['benchmark_final'].notna()
-
-        return df_contexto
+        return df
     
     def calcular_metricas_academicas(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict, str]:
-        """Calcula todas as métricas acadêmicas (BLEU, ROUGE, BERTScore)."""
+        """
+        Calcula todas as métricas acadêmicas (BLEU, ROUGE, BERTScore, similaridade semântica).
+        
+        Uma métrica que falhar fica zerada (ou ausente) no DataFrame e seu nome vai para
+        self.falhas_metricas, zerada a cada chamada.
+        """
         print("📊 Calculando métricas acadêmicas...")
+        self.falhas_metricas = []
         df_contexto = self._adicionar_contexto_benchmark(df)
         df_textual = df_contexto[~df_contexto['is_benchmark_prompt']].copy()
+        metricas_semanticas = self.config.METRICAS_SEMANTICAS
 
         if df_textual.empty:
             print("⚠️ Sem prompts textuais válidos para cálculo acadêmico")
             for col in ['bleu_score', 'rouge1_score', 'rouge2_score', 'rougeL_score',
                         'bertscore_precision', 'bertscore_recall', 'bertscore_f1']:
                 df_contexto[col] = 0.0
+            if 'semantic_similarity' in metricas_semanticas:
+                df_contexto['semantic_similarity'] = 0.0
             return df_contexto, {}, "Sem dados textuais para cálculo de métricas acadêmicas"
         
         # BLEU e ROUGE
@@ -195,29 +296,69 @@ class AnalysisSystem:
             from bleu_rouge import calcular_bleu_rouge_completo
         
         try:
-            df_bleu_rouge, metricas_bleu_rouge, relatorio_bleu_rouge = calcular_bleu_rouge_completo(df_textual)
+            df_bleu_rouge, metricas_bleu_rouge, relatorio_bleu_rouge = calcular_bleu_rouge_completo(
+                df_textual, self.tokenizador, self.cliente_metricas
+            )
         except Exception as e:
             print(f"❌ Erro ao calcular BLEU/ROUGE: {e}")
+            self.falhas_metricas.append('bleu_rouge')
             return df_contexto, {}, "Erro ao calcular BLEU/ROUGE"
+        if not set(COLUNAS_ESTATISTICAS_LEXICAS).issubset(df_bleu_rouge.columns):
+            # Dependências ausentes: BLEU/ROUGE não foram calculados
+            self.falhas_metricas.append('bleu_rouge')
         
         # BERTScore
         try:
             # Tentar import relativo (quando chamado via main.py)
-            from .bertscore import calcular_bertscore_completo
+            from .bertscore import calcular_bertscore_completo, COLUNAS_BERTSCORE
         except ImportError:
             # Fallback para import absoluto (quando executado diretamente)
-            from bertscore import calcular_bertscore_completo
+            from bertscore import calcular_bertscore_completo, COLUNAS_BERTSCORE
         
-        try:
-            df_bertscore, metricas_bertscore, relatorio_bertscore = calcular_bertscore_completo(df_bleu_rouge)
-        except Exception as e:
-            print(f"❌ Erro ao calcular BERTScore: {e}")
-            # Fallback: mantém BLEU/ROUGE e zera colunas de BERTScore
+        if 'bertscore' not in metricas_semanticas:
+            # BERTScore desabilitado em METRICAS_SEMANTICAS: colunas zeradas
             df_bertscore = df_bleu_rouge.copy()
             df_bertscore['bertscore_precision'] = 0.0
             df_bertscore['bertscore_recall'] = 0.0
             df_bertscore['bertscore_f1'] = 0.0
-            relatorio_bertscore = f"BERTScore indisponível nesta execução: {e}"
+            relatorio_bertscore = "BERTScore desabilitado (METRICAS_SEMANTICAS)."
+        else:
+            try:
+                df_bertscore, metricas_bertscore, relatorio_bertscore = calcular_bertscore_completo(df_bleu_rouge, self.cliente_metricas)
+                if not set(COLUNAS_BERTSCORE).issubset(df_bertscore.columns):
+                    raise RuntimeError("bert-score indisponível")
+            except Exception as e:
+                print(f"❌ Erro ao calcular BERTScore: {e}")
+                self.falhas_metricas.append('bertscore')
+                # Fallback: mantém BLEU/ROUGE e zera colunas de BERTScore
+                df_bertscore = df_bleu_rouge.copy()
+                df_bertscore['bertscore_precision'] = 0.0
+                df_bertscore['bertscore_recall'] = 0.0
+                df_bertscore['bertscore_f1'] = 0.0
+                relatorio_bertscore = f"BERTScore indisponível nesta execução: {e}"
+        
+        # Similaridade semântica (sentence-transformers), junto ou no lugar do BERTScore
+        relatorio_similaridade = ""
+        if 'semantic_similarity' in metricas_semanticas:
+            try:
+                # Tentar import relativo (quando chamado via main.py)
+                from .semantic_similarity import calcular_semantic_similarity_completo, COLUNA_SIMILARIDADE
+            except ImportError:
+                # Fallback para import absoluto (quando executado diretamente)
+                from semantic_similarity import calcular_semantic_similarity_completo, COLUNA_SIMILARIDADE
+            
+            try:
+                df_similaridade, _, relatorio_similaridade, vazao = calcular_semantic_similarity_completo(df_bertscore)
+                if COLUNA_SIMILARIDADE not in df_similaridade.columns:
+                    raise RuntimeError("sentence-transformers indisponível")
+                df_bertscore = df_similaridade
+                if vazao is not None:
+                    self.vazao_metricas['semantic_similarity'] = vazao
+            except Exception as e:
+                print(f"❌ Erro ao calcular similaridade semântica: {e}")
+                self.falhas_metricas.append('semantic_similarity')
+                relatorio_similaridade = f"Similaridade semântica indisponível nesta execução: {e}"
+            relatorio_similaridade += "\n\n" + self._comparar_vazao_metricas()
 
         # Reintegrar métricas no DataFrame completo (benchmarks ficam zerados).
         df_completo = df_contexto.copy()
@@ -225,11 +366,20 @@ class AnalysisSystem:
             'bleu_score', 'rouge1_score', 'rouge2_score', 'rougeL_score',
             'bertscore_precision', 'bertscore_recall', 'bertscore_f1'
         ]
+        if 'semantic_similarity' in metricas_semanticas:
+            metric_cols.append('semantic_similarity')
         for col in metric_cols:
             df_completo[col] = 0.0
             if col in df_bertscore.columns:
                 df_completo.loc[df_bertscore.index, col] = df_bertscore[col].values
         
+        # Estatísticas suficientes de BLEU/ROUGE (zeradas nos benchmarks, sem peso nos agregados)
+        for col in COLUNAS_ESTATISTICAS_LEXICAS:
+            if col in df_bertscore.columns:
+                df_completo[col] = 0
+                df_completo.loc[df_bertscore.index, col] = df_bertscore[col].values
+                df_completo[col] = df_completo[col].astype(np.int32)
+        
         # Calcular métricas agregadas por modelo
         metricas_agregadas_dict = self._calcular_metricas_agregadas(df_completo, apenas_textual=True)
         
@@ -242,13 +392,132 @@ class AnalysisSystem:
         
         # Combinar relatórios
         qtd_bench = int(df_contexto['is_benchmark_prompt'].sum())
-        relatorio_completo = (
-            f"{relatorio_bleu_rouge}\n\n{relatorio_bertscore}\n\n"
-            f"Observação: {qtd_bench} itens de benchmark foram excluídos das métricas textuais."
-        )
+        relatorio_completo = f"{relatorio_bleu_rouge}\n\n{relatorio_bertscore}\n\n"
+        if relatorio_similaridade:
+            relatorio_completo += f"{relatorio_similaridade}\n\n"
+        relatorio_completo += f"Observação: {qtd_bench} itens de benchmark foram excluídos das métricas textuais."
         
         return df_completo, metricas_agregadas, relatorio_completo
     
+    def _comparar_vazao_metricas(self) -> str:
+        """Tabela com a vazão (sentenças/s) medida de cada métrica semântica."""
+        nomes = {'bertscore': 'BERTScore', 'semantic_similarity': 'Similaridade semântica'}
+        linhas = ["### ⚡ Vazão das Métricas Semânticas", "", "| Métrica | Sentenças/s |", "|:-------|------:|"]
+        for metrica, nome in nomes.items():
+            vazao = self.vazao_metricas.get(metrica)
+            linhas.append(f"| {nome} | {vazao:.1f} |" if vazao is not None else f"| {nome} | - |")
+        
+        if self.vazao_metricas.get('bertscore') and self.vazao_metricas.get('semantic_similarity'):
+            razao = self.vazao_metricas['semantic_similarity'] / self.vazao_metricas['bertscore']
+            linhas.append("")
+            linhas.append(f"Similaridade semântica: {razao:.1f}x a vazão do BERTScore.")
+        return "\n".join(linhas)
+    
+    def _calcular_bertscore_em_lote(self, dados_por_modelo: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Pré-calcula o BERTScore dos prompts textuais de todos os modelos em uma única chamada.
+        
+        O modelo do BERTScore é carregado uma vez e todas as respostas são pontuadas juntas;
+        os resultados voltam para o DataFrame de cada modelo (benchmarks ficam zerados) e
+        calcular_metricas_academicas reaproveita as colunas em vez de pontuar de novo.
+        """
+        try:
+            # Tentar import relativo (quando chamado via main.py)
+            from .bertscore import BertScoreCalculator, COLUNAS_BERTSCORE
+        except ImportError:
+            # Fallback para import absoluto (quando executado diretamente)
+            from bertscore import BertScoreCalculator, COLUNAS_BERTSCORE
+        
+        textuais = {}
+        for modelo, df in dados_por_modelo.items():
+            df_contexto = self._adicionar_contexto_benchmark(df)
+            textuais[modelo] = df_contexto[~df_contexto['is_benchmark_prompt']]
+        
+        print(f"🧠 Calculando BERTScore em lote para {len(textuais)} modelos...")
+        try:
+            calculadora = BertScoreCalculator(self.cliente_metricas)
+            resultados = calculadora.calcular_bertscore_lote(textuais)
+            if calculadora.ultima_vazao is not None:
+                self.vazao_metricas['bertscore'] = calculadora.ultima_vazao
+        except Exception as e:
+            print(f"⚠️ Erro no BERTScore em lote, calculando por modelo: {e}")
+            return dados_por_modelo
+        
+        dados_com_bertscore = {}
+        for modelo, df in dados_por_modelo.items():
+            df_resultado = resultados.get(modelo)
+            if df_resultado is None or not all(col in df_resultado.columns for col in COLUNAS_BERTSCORE):
+                dados_com_bertscore[modelo] = df
+                continue
+            df = df.copy()
+            for col in COLUNAS_BERTSCORE:
+                df[col] = 0.0
+                df.loc[df_resultado.index, col] = df_resultado[col].values
+            dados_com_bertscore[modelo] = df
+        
+        return dados_com_bertscore
+    
+    def calcular_consistencia_execucoes(self, df: pd.DataFrame, pasta_analise: str) -> Dict[str, Dict]:
+        """
+        Calcula a consistência entre execuções de todos os modelos em uma única chamada.
+        
+        As respostas de todos os modelos (DataFrame de carregar_execucoes) são codificadas
+        juntas (MinHash e embeddings); a consistência de cada (modelo, prompt) é salva em
+        consistencia_por_prompt.csv.
+        
+        Returns:
+            Dicionário modelo -> métricas de consistência (vazio em caso de erro)
+        """
+        try:
+            # Tentar import relativo (quando chamado via main.py)
+            from .consistencia import calcular_consistencia_completa
+        except ImportError:
+            # Fallback para import absoluto (quando executado diretamente)
+            from consistencia import calcular_consistencia_completa
+        
+        print("🔁 Calculando consistência entre execuções...")
+        try:
+            por_prompt, metricas_por_modelo, _ = calcular_consistencia_completa(df)
+        except Exception as e:
+            print(f"⚠️ Erro ao calcular consistência entre execuções: {e}")
+            return {}
+        
+        por_prompt.to_csv(os.path.join(pasta_analise, "consistencia_por_prompt.csv"),
+                          index=False, encoding=self.config.ENCODING_CSV)
+        return metricas_por_modelo
+    
+    def detectar_respostas_duplicadas(self, df: pd.DataFrame, pasta_analise: str) -> Tuple[Dict[str, Dict], str]:
+        """
+        Detecta respostas quase duplicadas de todos os modelos (DataFrame de carregar_execucoes)
+        em uma única chamada.
+        
+        As respostas em grupos com mais de um membro são salvas em duplicatas.csv.
+        
+        Returns:
+            Tuple com (métricas de templates por modelo, relatório com os grupos entre modelos)
+        """
+        try:
+            # Tentar import relativo (quando chamado via main.py)
+            from .duplicatas import detectar_duplicatas_completo
+        except ImportError:
+            # Fallback para import absoluto (quando executado diretamente)
+            from duplicatas import detectar_duplicatas_completo
+        
+        print("🧬 Detectando respostas quase duplicadas...")
+        try:
+            duplicatas, metricas_por_modelo, _, relatorio = detectar_duplicatas_completo(df)
+        except Exception as e:
+            print(f"⚠️ Erro ao detectar respostas quase duplicadas: {e}")
+            return {}, ""
+        
+        agrupadas = duplicatas[duplicatas['tamanho_grupo'] > 1].sort_values(['grupo', 'model'], kind='stable')
+        agrupadas.to_csv(os.path.join(pasta_analise, "duplicatas.csv"), index=False, encoding=self.config.ENCODING_CSV)
+        
+        colapsados = [modelo for modelo, metricas in metricas_por_modelo.items() if metricas['colapso_em_templates']]
+        if colapsados:
+            print(f"⚠️ Modelos com respostas colapsadas em templates: {', '.join(colapsados)}")
+        return metricas_por_modelo, relatorio
+    
     def calcular_metricas_evidently(self, df: pd.DataFrame) -> Dict:
         """Calcula métricas do Evidently AI para cada modelo."""
         print("📈 Calculando métricas Evidently AI...")
@@ -270,11 +539,10 @@ class AnalysisSystem:
         else:
             df_evidently['word_count'] = df_evidently['prediction'].astype(str).str.split().str.len()
         
-        # Usar campo is_error se disponível, senão calcular is_valid
-        if self._usar_campo_is_error(df):
-            df_evidently['is_valid'] = ~df_evidently['is_error']
-        else:
-            df_evidently['is_valid'] = ~df_evidently['prediction'].apply(self._eh_resposta_invalida)
+        # Detector unificado combinado com a flag is_error da coleta (se disponível)
+        classificacao = classificar_respostas(df_evidently['prediction'])
+        df_evidently['invalid_reason'] = classificacao['invalid_reason']
+        df_evidently['is_valid'] = mascara_respostas_validas(df_evidently, classificacao)
         
         # Calcular métricas
         total_respostas = len(df_evidently)
@@ -290,34 +558,29 @@ class AnalysisSystem:
             'comprimento_medio': df_validas['text_length'].mean() if len(df_validas) > 0 else 0,
             'comprimento_std': df_validas['text_length'].std() if len(df_validas) > 0 else 0,
             'palavras_medias': df_validas['word_count'].mean() if len(df_validas) > 0 else 0,
-            'palavras_std': df_validas['word_count'].std() if len(df_validas) > 0 else 0
+            'palavras_std': df_validas['word_count'].std() if len(df_validas) > 0 else 0,
+            'motivos_invalidez': {
+                motivo: int(qtd) for motivo, qtd in df_evidently['invalid_reason'].value_counts().items() if qtd > 0
+            }
         }
         
         return metricas_evidently
     
-    def _eh_modelo_problematico(self, df: pd.DataFrame, modelo: str) -> bool:
+    def _eh_modelo_problematico(self, df_modelo: pd.DataFrame) -> bool:
         """
         Verifica se um modelo tem alta taxa de erro e deve ser excluído da análise principal.
         
         Args:
-            df: DataFrame com dados
-            modelo: Nome do modelo
+            df_modelo: DataFrame com os dados do modelo
             
         Returns:
             True se o modelo deve ser excluído
         """
-        df_modelo = df[df['model'] == modelo]
-        
         if len(df_modelo) == 0:
             return True
         
-        # Verificar taxa de erro
-        if 'is_error' in df.columns:
-            taxa_erro = df_modelo['is_error'].mean()
-        else:
-            # Estimar taxa de erro baseado em respostas inválidas
-            respostas_invalidas = df_modelo['prediction'].apply(self._eh_resposta_invalida)
-            taxa_erro = respostas_invalidas.mean()
+        # Verificar taxa de erro (is_error da coleta + detector unificado)
+        taxa_erro = 1.0 - mascara_respostas_validas(df_modelo).mean()
         
         # Excluir modelos com taxa de erro > 40%
         return taxa_erro > 0.4
@@ -328,13 +591,19 @@ class AnalysisSystem:
             return {}
 
         metricas_agregadas = {}
+        
+        # BLEU de corpus e ROUGE micro somando as estatísticas suficientes (benchmarks e
+        # respostas inválidas têm estatísticas zeradas e não pesam na soma)
+        if set(COLUNAS_ESTATISTICAS_LEXICAS).issubset(df.columns):
+            agregados_corpus = agregar_metricas_lexicas(df, ['model'])
+        else:
+            agregados_corpus = pd.DataFrame()
 
-        for modelo in df['model'].unique():
+        for modelo, df_modelo in df.groupby('model', observed=True, sort=False):
             # Filtrar modelos com alta taxa de erro (ex: Gemini 1.5 Flash)
-            if self._eh_modelo_problematico(df, modelo):
+            if self._eh_modelo_problematico(df_modelo):
                 print(f"⚠️ Modelo {modelo} tem alta taxa de erro - excluindo da análise principal")
                 continue
-            df_modelo = df[df['model'] == modelo].copy()
 
             if apenas_textual and 'is_benchmark_prompt' in df_modelo.columns:
                 df_modelo = df_modelo[~df_modelo['is_benchmark_prompt']]
@@ -352,11 +621,8 @@ class AnalysisSystem:
                 }
                 continue
             
-            # Filtrar apenas respostas válidas - usar campo is_error se disponível
-            if self._usar_campo_is_error(df):
-                df_validas = df_modelo[~df_modelo['is_error']]
-            else:
-                df_validas = df_modelo[~df_modelo['prediction'].apply(self._eh_resposta_invalida)]
+            # Filtrar apenas respostas válidas
+            df_validas = df_modelo[mascara_respostas_validas(df_modelo)]
             
             if len(df_validas) == 0:
                 metricas_agregadas[modelo] = {
@@ -386,146 +652,14 @@ class AnalysisSystem:
                 'respostas_validas': len(df_validas),
                 'taxa_validas': len(df_validas) / len(df_modelo)
             }
+            if 'semantic_similarity' in df_validas.columns:
+                metricas_agregadas[modelo]['semantic_similarity_medio'] = df_validas['semantic_similarity'].mean()
+                metricas_agregadas[modelo]['semantic_similarity_std'] = df_validas['semantic_similarity'].std()
+            if modelo in agregados_corpus.index:
+                metricas_agregadas[modelo].update(agregados_corpus.loc[modelo].to_dict())
             
         return metricas_agregadas
     
-    def _analisar_html_evidently(self, pasta_evidently: str) -> str:
-        """Analisa os relatórios HTML do Evidently AI e extrai informações relevantes."""
-        try:
-            import re
-            from bs4 import BeautifulSoup
-            
-            relatorio_html = ""
-            
-            # Analisar relatório de qualidade
-            arquivo_qualidade = os.path.join(pasta_evidently, "evidently_qualidade.html")
-            if os.path.exists(arquivo_qualidade):
-                with open(arquivo_qualidade, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    
-                    relatorio_html += "### 📊 Análise de Qualidade dos Dados\n"
-                    relatorio_html += "**Métricas extraídas do relatório Evidently AI:**\n\n"
-                    
-                    # Extrair métricas mais específicas
-                    metricas_qualidade = self._extrair_metricas_qualidade(soup)
-                    if metricas_qualidade:
-                        for metrica, valor in metricas_qualidade.items():
-                            relatorio_html += f"- **{metrica}**: {valor}\n"
-                    else:
-                        relatorio_html += "- **Status**: Relatório de qualidade gerado com sucesso\n"
-                        relatorio_html += "- **Conteúdo**: Análise de distribuições, valores ausentes e correlações\n"
-                    
-                    relatorio_html += "\n"
-            
-            # Analisar relatório de texto
-            arquivo_texto = os.path.join(pasta_evidently, "evidently_texto.html")
-            if os.path.exists(arquivo_texto):
-                with open(arquivo_texto, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    
-                    relatorio_html += "### 📝 Análise de Texto\n"
-                    relatorio_html += "**Métricas de análise textual:**\n\n"
-                    
-                    # Extrair métricas de texto mais específicas
-                    metricas_texto = self._extrair_metricas_texto(soup)
-                    if metricas_texto:
-                        for metrica, valor in metricas_texto.items():
-                            relatorio_html += f"- **{metrica}**: {valor}\n"
-                    else:
-                        relatorio_html += "- **Status**: Relatório de texto gerado com sucesso\n"
-                        relatorio_html += "- **Conteúdo**: Análise de comprimento, qualidade e descritores textuais\n"
-                    
-                    relatorio_html += "\n"
-            
-            if not relatorio_html:
-                relatorio_html = "### 📊 Análise Evidently AI\n**Relatórios HTML gerados com sucesso.**\n\n"
-            
-            return relatorio_html
-            
-        except Exception as e:
-            return f"### 📊 Análise Evidently AI\n**Erro ao analisar HTML**: {str(e)}\n\n"
-    
-    def _extrair_metricas_qualidade(self, soup) -> dict:
-        """Extrai métricas específicas do relatório de qualidade."""
-        import re
-        metricas = {}
-        
-        try:
-            # Procurar por tabelas com métricas
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        label = cells[0].get_text().strip()
-                        value = cells[1].get_text().strip()
-                        
-                        # Filtrar métricas relevantes
-                        if any(keyword in label.lower() for keyword in ['missing', 'null', 'count', 'mean', 'std', 'min', 'max']):
-                            if re.match(r'^\d+\.?\d*$', value) or '%' in value:
-                                metricas[label] = value
-            
-            # Procurar por elementos com classes específicas
-            for element in soup.find_all(['span', 'div'], class_=re.compile(r'value|metric|stat')):
-                text = element.get_text().strip()
-                if re.match(r'^\d+\.?\d*$', text) and len(text) > 0:
-                    # Tentar encontrar o label associado
-                    parent = element.parent
-                    if parent:
-                        label_elem = parent.find(['span', 'div', 'td'], class_=re.compile(r'label|name|title'))
-                        if label_elem:
-                            label = label_elem.get_text().strip()
-                            metricas[label] = text
-            
-        except Exception as e:
-            print(f"⚠️ Erro ao extrair métricas de qualidade: {e}")
-        
-        return metricas
-    
-    def _extrair_metricas_texto(self, soup) -> dict:
-        """Extrai métricas específicas do relatório de texto."""
-        import re
-        metricas = {}
-        
-        try:
-            # Procurar por métricas de texto específicas
-            text_keywords = ['length', 'word', 'character', 'sentence', 'paragraph', 'quality', 'readability']
-            
-            for element in soup.find_all(['span', 'div', 'td']):
-                text = element.get_text().strip()
-                if any(keyword in text.lower() for keyword in text_keywords):
-                    # Verificar se é um valor numérico
-                    if re.match(r'^\d+\.?\d*$', text) or '%' in text:
-                        # Tentar encontrar o label
-                        parent = element.parent
-                        if parent:
-                            label_elem = parent.find(['span', 'div', 'td'], class_=re.compile(r'label|name|title'))
-                            if label_elem:
-                                label = label_elem.get_text().strip()
-                                metricas[label] = text
-            
-            # Procurar por tabelas com métricas de texto
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        label = cells[0].get_text().strip()
-                        value = cells[1].get_text().strip()
-                        
-                        if any(keyword in label.lower() for keyword in text_keywords):
-                            if re.match(r'^\d+\.?\d*$', value) or '%' in value:
-                                metricas[label] = value
-            
-        except Exception as e:
-            print(f"⚠️ Erro ao extrair métricas de texto: {e}")
-        
-        return metricas
-    
     def _gerar_metricas_detalhadas_evidently(self, df: pd.DataFrame) -> str:
         """Gera métricas detalhadas do Evidently AI baseadas nos dados."""
         try:
@@ -548,11 +682,8 @@ class AnalysisSystem:
             else:
                 df_evidently['word_count'] = df_evidently['prediction'].astype(str).str.split().str.len()
             
-            # Usar campo is_error se disponível, senão calcular is_valid
-            if self._usar_campo_is_error(df):
-                df_evidently['is_valid'] = ~df_evidently['is_error']
-            else:
-                df_evidently['is_valid'] = ~df_evidently['prediction'].apply(self._eh_resposta_invalida)
+            # Detector unificado combinado com a flag is_error da coleta (se disponível)
+            df_evidently['is_valid'] = mascara_respostas_validas(df_evidently)
             
             # Filtrar apenas respostas válidas
             df_validas = df_evidently[df_evidently['is_valid']]
@@ -643,20 +774,6 @@ class AnalysisSystem:
         except Exception as e:
             return f"### 📊 Métricas Detalhadas Evidently AI\n**Erro ao gerar métricas**: {str(e)}\n"
     
-    def _eh_resposta_invalida(self, resposta: str) -> bool:
-        """Verifica se uma resposta é inválida."""
-        if not resposta or pd.isna(resposta):
-            return True
-        
-        resposta_str = str(resposta).strip().lower()
-        padroes_erro = [
-            'erro', 'error', 'timeout', 'rate limit', 'api key',
-            'authentication', 'connection', 'network', 'failed',
-            'exception', 'traceback', 'null', 'none', 'undefined'
-        ]
-        
-        return any(padrao in resposta_str for padrao in padroes_erro)
-    
     def calcular_metricas_benchmarks(self, df: pd.DataFrame) -> Dict:
         """
         Calcula métricas de benchmarks (MMLU, HellaSwag) para cada modelo.
@@ -669,7 +786,29 @@ class AnalysisSystem:
         """
         print("🏆 Calculando métricas de benchmarks...")
         
-        metricas_benchmarks = {}
+        contagens = self.contar_respostas_benchmarks(df)
+        return {
+            model: {
+                benchmark_name: self.benchmarks[benchmark_name].calculate_metrics_from_counts(counts)
+                for benchmark_name, counts in contagens_modelo.items()
+            }
+            for model, contagens_modelo in contagens.items()
+        }
+    
+    def contar_respostas_benchmarks(self, df: pd.DataFrame) -> Dict[str, Dict[str, Dict]]:
+        """
+        Conta questões, respostas válidas e corretas de cada benchmark por modelo.
+        
+        As contagens são somáveis entre execuções (BaseBenchmark.merge_counts) e viram
+        métricas com calculate_metrics_from_counts de cada benchmark.
+        
+        Args:
+            df: DataFrame com resultados dos modelos
+            
+        Returns:
+            Dicionário modelo -> benchmark -> contagens
+        """
+        contagens = {}
         
         # Verificar se há benchmarks disponíveis
         if not self.benchmarks:
@@ -684,46 +823,23 @@ class AnalysisSystem:
             print("⚠️ Nenhum dado de benchmark encontrado")
             return {}
         
+        # Extrai a alternativa escolhida uma única vez para todas as linhas de benchmark
+        df_benchmarks['extracted_choice'] = BaseBenchmark.extract_choices(df_benchmarks['prediction'])
+        
         # Agrupar por modelo e benchmark
-        for model in df_benchmarks['model'].unique():
-            metricas_benchmarks[model] = {}
+        for model, df_model in df_benchmarks.groupby('model', observed=True, sort=False):
+            contagens[model] = {}
+            por_benchmark = dict(list(df_model.groupby('benchmark_final', observed=True)))
             
             for benchmark_name, benchmark_calc in self.benchmarks.items():
+                df_benchmark = por_benchmark.get(benchmark_name, df_model.iloc[0:0])
                 try:
-                    # Filtrar dados do benchmark específico
-                    df_benchmark = df_benchmarks[
-                        (df_benchmarks['model'] == model) & 
-                        (df_benchmarks['benchmark_final'] == benchmark_name)
-                    ]
-                    
-                    if not df_benchmark.empty:
-                        predictions = df_benchmark['prediction'].tolist()
-                        references = df_benchmark['reference'].tolist()
-                        
-                        # Calcular métricas do benchmark
-                        metrics = benchmark_calc.calculate_metrics(predictions, references)
-                        metricas_benchmarks[model][benchmark_name] = metrics
-                    else:
-                        metricas_benchmarks[model][benchmark_name] = {
-                            "accuracy": 0.0,
-                            "accuracy_valid_only": 0.0,
-                            "coverage": 0.0,
-                            "total_questions": 0,
-                            "valid_answers": 0,
-                            "correct_answers": 0
-                        }
+                    contagens[model][benchmark_name] = benchmark_calc.count_answers_from_frame(df_benchmark)
                 except Exception as e:
                     print(f"⚠️ Erro ao calcular métricas do benchmark {benchmark_name} para {model}: {e}")
-                    metricas_benchmarks[model][benchmark_name] = {
-                        "accuracy": 0.0,
-                        "accuracy_valid_only": 0.0,
-                        "coverage": 0.0,
-                        "total_questions": 0,
-                        "valid_answers": 0,
-                        "correct_answers": 0
-                    }
-        
-        return metricas_benchmarks
+                    contagens[model][benchmark_name] = benchmark_calc.count_answers_from_frame(df_benchmark.iloc[0:0])
+        
+        return contagens
     
     def _usar_campo_is_error(self, df: pd.DataFrame) -> bool:
         """Verifica se o DataFrame tem o campo is_error (nova versão da pipeline)."""
@@ -731,7 +847,9 @@ class AnalysisSystem:
     
     def gerar_relatorio_por_modelo(self, modelo: str, df: pd.DataFrame, 
                                  metricas_academicas: Dict, metricas_evidently: Dict,
-                                 metricas_benchmarks: Dict, pasta_destino: str) -> str:
+                                 metricas_benchmarks: Dict, pasta_destino: str,
+                                 metricas_consistencia: Optional[Dict] = None,
+                                 metricas_duplicatas: Optional[Dict] = None) -> str:
         """Gera relatório individual por modelo."""
         relatorio = []
         relatorio.append(f"# 🤖 Análise do Modelo: {modelo}")
@@ -749,8 +867,68 @@ class AnalysisSystem:
         relatorio.append(f"- **ROUGE-2**: {metricas_academicas.get('rouge2_medio', 0):.4f}")
         relatorio.append(f"- **ROUGE-L**: {metricas_academicas.get('rougeL_medio', 0):.4f}")
         relatorio.append(f"- **BERTScore**: {metricas_academicas.get('bertscore_f1_medio', 0):.4f}")
+        if 'semantic_similarity_medio' in metricas_academicas:
+            relatorio.append(f"- **Similaridade Semântica**: {metricas_academicas['semantic_similarity_medio']:.4f}")
+        if 'bleu_corpus' in metricas_academicas:
+            relatorio.append(f"- **BLEU (corpus)**: {metricas_academicas['bleu_corpus']:.4f}")
+            relatorio.append(
+                f"- **ROUGE micro (1/2/L)**: {metricas_academicas['rouge1_micro']:.4f} / "
+                f"{metricas_academicas['rouge2_micro']:.4f} / {metricas_academicas['rougeL_micro']:.4f}"
+            )
         relatorio.append("")
         
+        # Agregados lexicais por execução (somas das estatísticas suficientes, sem recálculo)
+        if 'execucao' in df.columns and set(COLUNAS_ESTATISTICAS_LEXICAS).issubset(df.columns):
+            por_execucao = agregar_metricas_lexicas(df, ['execucao'])
+            relatorio.append("### 📈 BLEU/ROUGE por Execução (corpus)")
+            relatorio.append("")
+            relatorio.append("| Execução | BLEU (corpus) | ROUGE-1 | ROUGE-2 | ROUGE-L |")
+            relatorio.append("|:-------|------:|------:|------:|------:|")
+            for execucao, linha in por_execucao.iterrows():
+                relatorio.append(
+                    f"| {execucao} | {linha['bleu_corpus']:.4f} | {linha['rouge1_micro']:.4f} | "
+                    f"{linha['rouge2_micro']:.4f} | {linha['rougeL_micro']:.4f} |"
+                )
+            relatorio.append("")
+        
+        # Estabilidade das respostas ao mesmo prompt entre execuções
+        if metricas_consistencia:
+            relatorio.append("### 🔁 Consistência entre Execuções")
+            relatorio.append("")
+            relatorio.append(
+                f"- **Consistência Lexical (Jaccard MinHash)**: {metricas_consistencia['consistencia_lexica_media']:.4f} "
+                f"(mín.: {metricas_consistencia['consistencia_lexica_min']:.4f})"
+            )
+            if 'consistencia_semantica_media' in metricas_consistencia:
+                relatorio.append(
+                    f"- **Consistência Semântica (embeddings)**: {metricas_consistencia['consistencia_semantica_media']:.4f} "
+                    f"(mín.: {metricas_consistencia['consistencia_semantica_min']:.4f})"
+                )
+            relatorio.append(
+                f"- **Prompts Comparados**: {metricas_consistencia['prompts_comparados']} "
+                f"({metricas_consistencia['pares_comparados']} pares de respostas)"
+            )
+            relatorio.append("")
+        
+        # Respostas quase idênticas a prompts diferentes (templates, recusas padronizadas)
+        if metricas_duplicatas:
+            relatorio.append("### 🧬 Respostas Quase Duplicadas")
+            relatorio.append("")
+            relatorio.append(
+                f"- **Templates**: {metricas_duplicatas['templates']} grupos com "
+                f"{metricas_duplicatas['respostas_em_templates']}/{metricas_duplicatas['respostas_avaliadas']} respostas "
+                f"({metricas_duplicatas['taxa_templates']:.1%}; maior: {metricas_duplicatas['maior_template']})"
+            )
+            if metricas_duplicatas['colapso_em_templates']:
+                relatorio.append("- ⚠️ **Colapso em templates**: boa parte das respostas a prompts diferentes é quase idêntica")
+            relatorio.append("")
+            if metricas_duplicatas['exemplos_templates']:
+                relatorio.append("| Respostas | Prompts | Exemplo |")
+                relatorio.append("|------:|------:|:-------|")
+                for template in metricas_duplicatas['exemplos_templates']:
+                    relatorio.append(f"| {template['respostas']} | {template['prompts']} | {template['exemplo']} |")
+                relatorio.append("")
+        
         # Métricas de Benchmarks
         if metricas_benchmarks and modelo in metricas_benchmarks:
             relatorio.append("## 🏆 Métricas de Benchmarks")
@@ -767,12 +945,18 @@ class AnalysisSystem:
                 relatorio.append(f"- **Respostas Válidas**: {mmlu_data.get('valid_answers', 0)}")
                 relatorio.append(f"- **Respostas Corretas**: {mmlu_data.get('correct_answers', 0)}")
                 
-                # Subjects específicos se disponível
-                if 'subjects' in mmlu_data and mmlu_data['subjects']:
-                    relatorio.append("- **Accuracy por Subject**:")
-                    for subject, accuracy in mmlu_data['subjects'].items():
-                        relatorio.append(f"  - {subject}: {accuracy:.4f}")
                 relatorio.append("")
+                
+                # Categorias e subjects específicos se disponível
+                if mmlu_data.get('categories'):
+                    relatorio.append("#### Accuracy por Categoria MMLU")
+                    relatorio.extend(self._tabela_metricas_mmlu(mmlu_data['categories'], "Categoria"))
+                    relatorio.append("")
+                
+                if mmlu_data.get('subjects'):
+                    relatorio.append("#### Accuracy por Subject MMLU")
+                    relatorio.extend(self._tabela_metricas_mmlu(mmlu_data['subjects'], "Subject"))
+                    relatorio.append("")
             
             # HellaSwag
             if 'hellaswag' in metricas_benchmarks[modelo]:
@@ -827,6 +1011,20 @@ class AnalysisSystem:
         
         return "\n".join(relatorio)
     
+    def _tabela_metricas_mmlu(self, metricas_por_grupo: Dict[str, Dict], rotulo: str) -> List[str]:
+        """Gera tabela markdown com accuracy/coverage por subject ou categoria MMLU."""
+        linhas = [
+            f"| {rotulo} | Accuracy | Accuracy (válidas) | Coverage | Questões | Válidas | Corretas |",
+            "|:-------|------:|------:|------:|------:|------:|------:|"
+        ]
+        for grupo, dados in sorted(metricas_por_grupo.items()):
+            linhas.append(
+                f"| {grupo} | {dados.get('accuracy', 0):.4f} | {dados.get('accuracy_valid_only', 0):.4f} | "
+                f"{dados.get('coverage', 0):.1%} | {dados.get('total_questions', 0)} | "
+                f"{dados.get('valid_answers', 0)} | {dados.get('correct_answers', 0)} |"
+            )
+        return linhas
+    
     def gerar_relatorio_consolidado(self, dados_por_modelo: Dict[str, pd.DataFrame],
                                   metricas_por_modelo: Dict[str, Dict],
                                   pasta_analise: str) -> str:
@@ -910,6 +1108,8 @@ class AnalysisSystem:
             relatorio.append(f"- **ROUGE-2**: {metricas_acad.get('rouge2_medio', 0):.4f}")
             relatorio.append(f"- **ROUGE-L**: {metricas_acad.get('rougeL_medio', 0):.4f}")
             relatorio.append(f"- **BERTScore**: {metricas_acad.get('bertscore_f1_medio', 0):.4f}")
+            if 'semantic_similarity_medio' in metricas_acad:
+                relatorio.append(f"- **Similaridade Semântica**: {metricas_acad['semantic_similarity_medio']:.4f}")
             relatorio.append("")
             
             # Métricas Evidently AI
@@ -965,6 +1165,24 @@ class AnalysisSystem:
             relatorio.append(f"{emoji} **{modelo}**: {comprimento:.1f} caracteres")
             relatorio.append("")
         
+        # Ranking por consistência entre execuções
+        modelos_consistencia = [(modelo, metricas_por_modelo[modelo]['consistencia'])
+                                for modelo in dados_por_modelo.keys()
+                                if metricas_por_modelo[modelo].get('consistencia')]
+        modelos_consistencia.sort(key=lambda x: x[1]['consistencia_lexica_media'], reverse=True)
+        
+        if modelos_consistencia:
+            relatorio.append("**Ranking por Consistência entre Execuções (lexical / semântica, média e mínimo):**")
+            for i, (modelo, consistencia) in enumerate(modelos_consistencia, 1):
+                emoji = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}º"
+                linha = (f"{emoji} **{modelo}**: {consistencia['consistencia_lexica_media']:.4f} "
+                         f"(mín. {consistencia['consistencia_lexica_min']:.4f})")
+                if 'consistencia_semantica_media' in consistencia:
+                    linha += (f" / {consistencia['consistencia_semantica_media']:.4f} "
+                              f"(mín. {consistencia['consistencia_semantica_min']:.4f})")
+                relatorio.append(linha)
+                relatorio.append("")
+        
         # Recomendações
         relatorio.append("## 💡 Recomendações")
         relatorio.append("")
@@ -1681,6 +1899,152 @@ print("Rankings gerados e salvos em rankings.md")
         with open(caminho_script, 'w', encoding='utf-8') as f:
             f.write(script_content)
     
+    def _analisar_modelo(self, modelo: str, df: pd.DataFrame, pasta_analise: str,
+                         metricas_consistencia: Optional[Dict] = None,
+                         metricas_duplicatas: Optional[Dict] = None) -> Dict:
+        """
+        Analisa um modelo: métricas, relatórios Evidently AI, relatório e CSV do modelo.
+        
+        Não depende dos demais modelos, então pode rodar em outro processo
+        (ver _analisar_modelos_em_paralelo).
+        
+        Args:
+            modelo: Nome do modelo
+            df: Dados do modelo (com o BERTScore já calculado em lote, se habilitado)
+            pasta_analise: Pasta da análise consolidada
+            metricas_consistencia: Consistência entre execuções do modelo (se calculada)
+            metricas_duplicatas: Métricas de quase duplicatas do modelo (se calculadas)
+            
+        Returns:
+            Métricas do modelo para metricas_consolidadas.json
+        """
+        print(f"\n🤖 Processando modelo: {modelo}")
+        
+        # Criar pasta do modelo
+        pasta_modelo = os.path.join(pasta_analise, f"modelo_{modelo}")
+        os.makedirs(pasta_modelo, exist_ok=True)
+        
+        # Calcular métricas acadêmicas
+        df_com_metricas, metricas_academicas, relatorio_academicas = self.calcular_metricas_academicas(df)
+        
+        # Calcular métricas Evidently AI
+        metricas_evidently = self.calcular_metricas_evidently(df_com_metricas)
+        
+        # Calcular métricas de benchmarks
+        metricas_benchmarks = self.calcular_metricas_benchmarks(df_com_metricas)
+        
+        # Gerar relatórios Evidently AI
+        try:
+            # Tentar import relativo (quando chamado via main.py)
+            from .evidently_reports import gerar_relatorios_evidently_completo
+        except ImportError:
+            # Fallback para import absoluto (quando executado diretamente)
+            from evidently_reports import gerar_relatorios_evidently_completo
+        
+        try:
+            pasta_evidently = os.path.join(pasta_modelo, "evidently_reports")
+            relatorios_evidently, relatorio_evidently = gerar_relatorios_evidently_completo(df_com_metricas, pasta_evidently)
+            print(f"📊 Relatórios Evidently AI salvos em: {pasta_evidently}")
+        except Exception as e:
+            print(f"⚠️ Erro ao gerar relatórios Evidently AI: {e}")
+            relatorios_evidently = {}
+            relatorio_evidently = ""
+        
+        # Gerar relatório individual do modelo
+        relatorio_modelo = self.gerar_relatorio_por_modelo(modelo, df_com_metricas, 
+                                                          metricas_academicas, metricas_evidently, 
+                                                          metricas_benchmarks, pasta_modelo,
+                                                          metricas_consistencia, metricas_duplicatas)
+        
+        # Adicionar relatório Evidently AI
+        if relatorio_evidently:
+            relatorio_modelo += "\n\n" + relatorio_evidently
+        
+        # Adicionar métricas detalhadas do Evidently AI baseadas nos dados
+        relatorio_detalhado = self._gerar_metricas_detalhadas_evidently(df_com_metricas)
+        relatorio_modelo += "\n\n" + relatorio_detalhado
+        
+        # Salvar relatório do modelo
+        arquivo_relatorio_modelo = os.path.join(pasta_modelo, f"relatorio_{modelo}.md")
+        with open(arquivo_relatorio_modelo, 'w', encoding='utf-8') as f:
+            f.write(relatorio_modelo)
+        
+        # Salvar dados do modelo
+        df_com_metricas.to_csv(os.path.join(pasta_modelo, f"dados_{modelo}.csv"), 
+                              index=False, encoding=self.config.ENCODING_CSV)
+        
+        # Armazenar métricas
+        metricas_modelo = {
+            'academicas': metricas_academicas,
+            'evidently': metricas_evidently,
+            'benchmarks': metricas_benchmarks.get(modelo, {})
+        }
+        if metricas_consistencia is not None:
+            metricas_modelo['consistencia'] = metricas_consistencia
+        if metricas_duplicatas is not None:
+            metricas_modelo['duplicatas'] = metricas_duplicatas
+        
+        print(f"✅ {modelo}: Relatório salvo em {arquivo_relatorio_modelo}")
+        return metricas_modelo
+    
+    def _analisar_modelos_em_paralelo(self, dados_por_modelo: Dict[str, pd.DataFrame], pasta_analise: str,
+                                      consistencia_por_modelo: Dict[str, Dict],
+                                      duplicatas_por_modelo: Dict[str, Dict], workers: int) -> Dict[str, Dict]:
+        """
+        Analisa os modelos em um pool de processos (_analisar_modelo em cada um).
+        
+        Os resultados são reunidos na ordem de dados_por_modelo, não na de conclusão,
+        então metricas_consolidadas.json sai idêntico ao da análise serial. Modelos
+        cujo processo falhar são analisados de novo no processo principal. Os processos
+        partem de um forkserver (ver contexto_processos), sem herdar o modelo do
+        BERTScore nem as threads do torch já carregados no processo principal.
+        
+        Args:
+            dados_por_modelo: Dados de cada modelo
+            pasta_analise: Pasta da análise consolidada
+            consistencia_por_modelo: Consistência entre execuções por modelo
+            duplicatas_por_modelo: Métricas de quase duplicatas por modelo
+            workers: Número de processos
+            
+        Returns:
+            Dicionário com as métricas de cada modelo
+        """
+        print(f"\n⚙️ Analisando {len(dados_por_modelo)} modelos em {workers} processos...")
+        
+        resultados = {}
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_processos(),
+                                     initializer=_inicializar_processo_analise,
+                                     initargs=(dict(self.vazao_metricas), workers)) as executor:
+                tarefas = {
+                    modelo: executor.submit(_analisar_modelo_em_processo, modelo, df, pasta_analise,
+                                            consistencia_por_modelo.get(modelo),
+                                            duplicatas_por_modelo.get(modelo))
+                    for modelo, df in dados_por_modelo.items()
+                }
+                for modelo, tarefa in tarefas.items():
+                    try:
+                        resultados[modelo] = tarefa.result()
+                    except Exception as e:
+                        print(f"⚠️ Erro ao analisar {modelo} em paralelo: {e}")
+        except Exception as e:
+            print(f"⚠️ Erro no pool de processos da análise: {e}")
+        
+        # Taxa de acerto do cache de métricas inclui as consultas feitas nos processos
+        cache_metricas = obter_cache_metricas()
+        metricas_por_modelo = {}
+        for modelo, df in dados_por_modelo.items():
+            if modelo in resultados:
+                metricas_por_modelo[modelo], estatisticas_cache = resultados[modelo]
+                if cache_metricas is not None:
+                    cache_metricas.somar_estatisticas(estatisticas_cache)
+            else:
+                metricas_por_modelo[modelo] = self._analisar_modelo(
+                    modelo, df, pasta_analise, consistencia_por_modelo.get(modelo),
+                    duplicatas_por_modelo.get(modelo)
+                )
+        return metricas_por_modelo
+    
     def executar_analise_completa(self) -> str:
         """Executa análise completa e retorna caminho do relatório."""
         print("🚀 Iniciando Análise Consolidada")
@@ -1694,93 +2058,56 @@ print("Rankings gerados e salvos em rankings.md")
             print("❌ Nenhuma execução encontrada para análise")
             return None
         
-        # Consolidar dados por modelo
-        dados_por_modelo = self.consolidar_dados_por_modelo(execucoes)
+        # Carregar todas as execuções de uma vez; cada modelo é uma fatia sem cópia
+        df_execucoes = self.carregar_execucoes(execucoes)
+        dados_por_modelo = self.fatias_por_modelo(df_execucoes)
+        for modelo, df_modelo in dados_por_modelo.items():
+            print(f"✅ {modelo}: {len(df_modelo)} registros consolidados")
         
         if not dados_por_modelo:
             print("❌ Nenhum modelo encontrado para análise")
             return None
         
+        # Taxa de acerto do cache de métricas contada a partir desta análise
+        cache_metricas = obter_cache_metricas()
+        if cache_metricas is not None:
+            cache_metricas.zerar_estatisticas()
+        
+        # BERTScore de todos os modelos em uma única chamada (modelo carregado uma vez)
+        if 'bertscore' in self.config.METRICAS_SEMANTICAS:
+            dados_por_modelo = self._calcular_bertscore_em_lote(dados_por_modelo)
+        
         # Criar pasta de análise
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         pasta_analise = os.path.join(self.pasta_analysis, f"analise_consolidada_{timestamp}")
         os.makedirs(pasta_analise, exist_ok=True)
         
-        # Processar cada modelo
-        metricas_por_modelo = {}
+        # Consistência entre execuções de todos os modelos (respostas codificadas uma vez)
+        consistencia_por_modelo = self.calcular_consistencia_execucoes(df_execucoes, pasta_analise)
         
-        for modelo, df in dados_por_modelo.items():
-            print(f"\n🤖 Processando modelo: {modelo}")
-            
-            # Criar pasta do modelo
-            pasta_modelo = os.path.join(pasta_analise, f"modelo_{modelo}")
-            os.makedirs(pasta_modelo, exist_ok=True)
-            
-            # Calcular métricas acadêmicas
-            df_com_metricas, metricas_academicas, relatorio_academicas = self.calcular_metricas_academicas(df)
-            
-            # Calcular métricas Evidently AI
-            metricas_evidently = self.calcular_metricas_evidently(df_com_metricas)
-            
-            # Calcular métricas de benchmarks
-            metricas_benchmarks = self.calcular_metricas_benchmarks(df_com_metricas)
-            
-            # Gerar relatórios Evidently AI
-            try:
-                # Tentar import relativo (quando chamado via main.py)
-                from .evidently_reports import gerar_relatorios_evidently_completo
-            except ImportError:
-                # Fallback para import absoluto (quando executado diretamente)
-                from evidently_reports import gerar_relatorios_evidently_completo
-            
-            try:
-                pasta_evidently = os.path.join(pasta_modelo, "evidently_reports")
-                relatorios_evidently, relatorio_evidently = gerar_relatorios_evidently_completo(df_com_metricas, pasta_evidently)
-                print(f"📊 Relatórios Evidently AI salvos em: {pasta_evidently}")
-            except Exception as e:
-                print(f"⚠️ Erro ao gerar relatórios Evidently AI: {e}")
-                relatorios_evidently = {}
-                relatorio_evidently = ""
-            
-            # Gerar relatório individual do modelo
-            relatorio_modelo = self.gerar_relatorio_por_modelo(modelo, df_com_metricas, 
-                                                              metricas_academicas, metricas_evidently, 
-                                                              metricas_benchmarks, pasta_modelo)
-            
-            # Adicionar relatório Evidently AI
-            if relatorio_evidently:
-                relatorio_modelo += "\n\n" + relatorio_evidently
-            
-            # Adicionar análise do HTML do Evidently AI
-            pasta_evidently = os.path.join(pasta_modelo, "evidently_reports")
-            if os.path.exists(pasta_evidently):
-                relatorio_html = self._analisar_html_evidently(pasta_evidently)
-                relatorio_modelo += "\n\n" + relatorio_html
-            
-            # Adicionar métricas detalhadas do Evidently AI baseadas nos dados
-            relatorio_detalhado = self._gerar_metricas_detalhadas_evidently(df_com_metricas)
-            relatorio_modelo += "\n\n" + relatorio_detalhado
-            
-            # Salvar relatório do modelo
-            arquivo_relatorio_modelo = os.path.join(pasta_modelo, f"relatorio_{modelo}.md")
-            with open(arquivo_relatorio_modelo, 'w', encoding='utf-8') as f:
-                f.write(relatorio_modelo)
-            
-            # Salvar dados do modelo
-            df_com_metricas.to_csv(os.path.join(pasta_modelo, f"dados_{modelo}.csv"), 
-                                  index=False, encoding=self.config.ENCODING_CSV)
-            
-            # Armazenar métricas
-            metricas_por_modelo[modelo] = {
-                'academicas': metricas_academicas,
-                'evidently': metricas_evidently,
-                'benchmarks': metricas_benchmarks.get(modelo, {})
+        # Respostas quase duplicadas por modelo e entre modelos (MinHash + LSH)
+        duplicatas_por_modelo, relatorio_duplicatas = self.detectar_respostas_duplicadas(df_execucoes, pasta_analise)
+        
+        # Processar cada modelo (em processos se ANALISE_WORKERS != 1)
+        workers = min(self.config.ANALISE_WORKERS or os.cpu_count() or 1, len(dados_por_modelo))
+        if workers > 1:
+            metricas_por_modelo = self._analisar_modelos_em_paralelo(
+                dados_por_modelo, pasta_analise, consistencia_por_modelo, duplicatas_por_modelo, workers
+            )
+        else:
+            metricas_por_modelo = {
+                modelo: self._analisar_modelo(modelo, df, pasta_analise, consistencia_por_modelo.get(modelo),
+                                              duplicatas_por_modelo.get(modelo))
+                for modelo, df in dados_por_modelo.items()
             }
-            
-            print(f"✅ {modelo}: Relatório salvo em {arquivo_relatorio_modelo}")
         
         # Gerar relatório consolidado
         relatorio_consolidado = self.gerar_relatorio_consolidado(dados_por_modelo, metricas_por_modelo, pasta_analise)
+        if relatorio_duplicatas:
+            relatorio_consolidado += "\n" + relatorio_duplicatas
+        relatorio_cache = relatorio_cache_metricas()
+        if relatorio_cache:
+            relatorio_consolidado += "\n" + relatorio_cache
         
         # Salvar relatório consolidado
         arquivo_relatorio_consolidado = os.path.join(pasta_analise, "relatorio_consolidado.md")
@@ -1799,9 +2126,209 @@ print("Rankings gerados e salvos em rankings.md")
         
         return arquivo_relatorio_consolidado
 
+    def executar_analise_incremental(self) -> str:
+        """
+        Executa a análise incremental e retorna caminho do relatório.
+        
+        Só as execuções novas ou alteradas (hash do resultados_todos.csv ou configuração
+        das métricas diferente do manifesto) são carregadas e pontuadas; as métricas por
+        modelo combinam os agregados parciais guardados de todas as execuções.
+        """
+        print("🚀 Iniciando Análise Incremental")
+        print("=" * 60)
+        
+        execucoes = self.encontrar_execucoes()
+        print(f"📁 Encontradas {len(execucoes)} execuções")
+        
+        if not execucoes:
+            print("❌ Nenhuma execução encontrada para análise")
+            return None
+        
+        manifesto = obter_manifesto()
+        snapshot = snapshot_configuracao()
+        
+        nomes = [os.path.basename(execucao) for execucao in execucoes]
+        removidas = manifesto.manter_apenas(nomes)
+        for nome in removidas:
+            print(f"🗑️ {nome} não existe mais - removida do manifesto")
+        
+        cache_metricas = obter_cache_metricas()
+        if cache_metricas is not None:
+            cache_metricas.zerar_estatisticas()
+        
+        situacao_execucoes = {}
+        for execucao, nome in zip(execucoes, nomes):
+            arquivo_csv = os.path.join(execucao, "resultados_todos.csv")
+            if not os.path.exists(arquivo_csv):
+                print(f"❌ Arquivo {arquivo_csv} não encontrado")
+                continue
+            
+            hash_resultados = hash_arquivo(arquivo_csv)
+            if not manifesto.precisa_analisar(nome, hash_resultados, snapshot):
+                situacao_execucoes[nome] = "reaproveitada"
+                continue
+            
+            situacao_execucoes[nome] = "nova" if nome not in manifesto.execucoes else "reanalisada"
+            dados_por_modelo = self.consolidar_dados_por_modelo([execucao])
+            if not dados_por_modelo:
+                situacao_execucoes[nome] = "ignorada"
+                continue
+            if 'bertscore' in self.config.METRICAS_SEMANTICAS:
+                dados_por_modelo = self._calcular_bertscore_em_lote(dados_por_modelo)
+            
+            agregados_execucao = {}
+            falhas = set()
+            for modelo, df in dados_por_modelo.items():
+                df_com_metricas, _, _ = self.calcular_metricas_academicas(df)
+                falhas.update(self.falhas_metricas)
+                contagens = self.contar_respostas_benchmarks(df_com_metricas).get(modelo, {})
+                agregados_execucao[modelo] = agregados_parciais(df_com_metricas, contagens)
+            
+            if falhas:
+                # Agregados parciais de uma pontuação com falha não entram no manifesto:
+                # a execução fica fora desta análise e é pontuada de novo na próxima
+                print(f"⚠️ {nome}: falha em {', '.join(sorted(falhas))} - execução não registrada no manifesto")
+                situacao_execucoes[nome] = f"com falha ({', '.join(sorted(falhas))})"
+                if nome in manifesto.execucoes:
+                    manifesto.remover(nome)
+                    manifesto.salvar()
+                continue
+            
+            linhas = sum(len(df) for df in dados_por_modelo.values())
+            manifesto.registrar(nome, hash_resultados, linhas, snapshot, agregados_execucao)
+            manifesto.salvar()
+        
+        if removidas:
+            manifesto.salvar()
+        
+        analisadas = [nome for nome, situacao in situacao_execucoes.items() if situacao in ("nova", "reanalisada")]
+        reaproveitadas = [nome for nome, situacao in situacao_execucoes.items() if situacao == "reaproveitada"]
+        print(f"♻️ {len(analisadas)} execuções pontuadas, {len(reaproveitadas)} reaproveitadas do manifesto")
+        
+        metricas_por_modelo = {
+            modelo: metricas_de_agregados(agregados, self.benchmarks)
+            for modelo, agregados in manifesto.agregados_por_modelo().items()
+        }
+        if not metricas_por_modelo:
+            print("❌ Nenhum modelo encontrado para análise")
+            return None
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        pasta_analise = os.path.join(self.pasta_analysis, f"analise_incremental_{timestamp}")
+        os.makedirs(pasta_analise, exist_ok=True)
+        
+        with open(os.path.join(pasta_analise, "metricas_consolidadas.json"), 'w', encoding='utf-8') as f:
+            json.dump(metricas_por_modelo, f, indent=2, ensure_ascii=False, default=str)
+        
+        relatorio = self._gerar_relatorio_incremental(metricas_por_modelo, situacao_execucoes, manifesto)
+        relatorio_cache = relatorio_cache_metricas()
+        if relatorio_cache:
+            relatorio += "\n" + relatorio_cache
+        
+        arquivo_relatorio = os.path.join(pasta_analise, "relatorio_incremental.md")
+        with open(arquivo_relatorio, 'w', encoding='utf-8') as f:
+            f.write(relatorio)
+        
+        print(f"\n💾 Análise incremental salva em: {pasta_analise}")
+        print(f"📄 Relatório incremental: {arquivo_relatorio}")
+        
+        return arquivo_relatorio
+    
+    def _gerar_relatorio_incremental(self, metricas_por_modelo: Dict[str, Dict],
+                                     situacao_execucoes: Dict[str, str], manifesto) -> str:
+        """
+        Gera o relatório resumido da análise incremental.
+        
+        Args:
+            metricas_por_modelo: Métricas combinadas por modelo
+            situacao_execucoes: Execução -> 'nova', 'reanalisada', 'reaproveitada', 'ignorada' ou 'com falha (...)'
+            manifesto: Manifesto de execuções (ManifestoExecucoes)
+            
+        Returns:
+            String com relatório formatado
+        """
+        relatorio = []
+        relatorio.append("# 📊 Análise Incremental de Modelos LLM")
+        relatorio.append("")
+        relatorio.append(f"**Data da Análise**: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        relatorio.append(f"**Manifesto**: `{manifesto.caminho}`")
+        relatorio.append("")
+        
+        relatorio.append("## 📁 Execuções")
+        relatorio.append("")
+        relatorio.append("| Execução | Situação | Linhas | Hash |")
+        relatorio.append("|:-------|:-------|------:|:-------|")
+        for nome, situacao in situacao_execucoes.items():
+            registro = manifesto.execucoes.get(nome, {})
+            relatorio.append(f"| {nome} | {situacao} | {registro.get('linhas', '-')} | "
+                             f"`{registro.get('hash', '-')[:12]}` |")
+        relatorio.append("")
+        
+        relatorio.append("## 🏆 Métricas por Modelo")
+        relatorio.append("")
+        relatorio.append("| Modelo | Respostas | Válidas | BLEU | ROUGE-L | BERTScore F1 | MMLU | HellaSwag |")
+        relatorio.append("|:-------|------:|------:|------:|------:|------:|------:|------:|")
+        for modelo, metricas in metricas_por_modelo.items():
+            academicas = metricas['academicas']
+            evidently = metricas['evidently']
+            benchmarks = metricas['benchmarks']
+            colunas = [
+                f"{academicas[chave]:.4f}" if chave in academicas else "-"
+                for chave in ('bleu_medio', 'rougeL_medio', 'bertscore_f1_medio')
+            ] + [
+                f"{benchmarks[nome]['accuracy']:.1%}" if benchmarks.get(nome, {}).get('total_questions') else "-"
+                for nome in ('mmlu', 'hellaswag')
+            ]
+            relatorio.append(f"| {modelo} | {evidently['total_respostas']} | {evidently['taxa_validas']:.1%} | "
+                             + " | ".join(colunas) + " |")
+        relatorio.append("")
+        relatorio.append("Consistência entre execuções, respostas quase duplicadas, relatórios Evidently e "
+                         "rankings dependem das respostas de todas as execuções e só são gerados pela "
+                         "análise completa (ANALISE_INCREMENTAL = False).")
+        relatorio.append("")
+        return "\n".join(relatorio)
+
+# Sistema de análise de cada processo da análise paralela por modelo
+_sistema_processo: Optional[AnalysisSystem] = None
+
+
+def _inicializar_processo_analise(vazao_metricas: Dict[str, float], workers: int) -> None:
+    """Cria o AnalysisSystem do processo (uma vez por processo do pool)."""
+    global _sistema_processo
+    # Núcleos divididos entre os processos (similaridade semântica em torch)
+    try:
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    except ImportError:
+        pass
+    _sistema_processo = AnalysisSystem()
+    # Vazão do BERTScore medida no processo principal, para o comparativo nos relatórios
+    _sistema_processo.vazao_metricas.update(vazao_metricas)
+
+
+def _analisar_modelo_em_processo(modelo: str, df: pd.DataFrame, pasta_analise: str,
+                                 metricas_consistencia: Optional[Dict],
+                                 metricas_duplicatas: Optional[Dict]) -> Tuple[Dict, Dict]:
+    """
+    Analisa um modelo no processo do pool.
+    
+    Returns:
+        Tuple com (métricas do modelo, pares consultados/encontrados no cache de métricas)
+    """
+    cache_metricas = obter_cache_metricas()
+    if cache_metricas is not None:
+        cache_metricas.zerar_estatisticas()
+    metricas = _sistema_processo._analisar_modelo(modelo, df, pasta_analise,
+                                                  metricas_consistencia, metricas_duplicatas)
+    estatisticas_cache = dict(cache_metricas.estatisticas) if cache_metricas is not None else {}
+    return metricas, estatisticas_cache
+
+
 def executar_analise():
-    """Função principal para executar análise consolidada."""
+    """Função principal para executar análise consolidada (incremental se ANALISE_INCREMENTAL)."""
     analyzer = AnalysisSystem()
+    if analyzer.config.ANALISE_INCREMENTAL:
+        return analyzer.executar_analise_incremental()
     return analyzer.executar_analise_completa()
 
 if __name__ == "__main__":
@@ -4,9 +4,41 @@ Classe base para benchmarks padronizados.
 Define interface comum para todos os benchmarks (MMLU, HellaSwag, etc.).
 """
 
-from typing import Dict, List, Any
+import re
+from typing import Dict, List, Any, Optional
+import numpy as np
 import pandas as pd
 
+# Import compatível com execução direta e via import
+try:
+    from .invalid_responses import classificar_respostas, eh_resposta_invalida
+except ImportError:
+    from invalid_responses import classificar_respostas, eh_resposta_invalida
+
+
+# Bloco de raciocínio emitido por alguns modelos (ex: qwen) antes da resposta final.
+_THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+
+# Padrões de extração em ordem de prioridade. Resposta só com a letra e declaração
+# explícita aceitam minúsculas ("b", "answer: d"); nos demais a letra é maiúscula para
+# não confundir o artigo "a" ("a group of people...") com a alternativa A.
+_CHOICE_PATTERNS = [
+    # Resposta composta apenas pela letra: "A", "(b)", "**C**", "d."
+    re.compile(r"^[\s*(\[]*([A-Da-d])[)\].:*\s]*$"),
+    # Declaração explícita: "The correct answer is B", "Answer: C)", "Resposta: D", "Opção A"
+    re.compile(
+        r"(?i:(?:the\s+)?(?:correct\s+)?answer|resposta(?:\s+correta)?|choice|option|op[çc][ãa]o|alternativa)"
+        r"(?:\s+(?i:is|é))?[\s:*\-]*[(\[]?([A-Da-d])(?![A-Za-z])"
+    ),
+    # Resposta iniciada pela alternativa: "A) He continues...", "**B) Kidney**"
+    re.compile(r"^[\s*(\[]*([A-D])\)"),
+    # Último recurso: primeira alternativa citada no formato "C)"
+    re.compile(r"(?<![A-Za-z])([A-D])\)"),
+]
+
+# Contagens por grupo de questões usadas no cálculo de accuracy/coverage
+COUNT_COLUMNS = ['total_questions', 'valid_answers', 'correct_answers', 'correct_valid_answers']
+
 
 class BaseBenchmark:
     """
@@ -35,7 +67,191 @@ class BaseBenchmark:
         Returns:
             Dicionário com métricas calculadas
         """
-        raise NotImplementedError("Subclasses devem implementar calculate_metrics")
+        if not predictions or not references or len(predictions) != len(references):
+            return self.empty_metrics()
+        
+        df = pd.DataFrame({'prediction': predictions, 'reference': references})
+        return self.calculate_metrics_from_frame(self.add_extracted_choice(df))
+    
+    def calculate_metrics_from_frame(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Calcula métricas a partir de um DataFrame com a coluna 'extracted_choice'.
+        
+        Args:
+            df: DataFrame com colunas 'prediction', 'reference' e 'extracted_choice'
+            
+        Returns:
+            Dicionário com métricas calculadas
+        """
+        return self.calculate_metrics_from_counts(self.count_answers_from_frame(df))
+    
+    def count_answers_from_frame(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Conta questões, respostas válidas e corretas de um DataFrame do benchmark.
+        
+        As contagens de subconjuntos (ex.: execuções) podem ser somadas com
+        merge_counts e convertidas em métricas por calculate_metrics_from_counts.
+        
+        Args:
+            df: DataFrame com colunas 'prediction', 'reference' e 'extracted_choice'
+            
+        Returns:
+            Dicionário com 'total_questions', 'valid_answers', 'correct_answers' e
+            'correct_valid_answers'
+        """
+        if df.empty:
+            return {col: 0 for col in COUNT_COLUMNS}
+        
+        scored = self._score_frame(df)
+        counts = {col: int(valor) for col, valor in scored.sum().items()}
+        counts['total_questions'] = len(scored)
+        return counts
+    
+    @staticmethod
+    def merge_counts(counts_a: Dict[str, Any], counts_b: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Soma duas contagens de count_answers_from_frame (dicionários aninhados somados por chave).
+        
+        Args:
+            counts_a: Primeira contagem
+            counts_b: Segunda contagem
+            
+        Returns:
+            Contagem combinada
+        """
+        merged = dict(counts_a)
+        for key, value in counts_b.items():
+            if isinstance(value, dict):
+                merged[key] = BaseBenchmark.merge_counts(merged.get(key, {}), value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+        return merged
+    
+    def calculate_metrics_from_counts(self, counts: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calcula métricas a partir das contagens de count_answers_from_frame.
+        
+        Args:
+            counts: Contagens do benchmark (de um frame ou somadas com merge_counts)
+            
+        Returns:
+            Dicionário com métricas calculadas
+        """
+        if not counts.get('total_questions'):
+            return self.empty_metrics()
+        
+        totals = pd.DataFrame([{col: counts[col] for col in COUNT_COLUMNS}])
+        return self._counts_to_metrics(totals).iloc[0].to_dict()
+    
+    def empty_metrics(self) -> Dict[str, Any]:
+        """
+        Retorna métricas zeradas para benchmarks sem questões.
+        
+        Returns:
+            Dicionário com métricas zeradas
+        """
+        return {
+            "accuracy": 0.0,
+            "accuracy_valid_only": 0.0,
+            "coverage": 0.0,
+            "total_questions": 0,
+            "valid_answers": 0,
+            "correct_answers": 0,
+            "correct_valid_answers": 0
+        }
+    
+    @staticmethod
+    def extract_choices(predictions: pd.Series) -> pd.Series:
+        """
+        Extrai a alternativa escolhida (A-D) de cada predição em uma única passada vetorizada.
+        
+        Args:
+            predictions: Série com as predições do modelo
+            
+        Returns:
+            Série com a letra extraída ou None quando nenhuma alternativa é identificada
+        """
+        texts = predictions.fillna("").astype(str).str.replace(_THINK_BLOCK, "", regex=True).str.strip()
+        extracted = pd.Series(np.nan, index=predictions.index, dtype=object)
+        for pattern in _CHOICE_PATTERNS:
+            pending = extracted.isna()
+            if not pending.any():
+                break
+            extracted[pending] = texts[pending].str.extract(pattern, expand=False).str.upper()
+        return extracted.where(extracted.notna(), None)
+    
+    @classmethod
+    def extract_choice(cls, prediction: str) -> Optional[str]:
+        """
+        Extrai a alternativa escolhida (A-D) de uma única predição.
+        
+        Args:
+            prediction: Predição do modelo
+            
+        Returns:
+            Letra extraída ou None
+        """
+        return cls.extract_choices(pd.Series([prediction], dtype=object)).iloc[0]
+    
+    def add_extracted_choice(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adiciona a coluna 'extracted_choice' ao DataFrame de benchmark.
+        
+        Args:
+            df: DataFrame com a coluna 'prediction'
+            
+        Returns:
+            Cópia do DataFrame com a coluna 'extracted_choice'
+        """
+        df_choices = df.copy()
+        df_choices['extracted_choice'] = self.extract_choices(df_choices['prediction'])
+        return df_choices
+    
+    def _correct_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Compara a alternativa extraída com a referência normalizada."""
+        references = df['reference'].fillna("").astype(str).str.strip().str.upper()
+        return df['extracted_choice'].notna() & (df['extracted_choice'] == references)
+    
+    def _score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Marca cada linha como correta/válida para agregação posterior.
+        
+        Args:
+            df: DataFrame com colunas 'prediction', 'reference' e 'extracted_choice'
+            
+        Returns:
+            DataFrame booleano com colunas 'correct_answers', 'valid_answers' e 'correct_valid_answers'
+        """
+        is_correct = self._correct_mask(df)
+        is_valid = classificar_respostas(df['prediction'])['is_valid']
+        return pd.DataFrame({
+            'valid_answers': is_valid,
+            'correct_answers': is_correct,
+            'correct_valid_answers': is_correct & is_valid
+        }, index=df.index)
+    
+    @staticmethod
+    def _counts_to_metrics(counts: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte contagens agregadas (uma linha por grupo) em métricas de accuracy/coverage.
+        
+        Args:
+            counts: DataFrame com colunas 'total_questions', 'valid_answers',
+                'correct_answers' e 'correct_valid_answers'
+            
+        Returns:
+            DataFrame com métricas por grupo
+        """
+        total = counts['total_questions']
+        valid = counts['valid_answers']
+        metrics = pd.DataFrame({
+            'accuracy': (counts['correct_answers'] / total).where(total > 0, 0.0),
+            'accuracy_valid_only': (counts['correct_valid_answers'] / valid).where(valid > 0, 0.0),
+            'coverage': (valid / total).where(total > 0, 0.0),
+        }, index=counts.index).astype(float)
+        for col in ['total_questions', 'valid_answers', 'correct_answers', 'correct_valid_answers']:
+            metrics[col] = counts[col].astype(int)
+        return metrics.astype(object)
     
     def format_prompt(self, question_data: Dict[str, Any]) -> str:
         """
@@ -63,28 +279,14 @@ class BaseBenchmark:
         if not prediction or not reference:
             return False
         
-        # Normalizar strings para comparação
-        pred_clean = prediction.strip().upper()
-        ref_clean = reference.strip().upper()
-        
-        return pred_clean == ref_clean
+        return self.extract_choice(prediction) == reference.strip().upper()
     
 
     def is_invalid_prediction(self, prediction: str) -> bool:
         """
-        Identifica predi??o inv?lida por erro de API/conte?do vazio.
-        """
-        if prediction is None:
-            return True
-        pred = str(prediction).strip().lower()
-        if not pred:
-            return True
-        patterns = [
-            '[erro]', 'erro', 'error', 'timeout', 'rate limit', 'quota',
-            'authentication', 'unauthorized', 'not found', 'permission',
-            'blocked', 'safety', 'resposta vazia', 'nenhuma resposta'
-        ]
-        return any(p in pred for p in patterns)
+        Identifica predição inválida por erro de API/conteúdo vazio.
+        """
+        return eh_resposta_invalida(prediction)
 
     def calculate_accuracy(self, predictions: List[str], references: List[str]) -> float:
         """
@@ -103,12 +305,8 @@ class BaseBenchmark:
         if len(predictions) != len(references):
             return 0.0
         
-        correct = 0
-        for pred, ref in zip(predictions, references):
-            if self.validate_prediction(pred, ref):
-                correct += 1
-        
-        return correct / len(predictions)
+        df = self.add_extracted_choice(pd.DataFrame({'prediction': predictions, 'reference': references}))
+        return float(self._correct_mask(df).mean())
     
     def get_benchmark_info(self) -> Dict[str, Any]:
         """
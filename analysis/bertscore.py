@@ -9,17 +9,460 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 import sys
 import os
+import shutil
+import tempfile
+import threading
+import time
 
 # Adicionar o diretório pai ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.config import get_config
 
+# Import compatível com execução direta e via import
+try:
+    from .invalid_responses import mascara_respostas_validas
+    from .cache_embeddings import CacheEmbeddings, pasta_modelo_cache
+    from .cache_metricas import pontuar_com_cache, versao_metrica
+    from .tokenizacao import hash_texto
+except ImportError:
+    from invalid_responses import mascara_respostas_validas
+    from cache_embeddings import CacheEmbeddings, pasta_modelo_cache
+    from cache_metricas import pontuar_com_cache, versao_metrica
+    from tokenizacao import hash_texto
+
+COLUNAS_BERTSCORE = ['bertscore_precision', 'bertscore_recall', 'bertscore_f1']
+
+# Scorers carregados no processo (modelo + tokenizador), um por configuração.
+# O carregamento é caro (roberta-large ~1,4 GB), então cada configuração é
+# instanciada uma única vez e reutilizada por todos os modelos analisados.
+_scorers: Dict[tuple, object] = {}
+_scorers_lock = threading.Lock()
+
+
+def _quantizar_encoder(scorer) -> None:
+    """Aplica quantização dinâmica int8 às camadas lineares do encoder (apenas em CPU)."""
+    import torch
+    scorer._model = torch.ao.quantization.quantize_dynamic(
+        scorer._model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def obter_bertscorer(lang: str, model_type: Optional[str] = None, num_layers: Optional[int] = None,
+                     use_fast_tokenizer: bool = False, batch_size: int = 64,
+                     quantizar_cpu: bool = False):
+    """
+    Retorna o BERTScorer do processo para a configuração, carregando-o na primeira chamada.
+
+    Thread-safe: chamadas concorrentes aguardam o mesmo carregamento em vez de
+    instanciar o modelo várias vezes. Aceita diretamente Config.get_bertscore_params().
+
+    Args:
+        lang: Idioma dos textos (define o modelo padrão quando model_type é None)
+        model_type: Encoder do BERTScore (nome do Hugging Face ou caminho local)
+        num_layers: Camada usada nos embeddings (None = padrão do bert_score para o modelo)
+        use_fast_tokenizer: Usa o tokenizador rápido do Hugging Face
+        batch_size: Quantidade de textos por lote do encoder
+        quantizar_cpu: Quantiza o encoder para int8 (dinâmico) quando executado em CPU
+
+    Returns:
+        Instância compartilhada de bert_score.BERTScorer
+    """
+    chave = (lang, model_type, num_layers, use_fast_tokenizer, batch_size, quantizar_cpu)
+    scorer = _scorers.get(chave)
+    if scorer is not None:
+        return scorer
+
+    with _scorers_lock:
+        scorer = _scorers.get(chave)
+        if scorer is None:
+            from bert_score import BERTScorer
+            print(f"🧠 Carregando modelo do BERTScore ({model_type or lang})...")
+            scorer = BERTScorer(
+                lang=lang,
+                model_type=model_type,
+                num_layers=num_layers,
+                use_fast_tokenizer=use_fast_tokenizer,
+                batch_size=batch_size
+            )
+            if quantizar_cpu and scorer.device == "cpu":
+                _quantizar_encoder(scorer)
+                print("⚡ Encoder do BERTScore quantizado (int8 dinâmico) para CPU")
+            _scorers[chave] = scorer
+        return scorer
+
+
+_threads_configuradas = False
+
+
+def configurar_threads_torch(threads: int = 0, interop_threads: int = 0) -> None:
+    """
+    Ajusta as threads do PyTorch em CPU (intra-op e inter-op) uma vez por processo.
+
+    Args:
+        threads: Threads por operação (0 = padrão do PyTorch)
+        interop_threads: Threads entre operações (0 = padrão do PyTorch)
+    """
+    global _threads_configuradas
+    with _scorers_lock:
+        if _threads_configuradas:
+            return
+        import torch
+        if threads > 0:
+            torch.set_num_threads(threads)
+        if interop_threads > 0:
+            try:
+                torch.set_interop_threads(interop_threads)
+            except RuntimeError as e:
+                # Só pode ser definido antes do primeiro trabalho paralelo do processo
+                print(f"⚠️ Não foi possível ajustar as threads inter-op do PyTorch: {e}")
+        _threads_configuradas = True
+
+
+def _lotes_por_orcamento(comprimentos: np.ndarray, tokens_por_lote: int, max_itens: int) -> List[np.ndarray]:
+    """
+    Agrupa itens de comprimentos parecidos em lotes limitados por um orçamento de tokens.
+
+    Os itens são ordenados do maior para o menor comprimento; cada lote recebe itens
+    enquanto (itens x maior comprimento do lote) couber no orçamento, o que reduz o
+    preenchimento (padding) com respostas de tamanhos muito diferentes.
+
+    Args:
+        comprimentos: Comprimento (em tokens) de cada item
+        tokens_por_lote: Orçamento de tokens (com padding) por lote
+        max_itens: Máximo de itens por lote
+
+    Returns:
+        Lista com os índices (posições originais) de cada lote
+    """
+    ordem = np.argsort(-comprimentos, kind="stable")
+    lotes = []
+    inicio = 0
+    while inicio < len(ordem):
+        maior = max(int(comprimentos[ordem[inicio]]), 1)
+        tamanho = max(1, min(max_itens, tokens_por_lote // maior))
+        lotes.append(ordem[inicio:inicio + tamanho])
+        inicio += tamanho
+    return lotes
+
+
+def _tokenizar_sem_truncar(tokenizer, texto: str) -> List[int]:
+    """Tokens do conteúdo (sem especiais e sem truncamento), com as opções do sent_encode do bert_score."""
+    from transformers import GPT2Tokenizer, RobertaTokenizer
+
+    texto = texto.strip()
+    if texto == "":
+        return []
+    opcoes = {'add_prefix_space': True} if isinstance(tokenizer, (GPT2Tokenizer, RobertaTokenizer)) else {}
+    return tokenizer.encode(texto, add_special_tokens=False, **opcoes)
+
+
+def _janelas_texto(tokenizer, texto: str, tamanho: int, sobreposicao: int) -> Tuple[List[List[int]], List[Tuple[int, int]]]:
+    """
+    Divide um texto em janelas sobrepostas de até ``tamanho`` tokens (com CLS/SEP).
+
+    Cada token do conteúdo é atribuído a uma única janela (a metade da sobreposição
+    fica com cada vizinha), de modo que a concatenação dos trechos atribuídos
+    reconstrói o texto inteiro sem duplicar tokens.
+
+    Returns:
+        Tupla (tokens de cada janela, trecho local [início, fim) aproveitado de cada janela)
+    """
+    conteudo = _tokenizar_sem_truncar(tokenizer, texto)
+    # Tokens especiais de uma sequência vazia: [CLS] [SEP] (BERT) ou <s> </s> (RoBERTa)
+    especiais = tokenizer.encode("", add_special_tokens=True)
+    prefixo, sufixo = especiais[:1], especiais[1:]
+    capacidade = tamanho - len(especiais)
+    passo = max(1, capacidade - sobreposicao)
+
+    inicios = [0]
+    while inicios[-1] + capacidade < len(conteudo):
+        inicios.append(inicios[-1] + passo)
+
+    # Fronteira entre janelas vizinhas: meio da região sobreposta
+    fronteiras = [0]
+    for atual, proxima in zip(inicios, inicios[1:]):
+        fronteiras.append(proxima + (atual + capacidade - proxima) // 2)
+    fronteiras.append(len(conteudo))
+
+    janelas = [prefixo + conteudo[i:i + capacidade] + sufixo for i in inicios]
+    # +1: posição 0 de cada janela é o token especial inicial (CLS/<s>)
+    trechos = [(fronteiras[k] - inicio + 1, fronteiras[k + 1] - inicio + 1) for k, inicio in enumerate(inicios)]
+    return janelas, trechos
+
+
+def _sequencias_texto(tokenizer, texto: str, janelas: bool,
+                      sobreposicao: int) -> Tuple[List[List[int]], Optional[List[Tuple[int, int]]]]:
+    """
+    Tokeniza um texto para o encoder: uma sequência truncada (como o bert_score) ou,
+    no modo de janelas, as janelas sobrepostas e o trecho aproveitado de cada uma.
+    """
+    from bert_score.utils import sent_encode
+
+    if not janelas:
+        return [sent_encode(tokenizer, texto)], None
+    return _janelas_texto(tokenizer, texto, tokenizer.model_max_length, sobreposicao)
+
+
+def _calcular_embeddings(scorer, tokenizados: List[Tuple[List[List[int]], Optional[List[Tuple[int, int]]]]],
+                         tokens_por_lote: int) -> List[np.ndarray]:
+    """
+    Calcula os embeddings de tokens (tokens x dimensão) de textos já tokenizados.
+
+    Usa a mesma camada do bert_score (inclui CLS/SEP nas pontas), com lotes de
+    comprimento parecido (ver _lotes_por_orcamento). As janelas de todos os textos são
+    codificadas nos mesmos lotes e, por texto, os trechos aproveitados são concatenados.
+    """
+    from bert_score.utils import bert_encode, padding
+
+    sequencias = [seq for janelas_texto, _ in tokenizados for seq in janelas_texto]
+    comprimentos = np.fromiter((len(seq) for seq in sequencias), dtype=np.int64, count=len(sequencias))
+
+    emb_sequencias = [None] * len(sequencias)
+    for lote in _lotes_por_orcamento(comprimentos, tokens_por_lote, scorer.batch_size):
+        tokens, _, mascara = padding([sequencias[i] for i in lote], scorer._tokenizer.pad_token_id)
+        emb = bert_encode(
+            scorer._model, tokens.to(scorer.device), attention_mask=mascara.to(scorer.device)
+        ).float().cpu().numpy()
+        for j, i in enumerate(lote):
+            emb_sequencias[i] = emb[j, :comprimentos[i]]
+
+    embeddings = []
+    primeira = 0
+    for janelas_texto, trechos in tokenizados:
+        if trechos is None or len(trechos) == 1:
+            embeddings.append(emb_sequencias[primeira])
+        else:
+            partes = [emb_sequencias[primeira][:1]]
+            partes += [emb_sequencias[primeira + k][inicio:fim] for k, (inicio, fim) in enumerate(trechos)]
+            partes.append(emb_sequencias[primeira + len(trechos) - 1][-1:])
+            embeddings.append(np.concatenate(partes))
+        primeira += len(janelas_texto)
+    return embeddings
+
+
+def _grupos_por_memoria(tokenizados: List, dimensao: int, max_bytes: int) -> List[List[int]]:
+    """
+    Divide textos tokenizados em grupos cujos embeddings (float32) cabem em ``max_bytes``.
+
+    Os textos são ordenados por comprimento para que cada grupo forme lotes com pouco
+    preenchimento; um texto maior que o limite forma um grupo sozinho.
+
+    Returns:
+        Lista de grupos com as posições dos textos em ``tokenizados``
+    """
+    tokens = np.fromiter(
+        (sum(len(seq) for seq in janelas_texto) for janelas_texto, _ in tokenizados),
+        dtype=np.int64, count=len(tokenizados)
+    )
+    grupos, atual, bytes_atual = [], [], 0
+    for i in np.argsort(-tokens, kind="stable"):
+        bytes_texto = int(tokens[i]) * dimensao * 4
+        if atual and bytes_atual + bytes_texto > max_bytes:
+            grupos.append(atual)
+            atual, bytes_atual = [], 0
+        atual.append(int(i))
+        bytes_atual += bytes_texto
+    if atual:
+        grupos.append(atual)
+    return grupos
+
+
+def _casamento_guloso_em_blocos(hipotese: np.ndarray, referencia: np.ndarray, max_bytes: int) -> np.ndarray:
+    """
+    Casamento guloso de um único par grande, com a matriz de similaridade em blocos de linhas.
+
+    Equivalente a greedy_cos_idf (sem idf) para um par, mas sem materializar a matriz
+    inteira: o máximo por token da referência (recall) é acumulado bloco a bloco.
+
+    Returns:
+        Vetor com precision, recall e F1
+    """
+    import torch
+
+    h = torch.from_numpy(np.asarray(hipotese, dtype=np.float32))
+    r = torch.from_numpy(np.asarray(referencia, dtype=np.float32))
+    h = h / h.norm(dim=-1, keepdim=True)
+    r = r / r.norm(dim=-1, keepdim=True)
+
+    linhas = max(1, max_bytes // (4 * len(r)))
+    precisao = torch.empty(len(h))
+    recall = torch.full((len(r),), -float('inf'))
+    for inicio in range(0, len(h), linhas):
+        sim = h[inicio:inicio + linhas] @ r.T
+        precisao[inicio:inicio + linhas] = sim.max(dim=1).values
+        recall = torch.maximum(recall, sim.max(dim=0).values)
+
+    # CLS/SEP das pontas com peso zero (como no bert_score com idf=False)
+    P = precisao[1:-1].mean() if len(h) > 2 else torch.tensor(0.0)
+    R = recall[1:-1].mean() if len(r) > 2 else torch.tensor(0.0)
+    F1 = torch.nan_to_num(2 * P * R / (P + R), nan=0.0)
+    return torch.stack((P, R, F1)).numpy()
+
+
+def _casamento_guloso(hipoteses: List[np.ndarray], referencias: List[np.ndarray],
+                      batch_size: int, tokens_por_lote: int, max_bytes: int) -> np.ndarray:
+    """
+    Casamento guloso por similaridade de cosseno (mesmo cálculo do bert_score, sem idf).
+
+    Os tokens CLS/SEP das pontas têm peso zero e os demais peso 1, como no bert_score
+    com idf=False. Os pares são agrupados por comprimento como no encoder, e cada lote
+    é limitado para que as matrizes de similaridade caibam em ``max_bytes``; pares
+    que sozinhos excedem o limite são processados em blocos.
+
+    Returns:
+        Matriz (pares x 3) com precision, recall e F1, na ordem dos pares
+    """
+    import torch
+    from torch.nn.utils.rnn import pad_sequence
+    from bert_score.utils import greedy_cos_idf
+
+    def preparar(embeddings):
+        tensores = [torch.from_numpy(np.asarray(emb, dtype=np.float32)) for emb in embeddings]
+        comprimentos = torch.tensor([len(t) for t in tensores])
+        # Preenchimento != 0 evita divisão por zero na normalização (como no bert_score)
+        emb = pad_sequence(tensores, batch_first=True, padding_value=2.0)
+        posicoes = torch.arange(emb.size(1)).unsqueeze(0)
+        mascara = posicoes < comprimentos.unsqueeze(1)
+        pesos = (mascara & (posicoes > 0) & (posicoes < comprimentos.unsqueeze(1) - 1)).float()
+        return emb, mascara, pesos
+
+    comprimentos = np.fromiter(
+        (max(len(h), len(r)) for h, r in zip(hipoteses, referencias)), dtype=np.int64, count=len(hipoteses)
+    )
+    resultados = np.zeros((len(hipoteses), 3), dtype=np.float32)
+    with torch.no_grad():
+        for lote in _lotes_por_orcamento(comprimentos, tokens_por_lote, batch_size):
+            maior = int(comprimentos[lote[0]])
+            # Matrizes de similaridade e máscaras (float32) do lote: itens x maior²
+            itens = max_bytes // (8 * maior * maior)
+            if itens < 1:
+                for i in lote:
+                    resultados[i] = _casamento_guloso_em_blocos(hipoteses[i], referencias[i], max_bytes)
+                continue
+            for inicio in range(0, len(lote), itens):
+                sublote = lote[inicio:inicio + itens]
+                P, R, F1 = greedy_cos_idf(
+                    *preparar([referencias[i] for i in sublote]), *preparar([hipoteses[i] for i in sublote])
+                )
+                resultados[sublote] = torch.stack((P, R, F1), dim=-1).numpy()
+    return resultados
+
+
+def pontuar_bertscore(scorer, predicoes: List[str], referencias: List[str],
+                      cache: Optional[CacheEmbeddings] = None, tokens_por_lote: int = 8192,
+                      janelas: bool = False, sobreposicao_janela: int = 128,
+                      memoria_max_mb: int = 1024) -> np.ndarray:
+    """
+    Calcula o BERTScore de pares (predição, referência) reaproveitando embeddings.
+
+    Cada texto distinto é codificado uma única vez; com cache, apenas textos ausentes
+    do disco passam pelo encoder e o casamento guloso usa os embeddings armazenados
+    (float16; textos novos são arredondados da mesma forma para que o resultado não
+    dependa de o texto já estar no cache).
+
+    A memória de trabalho (embeddings acumulados e matrizes de similaridade, fora os
+    pesos do encoder) é limitada por ``memoria_max_mb``: quando os embeddings novos não
+    cabem, eles são codificados em grupos e gravados em disco (no cache ou, sem cache,
+    em uma pasta temporária) e lidos de volta via memmap.
+
+    Args:
+        scorer: BERTScorer carregado (ver obter_bertscorer)
+        predicoes: Textos candidatos
+        referencias: Textos de referência (alinhados às predições)
+        cache: Cache em disco de embeddings da configuração do scorer (opcional)
+        tokens_por_lote: Orçamento de tokens (com padding) por lote do encoder
+        janelas: Divide textos acima do limite do encoder em janelas sobrepostas
+            em vez de truncá-los
+        sobreposicao_janela: Tokens compartilhados entre janelas vizinhas
+        memoria_max_mb: Limite da memória de trabalho do cálculo, em MB
+
+    Returns:
+        Matriz (pares x 3) com precision, recall e F1
+    """
+    max_bytes = memoria_max_mb * 1024 * 1024
+    textos = list(dict.fromkeys(predicoes + referencias))
+    chaves = [hash_texto(texto) for texto in textos]
+    embeddings = {}
+    if cache is not None:
+        for chave in chaves:
+            emb = cache.obter(chave)
+            if emb is not None:
+                embeddings[chave] = emb
+
+    pendentes = [(chave, texto) for chave, texto in zip(chaves, textos) if chave not in embeddings]
+    if cache is not None:
+        print(f"💾 Cache de embeddings: {len(textos) - len(pendentes)}/{len(textos)} textos reaproveitados")
+
+    tokenizados = [
+        _sequencias_texto(scorer._tokenizer, texto, janelas, sobreposicao_janela) for _, texto in pendentes
+    ]
+    grupos = _grupos_por_memoria(tokenizados, scorer._model.config.hidden_size, max_bytes // 2)
+
+    pasta_temporaria = None
+    if cache is None and len(grupos) > 1:
+        # Embeddings não cabem no limite de memória: grupos vão para uma pasta temporária
+        pasta_temporaria = tempfile.mkdtemp(prefix="bertscore_")
+        cache = CacheEmbeddings(pasta_temporaria)
+
+    try:
+        for grupo in grupos:
+            novos = _calcular_embeddings(scorer, [tokenizados[i] for i in grupo], tokens_por_lote)
+            novos = {pendentes[i][0]: emb for i, emb in zip(grupo, novos)}
+            if cache is not None:
+                cache.adicionar(novos)
+                novos = {chave: cache.obter(chave) for chave in novos}
+            embeddings.update(novos)
+
+        chave_texto = dict(zip(textos, chaves))
+        return _casamento_guloso(
+            [embeddings[chave_texto[texto]] for texto in predicoes],
+            [embeddings[chave_texto[texto]] for texto in referencias],
+            scorer.batch_size, tokens_por_lote, max_bytes // 2
+        )
+    finally:
+        if pasta_temporaria is not None:
+            embeddings.clear()
+            del cache
+            shutil.rmtree(pasta_temporaria, ignore_errors=True)
+
+
 class BertScoreCalculator:
     """Calculadora de métricas BERTScore."""
     
-    def __init__(self):
+    def __init__(self, cliente=None):
         self.config = get_config()
+        # Servidor local de métricas (ver servidor_metricas.py); None = cálculo no processo
+        self.cliente = cliente
+        # Vazão (sentenças/s) do último cálculo, usada na comparação entre métricas semânticas
+        self.ultima_vazao: Optional[float] = None
+        # Pares efetivamente pontuados (fora do cache de métricas) e tempo gasto neles
+        self._pares_pontuados = 0
+        self._tempo_pontuacao = 0.0
+    
+    def pontuar(self, predicoes: List[str], referencias: List[str]) -> np.ndarray:
+        """
+        Calcula o BERTScore de pares no processo, com a configuração do BERTScore.
+        
+        Args:
+            predicoes: Textos candidatos
+            referencias: Textos de referência (alinhados às predições)
+            
+        Returns:
+            Matriz (pares x 3) com precision, recall e F1
+        """
+        params = self.config.get_bertscore_params()
+        params_cpu = self.config.get_bertscore_cpu_params()
+        configurar_threads_torch(params_cpu['threads'], params_cpu['interop_threads'])
+        scorer = obter_bertscorer(**params)
+        cache = self._cache_embeddings(scorer, params)
+        return pontuar_bertscore(
+            scorer, predicoes, referencias, cache,
+            tokens_por_lote=params_cpu['tokens_por_lote'],
+            janelas=params_cpu['janelas'],
+            sobreposicao_janela=params_cpu['sobreposicao_janela'],
+            memoria_max_mb=params_cpu['memoria_max_mb']
+        )
     
     def calcular_bertscore_individual(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -29,10 +472,18 @@ class BertScoreCalculator:
             df: DataFrame com colunas 'pergunta', 'resposta_esperada', 'resposta_modelo'
             
         Returns:
-            DataFrame com colunas adicionais de métricas BERTScore
+            DataFrame com colunas adicionais de métricas BERTScore (sem elas se o
+            bert-score não estiver instalado)
+            
+        Raises:
+            Exception: Falhas da pontuação são propagadas (nunca viram BERTScore zerado)
         """
+        if all(col in df.columns for col in COLUNAS_BERTSCORE):
+            # Já calculado em lote para todos os modelos (ver calcular_bertscore_lote)
+            return df.copy()
+        
         try:
-            from bert_score import score as bert_score
+            import bert_score  # noqa: F401
         except ImportError as e:
             print(f"❌ Erro ao importar BERTScore: {e}")
             print("💡 Instale com: pip install bert-score")
@@ -42,19 +493,11 @@ class BertScoreCalculator:
         df_result = df.copy()
         
         # Separar respostas válidas e inválidas
-        respostas_validas = []
-        indices_validos = []
-        
-        for idx, row in df.iterrows():
-            resposta_modelo = str(row.get('prediction', ''))
-            is_error_flag = bool(row.get('is_error', False)) if 'is_error' in df.columns else None
-            resposta_invalida = is_error_flag if is_error_flag is not None else self._eh_resposta_invalida(resposta_modelo)
-            if not resposta_invalida:
-                # Para métricas de texto (BERTScore), usar resposta completa
-                # Não extrair A, B, C, D - isso é apenas para benchmarks de múltipla escolha
-                resposta_final = resposta_modelo
-                respostas_validas.append(resposta_final)
-                indices_validos.append(idx)
+        # Para métricas de texto (BERTScore), usar resposta completa
+        # Não extrair A, B, C, D - isso é apenas para benchmarks de múltipla escolha
+        mascara_validas = mascara_respostas_validas(df).to_numpy()
+        df_validas = df[mascara_validas]
+        respostas_validas = df_validas['prediction'].astype(str).tolist()
         
         if len(respostas_validas) == 0:
             print("⚠️ Nenhuma resposta válida encontrada para BERTScore")
@@ -63,46 +506,93 @@ class BertScoreCalculator:
             df_result['bertscore_f1'] = 0.0
             return df_result
         
-        # Preparar referências
-        referencias = []
-        for idx in indices_validos:
-            # Usa loc para preservar o índice original do DataFrame filtrado.
-            if idx in df.index:
-                row = df.loc[idx]
-                referencias.append(str(row.get('reference', '')))
+        # Preparar referências (alinhadas pelo índice original do DataFrame filtrado)
+        referencias = df_validas['reference'].astype(str).tolist() if 'reference' in df_validas.columns else [''] * len(df_validas)
         
         print(f"🔍 Calculando BERTScore para {len(respostas_validas)} respostas válidas...")
         
-        try:
-            # Calcular BERTScore
-            P, R, F1 = bert_score(
-                respostas_validas,
-                referencias,
-                lang=self.config.BERT_SCORE_LANG,
-                verbose=False
-            )
-            
-            # Inicializar colunas com zeros
-            df_result['bertscore_precision'] = 0.0
-            df_result['bertscore_recall'] = 0.0
-            df_result['bertscore_f1'] = 0.0
-            
-            # Preencher valores para respostas válidas
-            for i, idx in enumerate(indices_validos):
-                df_result.loc[idx, 'bertscore_precision'] = P[i].item()
-                df_result.loc[idx, 'bertscore_recall'] = R[i].item()
-                df_result.loc[idx, 'bertscore_f1'] = F1[i].item()
-            
-            print(f"✅ BERTScore calculado para {len(respostas_validas)} respostas")
-            
-        except Exception as e:
-            print(f"❌ Erro ao calcular BERTScore: {e}")
-            df_result['bertscore_precision'] = 0.0
-            df_result['bertscore_recall'] = 0.0
-            df_result['bertscore_f1'] = 0.0
+        # Pares já pontuados vêm do cache de métricas; só os novos passam pelo encoder
+        self._pares_pontuados, self._tempo_pontuacao = 0, 0.0
+        resultados = pontuar_com_cache(
+            'bertscore', self._versao_metrica(), respostas_validas, referencias,
+            self._pontuar_pares, len(COLUNAS_BERTSCORE)
+        )
+        
+        # Zeros para respostas inválidas; válidas preenchidas de uma vez (posicional)
+        valores = np.zeros((len(df_result), len(COLUNAS_BERTSCORE)))
+        valores[mascara_validas] = resultados
+        for j, col in enumerate(COLUNAS_BERTSCORE):
+            df_result[col] = valores[:, j]
+        
+        if self._pares_pontuados:
+            self.ultima_vazao = (self._pares_pontuados / self._tempo_pontuacao
+                                 if self._tempo_pontuacao > 0 else float('inf'))
+            print(f"✅ BERTScore calculado para {len(respostas_validas)} respostas "
+                  f"({self._pares_pontuados} pontuadas a {self.ultima_vazao:.1f} sentenças/s)")
+        else:
+            print(f"✅ BERTScore de {len(respostas_validas)} respostas reaproveitado do cache")
         
         return df_result
     
+    def _versao_metrica(self) -> str:
+        """Versão do BERTScore no cache de métricas (parâmetros que afetam os valores)."""
+        params_cpu = self.config.get_bertscore_cpu_params()
+        return versao_metrica('bertscore', {
+            **self.config.get_bertscore_params(),
+            'janelas': params_cpu['janelas'],
+            'sobreposicao_janela': params_cpu['sobreposicao_janela'],
+            'cache_embeddings': self.config.BERT_SCORE_CACHE_EMBEDDINGS
+        })
+    
+    def _pontuar_pares(self, predicoes: List[str], referencias: List[str]) -> np.ndarray:
+        """Pontua pares no servidor local (modelo já carregado) quando disponível; senão, no processo."""
+        inicio = time.perf_counter()
+        resultados = None
+        if self.cliente is not None:
+            try:
+                resultados = self.cliente.bertscore(predicoes, referencias)
+            except Exception as e:
+                print(f"⚠️ Servidor de métricas indisponível, calculando BERTScore localmente: {e}")
+        if resultados is None:
+            resultados = self.pontuar(predicoes, referencias)
+        self._pares_pontuados += len(predicoes)
+        self._tempo_pontuacao += time.perf_counter() - inicio
+        return resultados
+    
+    def _cache_embeddings(self, scorer, params: Dict) -> Optional[CacheEmbeddings]:
+        """Abre o cache em disco de embeddings da configuração do scorer (se habilitado)."""
+        if not self.config.BERT_SCORE_CACHE_EMBEDDINGS:
+            return None
+        quantizado = params.get('quantizar_cpu', False) and scorer.device == "cpu"
+        sobreposicao = self.config.BERT_SCORE_SOBREPOSICAO_JANELA if self.config.BERT_SCORE_JANELAS else None
+        pasta = pasta_modelo_cache(
+            self.config.PASTA_CACHE, scorer.model_type, scorer.num_layers, quantizado, sobreposicao
+        )
+        return CacheEmbeddings(pasta)
+    
+    def calcular_bertscore_lote(self, dfs: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Calcula o BERTScore de vários DataFrames (ex.: um por modelo) em uma única chamada.
+        
+        As respostas válidas de todos os DataFrames são pontuadas juntas e os resultados
+        são separados de volta por chave, preservando o índice original de cada um.
+        
+        Args:
+            dfs: Dicionário chave -> DataFrame com colunas 'prediction' e 'reference'
+            
+        Returns:
+            Dicionário com as mesmas chaves e DataFrames com as colunas de BERTScore
+        """
+        dfs = {chave: df for chave, df in dfs.items() if len(df) > 0}
+        if not dfs:
+            return {}
+        
+        df_todos = pd.concat(dfs, names=['_lote', None])
+        df_todos = df_todos.drop(columns=[c for c in COLUNAS_BERTSCORE if c in df_todos.columns])
+        df_resultado = self.calcular_bertscore_individual(df_todos)
+        
+        return {chave: df_resultado.xs(chave, level='_lote') for chave in dfs}
+    
     def calcular_metricas_por_modelo(self, df: pd.DataFrame) -> Dict[str, Dict]:
         """
         Calcula métricas BERTScore agregadas por modelo.
@@ -119,14 +609,10 @@ class BertScoreCalculator:
         
         metricas_por_modelo = {}
         
-        for modelo in df['model'].unique():
-            df_modelo = df[df['model'] == modelo]
+        for modelo, df_modelo in df.groupby('model', observed=True, sort=False):
             
             # Filtrar apenas respostas válidas
-            if 'is_error' in df_modelo.columns:
-                df_validas = df_modelo[~df_modelo['is_error']]
-            else:
-                df_validas = df_modelo[~df_modelo['prediction'].apply(self._eh_resposta_invalida)]
+            df_validas = df_modelo[mascara_respostas_validas(df_modelo)]
             
             if len(df_validas) == 0:
                 metricas_por_modelo[modelo] = {
@@ -153,45 +639,6 @@ class BertScoreCalculator:
         
         return metricas_por_modelo
     
-    def _eh_resposta_invalida(self, resposta: str) -> bool:
-        """
-        Verifica se uma resposta é inválida (erro de API, vazia, etc.).
-        
-        Args:
-            resposta: Resposta do modelo
-            
-        Returns:
-            True se a resposta é inválida
-        """
-        if not resposta or pd.isna(resposta):
-            return True
-        
-        resposta_str = str(resposta).strip().lower()
-        
-        # Padrões de erro de API
-        padroes_erro = [
-            'erro',
-            'error',
-            'timeout',
-            'rate limit',
-            'quota excedida',
-            'quota exceeded',
-            'api key',
-            'authentication',
-            'connection',
-            'network',
-            'failed',
-            'exception',
-            'traceback',
-            'null',
-            'none',
-            'undefined',
-            'gemini_1_5_flash'  # Erro específico do Gemini
-        ]
-        
-        return any(padrao in resposta_str for padrao in padroes_erro)
-    
-    
     def gerar_relatorio_bertscore(self, metricas_por_modelo: Dict[str, Dict]) -> str:
         """
         Gera relatório em texto das métricas BERTScore.
@@ -224,17 +671,18 @@ class BertScoreCalculator:
         
         return "\n".join(relatorio)
 
-def calcular_bertscore_completo(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict], str]:
+def calcular_bertscore_completo(df: pd.DataFrame, cliente=None) -> Tuple[pd.DataFrame, Dict[str, Dict], str]:
     """
     Função principal para calcular BERTScore completo.
     
     Args:
         df: DataFrame com dados das respostas
+        cliente: Cliente do servidor local de métricas (opcional; ver servidor_metricas.py)
         
     Returns:
         Tuple com (DataFrame com métricas, métricas por modelo, relatório)
     """
-    calculator = BertScoreCalculator()
+    calculator = BertScoreCalculator(cliente)
     
     # Calcular métricas individuais
     df_com_metricas = calculator.calcular_bertscore_individual(df)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark de precisão/velocidade das configurações do BERTScore.
+Pontua uma amostra fixa das respostas textuais com cada encoder (em precisão
+cheia e quantizado em int8) e compara o F1 com o da configuração de referência.
+
+Uso:
+    python analysis/bertscore_benchmark.py [--amostra 200] [--saida tabela.md]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Evita erro de encoding no terminal Windows (cp1252) ao imprimir emojis/acentos
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .analysis import AnalysisSystem
+    from .bertscore import obter_bertscorer, pontuar_bertscore
+    from .invalid_responses import mascara_respostas_validas
+except ImportError:
+    from analysis import AnalysisSystem
+    from bertscore import obter_bertscorer, pontuar_bertscore
+    from invalid_responses import mascara_respostas_validas
+
+# Amostra fixa: mesma semente e tamanho em todas as execuções do benchmark
+TAMANHO_AMOSTRA = 200
+SEMENTE_AMOSTRA = 42
+
+
+def carregar_amostra(tamanho: int = TAMANHO_AMOSTRA, semente: int = SEMENTE_AMOSTRA) -> pd.DataFrame:
+    """
+    Monta a amostra fixa de pares (predição, referência) a partir dos resultados.
+
+    Args:
+        tamanho: Quantidade de pares da amostra
+        semente: Semente do sorteio (mantém a amostra estável entre execuções)
+
+    Returns:
+        DataFrame com colunas 'prediction' e 'reference'
+    """
+    sistema = AnalysisSystem()
+    dados = sistema.consolidar_dados_por_modelo(sistema.encontrar_execucoes())
+    if not dados:
+        return pd.DataFrame(columns=['prediction', 'reference'])
+
+    df = pd.concat([dados[modelo] for modelo in sorted(dados)], ignore_index=True)
+    df = df[~df['is_benchmark_prompt'] & mascara_respostas_validas(df)]
+    df = df.sample(n=min(tamanho, len(df)), random_state=semente)
+    return df[['prediction', 'reference']].astype(str).reset_index(drop=True)
+
+
+def medir_configuracao(amostra: pd.DataFrame, params: Dict) -> Dict:
+    """
+    Pontua a amostra com uma configuração do BERTScore e mede o tempo.
+
+    Args:
+        amostra: Pares de predição/referência
+        params: Parâmetros no formato de Config.get_bertscore_params()
+
+    Returns:
+        Dicionário com F1 por par, tempo de carga e sentenças por segundo
+    """
+    inicio = time.perf_counter()
+    scorer = obter_bertscorer(**params)
+    tempo_carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = pontuar_bertscore(
+        scorer, amostra['prediction'].tolist(), amostra['reference'].tolist(),
+        tokens_por_lote=get_config().BERT_SCORE_TOKENS_POR_LOTE
+    )
+    tempo_score = time.perf_counter() - inicio
+
+    return {
+        'f1': resultados[:, 2],
+        'tempo_carga': tempo_carga,
+        'sentencas_por_segundo': len(amostra) / tempo_score if tempo_score > 0 else float('inf')
+    }
+
+
+def executar_benchmark(modelos: List[str], amostra: pd.DataFrame,
+                       num_layers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Mede cada encoder em precisão cheia e com quantização int8.
+
+    A primeira configuração (primeiro modelo, sem quantização) é a referência de
+    precisão: as demais são comparadas pela correlação de Pearson/Spearman do F1 e
+    pela diferença absoluta média.
+
+    Args:
+        modelos: Encoders a medir (o primeiro é a referência)
+        amostra: Pares de predição/referência
+        num_layers: Camada usada em todos os encoders (None = padrão de cada um)
+
+    Returns:
+        DataFrame com uma linha por configuração
+    """
+    params_base = get_config().get_bertscore_params()
+    linhas = []
+    f1_referencia = None
+
+    for modelo in modelos:
+        for quantizar in (False, True):
+            params = dict(params_base, model_type=modelo, num_layers=num_layers, quantizar_cpu=quantizar)
+            print(f"⏱️ {modelo} ({'int8' if quantizar else 'fp32'})...")
+            resultado = medir_configuracao(amostra, params)
+
+            f1 = pd.Series(resultado['f1'])
+            if f1_referencia is None:
+                f1_referencia = f1
+
+            linhas.append({
+                'Encoder': modelo,
+                'Precisão': 'int8' if quantizar else 'fp32',
+                'Pearson F1': f1.corr(f1_referencia),
+                'Spearman F1': f1.corr(f1_referencia, method='spearman'),
+                'Dif. abs. média F1': float(np.abs(f1 - f1_referencia).mean()),
+                'Sentenças/s': resultado['sentencas_por_segundo'],
+                'Carga (s)': resultado['tempo_carga']
+            })
+
+    return pd.DataFrame(linhas)
+
+
+def formatar_tabela(df: pd.DataFrame) -> str:
+    """Formata o resultado do benchmark como tabela markdown."""
+    colunas = list(df.columns)
+    linhas = ["| " + " | ".join(colunas) + " |", "|" + "---|" * len(colunas)]
+    for _, linha in df.iterrows():
+        valores = [f"{v:.4f}" if isinstance(v, float) else str(v) for v in linha]
+        linhas.append("| " + " | ".join(valores) + " |")
+    return "\n".join(linhas)
+
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Benchmark de precisão/velocidade do BERTScore")
+    parser.add_argument('--modelos', nargs='+',
+                        default=[config.BERT_SCORE_MODEL_TYPE, *config.BERT_SCORE_MODELOS_LEVES],
+                        help="Encoders a medir (o primeiro é a referência)")
+    parser.add_argument('--num-layers', type=int, default=None,
+                        help="Camada usada em todos os encoders (padrão: a de cada modelo)")
+    parser.add_argument('--amostra', type=int, default=TAMANHO_AMOSTRA, help="Tamanho da amostra fixa")
+    parser.add_argument('--saida', default=None, help="Arquivo markdown para salvar a tabela")
+    args = parser.parse_args()
+
+    amostra = carregar_amostra(args.amostra)
+    if amostra.empty:
+        print("❌ Nenhuma resposta textual válida encontrada para o benchmark")
+        return
+
+    print(f"📏 Amostra fixa: {len(amostra)} pares (semente {SEMENTE_AMOSTRA})")
+    tabela = formatar_tabela(executar_benchmark(args.modelos, amostra, args.num_layers))
+    print("\n" + tabela)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding=config.ENCODING_TXT) as f:
+            f.write(tabela + "\n")
+        print(f"💾 Tabela salva em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,109 +6,588 @@ Centraliza todos os cálculos relacionados a essas métricas acadêmicas.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Sequence, Tuple, Optional
 import sys
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 # Adicionar o diretório pai ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.config import get_config
 
+# Import compatível com execução direta e via import
+try:
+    from .cache_metricas import pontuar_com_cache, versao_metrica
+    from .invalid_responses import mascara_respostas_validas
+    from .tokenizacao import (
+        BITS_ID, MASCARA_ID, IndiceNgramas, TokenizadorLexico, tokenizar_bleu, tokenizar_rouge
+    )
+except ImportError:
+    from cache_metricas import pontuar_com_cache, versao_metrica
+    from invalid_responses import mascara_respostas_validas
+    from tokenizacao import (
+        BITS_ID, MASCARA_ID, IndiceNgramas, TokenizadorLexico, tokenizar_bleu, tokenizar_rouge
+    )
+
+# Parâmetros do BLEU: ordem máxima de n-gramas (pesos uniformes) e o epsilon da
+# suavização method1 do nltk (somado a precisões sem nenhum acerto).
+BLEU_MAX_N = 4
+BLEU_EPSILON = 0.1
+
+# Tipos de ROUGE calculados (F-measure, mesma definição do rouge_score com stemmer)
+ROUGE_TIPOS = ['rouge1', 'rouge2', 'rougeL']
+ROUGE_MAX_N = 2
+
+# Estatísticas suficientes por linha (inteiros). Somadas por qualquer subconjunto
+# (modelo, execução, idioma...) dão BLEU de corpus e ROUGE micro sem recalcular nada.
+COLUNAS_ESTATISTICAS_BLEU = (
+    [f'bleu_matches_{n}' for n in range(1, BLEU_MAX_N + 1)]
+    + [f'bleu_totals_{n}' for n in range(1, BLEU_MAX_N + 1)]
+    + ['bleu_hyp_len', 'bleu_ref_len']
+)
+COLUNAS_ESTATISTICAS_ROUGE = [
+    'rouge1_overlap', 'rouge1_pred_total', 'rouge1_ref_total',
+    'rouge2_overlap', 'rouge2_pred_total', 'rouge2_ref_total',
+    'rougeL_lcs'
+]
+COLUNAS_ESTATISTICAS_LEXICAS = COLUNAS_ESTATISTICAS_BLEU + COLUNAS_ESTATISTICAS_ROUGE
+
+# Versão do cálculo das estatísticas no cache de métricas (incrementar ao mudar
+# tokenização ou contagens, invalidando os valores guardados)
+VERSAO_ESTATISTICAS_LEXICAS = 1
+
+
+def _comprimentos(sequencias: Sequence[np.ndarray]) -> np.ndarray:
+    """Comprimento de cada sequência de IDs."""
+    return np.fromiter((len(seq) for seq in sequencias), dtype=np.int64, count=len(sequencias))
+
+
+def _achatar_sequencias(sequencias: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatena sequências de IDs de tokens em um único vetor.
+    
+    Args:
+        sequencias: Lista de vetores de IDs (um por texto)
+        
+    Returns:
+        Tuple com (IDs concatenados, comprimento de cada sequência)
+    """
+    comprimentos = _comprimentos(sequencias)
+    if comprimentos.sum() == 0:
+        return np.zeros(0, dtype=np.int64), comprimentos
+    return np.concatenate(sequencias).astype(np.int64, copy=False), comprimentos
+
+
+def _acertos_ngramas(hipoteses: Sequence[np.ndarray], referencias: Sequence[IndiceNgramas],
+                     max_n: int, tokenizador: TokenizadorLexico) -> np.ndarray:
+    """
+    Conta os n-gramas em comum (clipados pela referência) de cada par hipótese/referência.
+    
+    Só o lado da predição é contado aqui: os n-gramas de cada hipótese recebem IDs
+    estáveis do tokenizador e são agrupados por chave (linha, n-grama) com ``np.unique``;
+    as contagens da referência vêm do índice pré-calculado e são consultadas por
+    ``np.searchsorted`` em uma tabela (referência, n-grama) montada com as referências
+    distintas do lote.
+    
+    Args:
+        hipoteses: IDs dos tokens de cada predição
+        referencias: Índice de n-gramas da referência de cada predição
+        max_n: Ordem máxima de n-gramas (até ``MAX_N_INDICE``)
+        tokenizador: Tokenizador da análise (dono dos IDs de n-gramas)
+        
+    Returns:
+        Matriz (max_n, linhas) com a soma de min(contagem hipótese, contagem referência)
+    """
+    n_linhas = len(hipoteses)
+    acertos = np.zeros((max_n, n_linhas), dtype=np.int64)
+    ids, comprimentos = _achatar_sequencias(hipoteses)
+    
+    # Referências distintas do lote (o tokenizador devolve o mesmo índice para o mesmo
+    # texto) e o slot de cada linha, ambos na ordem de primeira aparição
+    slots: Dict[int, int] = {}
+    slot_por_linha = np.fromiter(
+        (slots.setdefault(id(ref), len(slots)) for ref in referencias),
+        dtype=np.int64, count=n_linhas
+    )
+    referencias_distintas = list({id(ref): ref for ref in referencias}.values())
+    
+    for n, linhas, gramas in tokenizador.ngramas(ids, comprimentos, max_n):
+        if len(gramas) == 0:
+            continue
+        
+        # Tabela ordenada (slot da referência, n-grama) -> contagem na referência
+        tabela_chaves = np.concatenate([
+            (np.int64(slot) << BITS_ID) | ref.ngramas[n - 1]
+            for slot, ref in enumerate(referencias_distintas)
+        ])
+        tabela_contagens = np.concatenate([ref.contagens[n - 1] for ref in referencias_distintas])
+        if len(tabela_chaves) == 0:
+            continue
+        
+        chaves, contagem_hip = np.unique((linhas << BITS_ID) | gramas, return_counts=True)
+        linhas_chave = chaves >> BITS_ID
+        consultas = (slot_por_linha[linhas_chave] << BITS_ID) | (chaves & MASCARA_ID)
+        
+        posicoes = np.minimum(np.searchsorted(tabela_chaves, consultas), len(tabela_chaves) - 1)
+        encontrados = tabela_chaves[posicoes] == consultas
+        clipados = np.where(encontrados, np.minimum(contagem_hip, tabela_contagens[posicoes]), 0)
+        acertos[n - 1] = np.bincount(linhas_chave, weights=clipados, minlength=n_linhas).astype(np.int64)
+    
+    return acertos
+
+
+def _fmeasure(sobreposicao: np.ndarray, total_predicao: np.ndarray,
+              total_referencia: np.ndarray) -> np.ndarray:
+    """F-measure do ROUGE (mesma ordem de operações do rouge_score)."""
+    precisao = sobreposicao / np.maximum(total_predicao, 1)
+    revocacao = sobreposicao / np.maximum(total_referencia, 1)
+    soma = precisao + revocacao
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(soma > 0, 2 * precisao * revocacao / soma, 0.0)
+
+
+def _bleu_de_estatisticas(acertos: np.ndarray, totais: np.ndarray,
+                          comp_hipoteses: np.ndarray, comp_referencias: np.ndarray) -> np.ndarray:
+    """
+    Calcula o BLEU (suavização method1) a partir das estatísticas de n-gramas.
+    
+    Args:
+        acertos: Matriz (max_n, linhas) de acertos clipados
+        totais: Matriz (max_n, linhas) de n-gramas da hipótese
+        comp_hipoteses: Comprimento das hipóteses
+        comp_referencias: Comprimento das referências
+        
+    Returns:
+        Vetor de scores BLEU
+    """
+    # Totais zerados só aparecem em linhas sem predição (BLEU zero de qualquer forma)
+    precisoes = np.where(acertos == 0, BLEU_EPSILON, acertos) / np.maximum(totais, 1)
+    log_precisao = (np.log(precisoes) / acertos.shape[0]).sum(axis=0)
+    
+    comp_hip = comp_hipoteses.astype(float)
+    with np.errstate(divide='ignore'):
+        penalidade = np.where(
+            comp_hip > comp_referencias, 1.0,
+            np.exp(1 - comp_referencias / np.where(comp_hip > 0, comp_hip, 1.0))
+        )
+    penalidade = np.where(comp_hip == 0, 0.0, penalidade)
+    
+    # Sem nenhum unigrama em comum o BLEU é zero (mesmo comportamento do nltk)
+    return np.where(acertos[0] == 0, 0.0, penalidade * np.exp(log_precisao))
+
+
+def estatisticas_bleu_ids(hipoteses: Sequence[np.ndarray], referencias: Sequence[IndiceNgramas],
+                          tokenizador: TokenizadorLexico) -> pd.DataFrame:
+    """
+    Calcula as estatísticas suficientes do BLEU de sequências já tokenizadas.
+    
+    Args:
+        hipoteses: IDs dos tokens (tokenização BLEU) de cada predição
+        referencias: Índice (tokenização BLEU) da referência de cada predição
+        tokenizador: Tokenizador que gerou os IDs
+        
+    Returns:
+        DataFrame com as colunas ``COLUNAS_ESTATISTICAS_BLEU`` (inteiros), uma linha por par
+    """
+    comp_hipoteses = _comprimentos(hipoteses)
+    comp_referencias = _comprimentos([ref.ids for ref in referencias])
+    acertos = _acertos_ngramas(hipoteses, referencias, BLEU_MAX_N, tokenizador)
+    totais = np.stack([np.maximum(1, comp_hipoteses - n + 1) for n in range(1, BLEU_MAX_N + 1)])
+    
+    colunas = np.vstack([acertos, totais, comp_hipoteses, comp_referencias]).T
+    return pd.DataFrame(colunas, columns=COLUNAS_ESTATISTICAS_BLEU).astype(np.int32)
+
+
+def bleu_de_estatisticas(estatisticas: pd.DataFrame) -> np.ndarray:
+    """
+    Calcula o BLEU a partir das estatísticas suficientes.
+    
+    Aplicado linha a linha dá o BLEU sentence-level; aplicado a estatísticas somadas
+    (ex.: ``groupby(...).sum()``) dá o BLEU de corpus (equivalente ao ``corpus_bleu``).
+    
+    Args:
+        estatisticas: DataFrame com as colunas ``COLUNAS_ESTATISTICAS_BLEU``
+        
+    Returns:
+        Vetor de scores BLEU, um por linha
+    """
+    acertos = estatisticas[[f'bleu_matches_{n}' for n in range(1, BLEU_MAX_N + 1)]].to_numpy(np.int64).T
+    totais = estatisticas[[f'bleu_totals_{n}' for n in range(1, BLEU_MAX_N + 1)]].to_numpy(np.int64).T
+    return _bleu_de_estatisticas(
+        acertos, totais,
+        estatisticas['bleu_hyp_len'].to_numpy(np.int64),
+        estatisticas['bleu_ref_len'].to_numpy(np.int64)
+    )
+
+
+def bleu_batch_ids(hipoteses: Sequence[np.ndarray], referencias: Sequence[IndiceNgramas],
+                   tokenizador: TokenizadorLexico) -> np.ndarray:
+    """
+    Calcula o BLEU sentence-level de sequências já tokenizadas (IDs inteiros).
+    
+    Args:
+        hipoteses: IDs dos tokens (tokenização BLEU) de cada predição
+        referencias: Índice (tokenização BLEU) da referência de cada predição
+        tokenizador: Tokenizador que gerou os IDs
+        
+    Returns:
+        Vetor de scores BLEU na mesma ordem das entradas
+    """
+    if len(hipoteses) == 0:
+        return np.zeros(0)
+    return bleu_de_estatisticas(estatisticas_bleu_ids(hipoteses, referencias, tokenizador))
+
+
+def bleu_batch(preds: Sequence[str], refs: Sequence[str],
+               tokenizador: Optional[TokenizadorLexico] = None) -> np.ndarray:
+    """
+    Calcula o BLEU sentence-level de todas as predições de uma vez.
+    
+    Equivale a ``sentence_bleu([ref.split()], pred.split(),
+    smoothing_function=SmoothingFunction().method1)`` do nltk para cada par, mas
+    tokeniza uma única vez e conta os n-gramas com NumPy sobre a coluna inteira.
+    
+    Args:
+        preds: Predições dos modelos
+        refs: Respostas de referência (mesmo tamanho de ``preds``)
+        tokenizador: Tokenizador da análise (referências já tokenizadas são reaproveitadas)
+        
+    Returns:
+        Vetor de scores BLEU na mesma ordem das entradas
+    """
+    if len(preds) != len(refs):
+        raise ValueError("preds e refs devem ter o mesmo tamanho")
+    tokenizador = tokenizador or TokenizadorLexico()
+    
+    hipoteses = [tokenizador.ids(tokenizar_bleu(str(p))) for p in preds]
+    referencias = [ref.bleu for ref in tokenizador.referencias([str(r) for r in refs])]
+    return bleu_batch_ids(hipoteses, referencias, tokenizador)
+
+
+def _comprimento_lcs(a: np.ndarray, b: np.ndarray) -> int:
+    """
+    Comprimento da maior subsequência comum entre duas sequências de IDs.
+    
+    Algoritmo bit-paralelo (Allison-Dix / Hyyrö): a sequência mais longa vira um vetor
+    de bits (um inteiro Python) e cada token da mais curta atualiza todas as colunas da
+    tabela de programação dinâmica de uma vez, com uma soma e operações bit a bit.
+    O custo cai de O(n·m) operações Python para O(n) operações sobre inteiros de m bits.
+    
+    Args:
+        a: IDs dos tokens da primeira sequência
+        b: IDs dos tokens da segunda sequência
+        
+    Returns:
+        Comprimento da LCS
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if len(b) == 0:
+        return 0
+    
+    # Máscara de ocorrências de cada token na sequência longa
+    mascaras: Dict[int, int] = {}
+    for posicao, token in enumerate(a.tolist()):
+        mascaras[token] = mascaras.get(token, 0) | (1 << posicao)
+    
+    todos = (1 << len(a)) - 1
+    v = todos
+    for token in b.tolist():
+        u = v & mascaras.get(token, 0)
+        v = ((v + u) | (v - u)) & todos
+    
+    # Cada bit zerado em v corresponde a um elemento da LCS
+    return len(a) - bin(v).count("1")
+
+
+def contexto_processos():
+    """
+    Contexto de multiprocessing dos pools da análise.
+    
+    Usa "forkserver" (ou "spawn" onde ele não existe): os processos não herdam, via
+    fork, o estado do processo principal, que a essa altura já carregou o torch e o
+    modelo do BERTScore e tem threads OpenMP ativas (fork com essas threads pode travar).
+    
+    Returns:
+        Contexto para o parâmetro ``mp_context`` do ``ProcessPoolExecutor``
+    """
+    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(metodo)
+
+
+def _lcs_lote(pares: List[Tuple[np.ndarray, np.ndarray]]) -> List[int]:
+    """
+    Calcula o comprimento da LCS de um lote de pares (referência, predição).
+    
+    Args:
+        pares: Lista de tuplas com os IDs da referência e da predição
+        
+    Returns:
+        Lista com o comprimento da LCS de cada par, na ordem dos pares
+    """
+    return [_comprimento_lcs(referencia, predicao) for referencia, predicao in pares]
+
+
+def estatisticas_rouge_ids(hipoteses: Sequence[np.ndarray], referencias: Sequence[IndiceNgramas],
+                           tokenizador: TokenizadorLexico, workers: Optional[int] = None,
+                           chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    Calcula as estatísticas suficientes do ROUGE-1/2/L de sequências já tokenizadas.
+    
+    ROUGE-1/2 usam a mesma contagem vetorizada de n-gramas do BLEU. A LCS do ROUGE-L é
+    dividida em lotes de ``chunk_size`` pares e calculada por um ``ProcessPoolExecutor``
+    (ver ``contexto_processos``); com um único worker, ou menos de
+    ``ROUGE_MIN_PARES_PARALELO`` pares, o cálculo é serial, com a mesma função.
+    
+    Args:
+        hipoteses: IDs dos tokens (tokenização ROUGE) de cada predição
+        referencias: Índice (tokenização ROUGE) da referência de cada predição
+        tokenizador: Tokenizador que gerou os IDs
+        workers: Número de processos (padrão: ``ROUGE_WORKERS`` da configuração; 0 = todos os núcleos)
+        chunk_size: Pares por tarefa (padrão: ``ROUGE_CHUNK_SIZE`` da configuração)
+        
+    Returns:
+        DataFrame com as colunas ``COLUNAS_ESTATISTICAS_ROUGE`` (inteiros), uma linha por par
+    """
+    params = get_config().get_rouge_params()
+    workers = params['workers'] if workers is None else workers
+    chunk_size = params['chunk_size'] if chunk_size is None else chunk_size
+    workers = workers or os.cpu_count() or 1
+    if multiprocessing.parent_process() is not None or len(hipoteses) < params['min_pares_paralelo']:
+        # Já dentro de um processo da análise paralela por modelo (sem pool aninhado) ou
+        # poucos pares: subir o pool custaria mais que a LCS
+        workers = 1
+    
+    comp_hipoteses = _comprimentos(hipoteses)
+    comp_referencias = _comprimentos([ref.ids for ref in referencias])
+    acertos = _acertos_ngramas(hipoteses, referencias, ROUGE_MAX_N, tokenizador)
+    
+    pares = [(ref.ids, hip) for ref, hip in zip(referencias, hipoteses)]
+    lotes = [pares[i:i + chunk_size] for i in range(0, len(pares), chunk_size)]
+    workers = min(workers, len(lotes))
+    if workers <= 1:
+        resultados = [_lcs_lote(lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_processos()) as executor:
+            resultados = list(executor.map(_lcs_lote, lotes))
+    lcs = np.array([comprimento for lote in resultados for comprimento in lote], dtype=np.int64)
+    
+    estatisticas = {}
+    for n in range(1, ROUGE_MAX_N + 1):
+        estatisticas[f'rouge{n}_overlap'] = acertos[n - 1]
+        estatisticas[f'rouge{n}_pred_total'] = np.maximum(comp_hipoteses - n + 1, 0)
+        estatisticas[f'rouge{n}_ref_total'] = np.maximum(comp_referencias - n + 1, 0)
+    estatisticas['rougeL_lcs'] = lcs
+    return pd.DataFrame(estatisticas, columns=COLUNAS_ESTATISTICAS_ROUGE).astype(np.int32)
+
+
+def rouge_de_estatisticas(estatisticas: pd.DataFrame) -> np.ndarray:
+    """
+    Calcula o F-measure de ROUGE-1/2/L a partir das estatísticas suficientes.
+    
+    Aplicado linha a linha dá o ROUGE de cada resposta; aplicado a estatísticas
+    somadas dá o ROUGE micro (sobreposições e totais somados antes da divisão).
+    
+    Args:
+        estatisticas: DataFrame com as colunas ``COLUNAS_ESTATISTICAS_ROUGE``
+        
+    Returns:
+        Matriz (linhas, 3) com as colunas rouge1, rouge2 e rougeL
+    """
+    coluna = lambda nome: estatisticas[nome].to_numpy(np.int64)
+    scores = np.zeros((len(estatisticas), len(ROUGE_TIPOS)))
+    for n in range(1, ROUGE_MAX_N + 1):
+        scores[:, n - 1] = _fmeasure(
+            coluna(f'rouge{n}_overlap'), coluna(f'rouge{n}_pred_total'), coluna(f'rouge{n}_ref_total')
+        )
+    # ROUGE-L usa os comprimentos das sequências (os totais de unigramas)
+    scores[:, 2] = _fmeasure(coluna('rougeL_lcs'), coluna('rouge1_pred_total'), coluna('rouge1_ref_total'))
+    return scores
+
+
+def rouge_batch_ids(hipoteses: Sequence[np.ndarray], referencias: Sequence[IndiceNgramas],
+                    tokenizador: TokenizadorLexico, workers: Optional[int] = None,
+                    chunk_size: Optional[int] = None) -> np.ndarray:
+    """
+    Calcula ROUGE-1/2/L (F-measure) de sequências já tokenizadas (IDs inteiros).
+    
+    Args:
+        hipoteses: IDs dos tokens (tokenização ROUGE) de cada predição
+        referencias: Índice (tokenização ROUGE) da referência de cada predição
+        tokenizador: Tokenizador que gerou os IDs
+        workers: Número de processos para a LCS (0 = todos os núcleos)
+        chunk_size: Pares por tarefa enviada ao pool
+        
+    Returns:
+        Matriz (linhas, 3) com as colunas rouge1, rouge2 e rougeL
+    """
+    if len(hipoteses) == 0:
+        return np.zeros((0, len(ROUGE_TIPOS)))
+    return rouge_de_estatisticas(
+        estatisticas_rouge_ids(hipoteses, referencias, tokenizador, workers=workers, chunk_size=chunk_size)
+    )
+
+
+def rouge_batch(preds: Sequence[str], refs: Sequence[str], workers: Optional[int] = None,
+                chunk_size: Optional[int] = None,
+                tokenizador: Optional[TokenizadorLexico] = None) -> np.ndarray:
+    """
+    Calcula ROUGE-1/2/L (F-measure, com stemmer) de todas as predições.
+    
+    Args:
+        preds: Predições dos modelos
+        refs: Respostas de referência (mesmo tamanho de ``preds``)
+        workers: Número de processos para a LCS (0 = todos os núcleos)
+        chunk_size: Pares por tarefa enviada ao pool
+        tokenizador: Tokenizador da análise (referências já tokenizadas são reaproveitadas)
+        
+    Returns:
+        Matriz (linhas, 3) com as colunas rouge1, rouge2 e rougeL
+    """
+    if len(preds) != len(refs):
+        raise ValueError("preds e refs devem ter o mesmo tamanho")
+    tokenizador = tokenizador or TokenizadorLexico()
+    
+    hipoteses = [tokenizador.ids(tokenizar_rouge(str(p))) for p in preds]
+    referencias = [ref.rouge for ref in tokenizador.referencias([str(r) for r in refs])]
+    return rouge_batch_ids(hipoteses, referencias, tokenizador, workers=workers, chunk_size=chunk_size)
+
+def estatisticas_lexicas(preds: Sequence[str], refs: Sequence[str],
+                         tokenizador: Optional[TokenizadorLexico] = None) -> pd.DataFrame:
+    """
+    Calcula as estatísticas suficientes de BLEU e ROUGE de pares (predição, referência).
+    
+    Args:
+        preds: Predições dos modelos
+        refs: Respostas de referência (mesmo tamanho de ``preds``)
+        tokenizador: Tokenizador da análise (referências já tokenizadas são reaproveitadas)
+        
+    Returns:
+        DataFrame int32 (uma linha por par) com as colunas ``COLUNAS_ESTATISTICAS_LEXICAS``
+        
+    Raises:
+        Exception: Erros do BLEU ou do ROUGE são propagados (nunca viram estatísticas
+            zeradas, que seriam gravadas no cache de métricas como resultado)
+    """
+    if len(preds) != len(refs):
+        raise ValueError("preds e refs devem ter o mesmo tamanho")
+    tokenizador = tokenizador or TokenizadorLexico()
+    estatisticas = pd.DataFrame(0, index=range(len(preds)), columns=COLUNAS_ESTATISTICAS_LEXICAS, dtype=np.int32)
+    if len(preds) == 0:
+        return estatisticas
+    
+    # Tokeniza cada predição uma única vez; referências vêm do cache da análise
+    predicoes = [tokenizador.tokenizar(str(p)) for p in preds]
+    referencias = tokenizador.referencias([str(r) for r in refs])
+    
+    estatisticas[COLUNAS_ESTATISTICAS_BLEU] = estatisticas_bleu_ids(
+        [p.bleu for p in predicoes], [r.bleu for r in referencias], tokenizador
+    ).to_numpy()
+    estatisticas[COLUNAS_ESTATISTICAS_ROUGE] = estatisticas_rouge_ids(
+        [p.rouge for p in predicoes], [r.rouge for r in referencias], tokenizador
+    ).to_numpy()
+    
+    return estatisticas.astype(np.int32)
+
+
+def agregar_metricas_lexicas(df: pd.DataFrame, colunas_grupo: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Calcula BLEU de corpus e ROUGE micro somando as estatísticas suficientes por grupo.
+    
+    Args:
+        df: DataFrame com as colunas ``COLUNAS_ESTATISTICAS_LEXICAS``
+            (saída de ``calcular_bleu_rouge_individual``)
+        colunas_grupo: Colunas de agrupamento (ex.: ['model'], ['model', 'execucao']);
+            sem colunas, agrega o DataFrame inteiro em uma única linha
+        
+    Returns:
+        DataFrame (indexado pelos grupos) com 'bleu_corpus', 'rouge1_micro',
+        'rouge2_micro' e 'rougeL_micro'
+    """
+    if colunas_grupo:
+        somas = df.groupby(colunas_grupo, observed=True, sort=True)[COLUNAS_ESTATISTICAS_LEXICAS].sum()
+    else:
+        somas = df[COLUNAS_ESTATISTICAS_LEXICAS].sum().to_frame().T
+    
+    rouge = rouge_de_estatisticas(somas)
+    return pd.DataFrame({
+        'bleu_corpus': bleu_de_estatisticas(somas),
+        'rouge1_micro': rouge[:, 0],
+        'rouge2_micro': rouge[:, 1],
+        'rougeL_micro': rouge[:, 2],
+    }, index=somas.index)
+
+
 class BleuRougeCalculator:
     """Calculadora de métricas BLEU e ROUGE."""
     
-    def __init__(self):
+    def __init__(self, tokenizador: Optional[TokenizadorLexico] = None, cliente=None):
         self.config = get_config()
+        # Cache de tokenização compartilhado por toda a análise (referências tokenizadas uma vez)
+        self.tokenizador = tokenizador or TokenizadorLexico()
+        # Servidor local de métricas (ver servidor_metricas.py); None = cálculo no processo
+        self.cliente = cliente
+    
+    def _estatisticas(self, preds: List[str], refs: List[str]) -> np.ndarray:
+        """Estatísticas suficientes pelo servidor local quando disponível; senão, no processo."""
+        if self.cliente is not None:
+            try:
+                return self.cliente.estatisticas_lexicas(preds, refs)
+            except Exception as e:
+                print(f"⚠️ Servidor de métricas indisponível, calculando BLEU/ROUGE localmente: {e}")
+        return estatisticas_lexicas(preds, refs, self.tokenizador).to_numpy()
     
     def calcular_bleu_rouge_individual(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Calcula métricas BLEU e ROUGE para cada linha do DataFrame.
         
         Args:
-            df: DataFrame com colunas 'pergunta', 'resposta_esperada', 'resposta_modelo'
+            df: DataFrame com colunas 'prompt', 'reference', 'prediction'
             
         Returns:
-            DataFrame com colunas adicionais de métricas BLEU e ROUGE
+            DataFrame com colunas adicionais de métricas BLEU e ROUGE e com as
+            estatísticas suficientes (``COLUNAS_ESTATISTICAS_LEXICAS``) de cada linha
+            
+        Raises:
+            Exception: Falhas do cálculo são propagadas (nada é gravado no cache de métricas)
         """
         try:
-            from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
-            from rouge_score import rouge_scorer
+            from nltk.stem import porter  # noqa: F401 (stemmer usado pelo ROUGE)
         except ImportError as e:
             print(f"❌ Erro ao importar dependências para BLEU/ROUGE: {e}")
             return df
         
-        # Inicializar calculadoras
-        smoothing = SmoothingFunction().method1
-        rouge_scorer_instance = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-        
-        # Preparar dados
-        df_result = df.copy()
+        print("🔍 Calculando métricas BLEU e ROUGE...")
         
-        # Colunas para métricas
-        bleu_scores = []
-        rouge1_scores = []
-        rouge2_scores = []
-        rougeL_scores = []
+        # Estatísticas suficientes por linha; respostas inválidas ficam zeradas e,
+        # portanto, com todas as métricas zeradas e sem peso nos agregados de corpus
+        estatisticas = pd.DataFrame(0, index=df.index, columns=COLUNAS_ESTATISTICAS_LEXICAS, dtype=np.int32)
         
-        print("🔍 Calculando métricas BLEU e ROUGE...")
+        # Classificação de validade em uma única passada vetorizada
+        respostas_validas = mascara_respostas_validas(df)
+        qtd_invalidas = int((~respostas_validas).sum())
+        if qtd_invalidas:
+            print(f"⚠️ {qtd_invalidas} respostas inválidas ficam com BLEU/ROUGE zerados")
         
-        for idx, row in df.iterrows():
-            pergunta = str(row.get('prompt', ''))
-            resposta_esperada = str(row.get('reference', ''))
-            resposta_modelo = str(row.get('prediction', ''))
-            
-            # Verificar se é resposta inválida
-            is_error_flag = bool(row.get('is_error', False)) if 'is_error' in df.columns else None
-            resposta_invalida = is_error_flag if is_error_flag is not None else self._eh_resposta_invalida(resposta_modelo)
-            if resposta_invalida:
-                if idx < 5:  # Debug para as primeiras 5 linhas
-                    print(f"⚠️ Linha {idx} marcada como inválida: {resposta_modelo[:50]}...")
-                bleu_scores.append(0.0)
-                rouge1_scores.append(0.0)
-                rouge2_scores.append(0.0)
-                rougeL_scores.append(0.0)
-                continue
-            
+        if respostas_validas.any():
+            df_validas = df[respostas_validas]
             # Para métricas de texto (BLEU/ROUGE), usar resposta completa
             # Não extrair A, B, C, D - isso é apenas para benchmarks de múltipla escolha
-            resposta_final = resposta_modelo
-            
-            # Calcular BLEU
-            try:
-                reference = [resposta_esperada.split()]
-                candidate = resposta_final.split()
-                bleu_score = sentence_bleu(reference, candidate, smoothing_function=smoothing)
-                bleu_scores.append(bleu_score)
-            except Exception as e:
-                print(f"⚠️ Erro BLEU linha {idx}: {e}")
-                bleu_scores.append(0.0)
+            preds = df_validas['prediction'].astype(str).tolist()
+            refs = df_validas['reference'].astype(str).tolist()
             
-            # Calcular ROUGE
-            try:
-                rouge_scores = rouge_scorer_instance.score(resposta_esperada, resposta_final)
-                rouge1_score = rouge_scores['rouge1'].fmeasure
-                rouge2_score = rouge_scores['rouge2'].fmeasure
-                rougeL_score = rouge_scores['rougeL'].fmeasure
-                
-                # Debug para as primeiras 5 linhas
-                if idx < 5:
-                    print(f"✅ Linha {idx} ROUGE calculado - R1: {rouge1_score:.4f}, R2: {rouge2_score:.4f}, RL: {rougeL_score:.4f}")
-                
-                rouge1_scores.append(rouge1_score)
-                rouge2_scores.append(rouge2_score)
-                rougeL_scores.append(rougeL_score)
-            except Exception as e:
-                print(f"⚠️ Erro ROUGE linha {idx}: {e}")
-                rouge1_scores.append(0.0)
-                rouge2_scores.append(0.0)
-                rougeL_scores.append(0.0)
+            # Pares já pontuados vêm do cache de métricas; só os novos são calculados
+            versao = versao_metrica('estatisticas_lexicas', {'versao': VERSAO_ESTATISTICAS_LEXICAS})
+            valores = pontuar_com_cache('estatisticas_lexicas', versao, preds, refs, self._estatisticas,
+                                        len(COLUNAS_ESTATISTICAS_LEXICAS), np.int32)
+            estatisticas.loc[respostas_validas, COLUNAS_ESTATISTICAS_LEXICAS] = valores
         
-        # Adicionar colunas ao DataFrame
-        df_result['bleu_score'] = bleu_scores
-        df_result['rouge1_score'] = rouge1_scores
-        df_result['rouge2_score'] = rouge2_scores
-        df_result['rougeL_score'] = rougeL_scores
+        estatisticas = estatisticas.astype(np.int32)
+        df_result = pd.concat([df.drop(columns=COLUNAS_ESTATISTICAS_LEXICAS, errors='ignore'), estatisticas], axis=1)
+        df_result['bleu_score'] = bleu_de_estatisticas(estatisticas)
+        df_result[['rouge1_score', 'rouge2_score', 'rougeL_score']] = rouge_de_estatisticas(estatisticas)
         
         # Debug: verificar se ROUGE-2 foi salvo corretamente
         rouge2_unique = df_result['rouge2_score'].unique()
@@ -134,14 +613,16 @@ class BleuRougeCalculator:
         
         metricas_por_modelo = {}
         
-        for modelo in df['model'].unique():
-            df_modelo = df[df['model'] == modelo]
+        # BLEU de corpus e ROUGE micro de todos os modelos a partir das estatísticas somadas
+        if set(COLUNAS_ESTATISTICAS_LEXICAS).issubset(df.columns):
+            agregados_corpus = agregar_metricas_lexicas(df, ['model'])
+        else:
+            agregados_corpus = pd.DataFrame()
+        
+        for modelo, df_modelo in df.groupby('model', observed=True, sort=False):
             
             # Filtrar apenas respostas válidas
-            if 'is_error' in df_modelo.columns:
-                df_validas = df_modelo[~df_modelo['is_error']]
-            else:
-                df_validas = df_modelo[~df_modelo['prediction'].apply(self._eh_resposta_invalida)]
+            df_validas = df_modelo[mascara_respostas_validas(df_modelo)]
             
             if len(df_validas) == 0:
                 metricas_por_modelo[modelo] = {
@@ -168,48 +649,11 @@ class BleuRougeCalculator:
                 'respostas_validas': len(df_validas),
                 'taxa_validas': len(df_validas) / len(df_modelo)
             }
+            if modelo in agregados_corpus.index:
+                metricas_por_modelo[modelo].update(agregados_corpus.loc[modelo].to_dict())
         
         return metricas_por_modelo
     
-    def _eh_resposta_invalida(self, resposta: str) -> bool:
-        """
-        Verifica se uma resposta é inválida (erro de API, vazia, etc.).
-        
-        Args:
-            resposta: Resposta do modelo
-            
-        Returns:
-            True se a resposta é inválida
-        """
-        if not resposta or pd.isna(resposta):
-            return True
-        
-        resposta_str = str(resposta).strip().lower()
-        
-        # Padrões de erro de API
-        padroes_erro = [
-            'erro',
-            'error',
-            'timeout',
-            'rate limit',
-            'quota excedida',
-            'quota exceeded',
-            'api key',
-            'authentication',
-            'connection',
-            'network',
-            'failed',
-            'exception',
-            'traceback',
-            'null',
-            'none',
-            'undefined',
-            'gemini_1_5_flash'  # Erro específico do Gemini
-        ]
-        
-        return any(padrao in resposta_str for padrao in padroes_erro)
-    
-    
     def gerar_relatorio_bleu_rouge(self, metricas_por_modelo: Dict[str, Dict]) -> str:
         """
         Gera relatório em texto das métricas BLEU e ROUGE.
@@ -238,22 +682,32 @@ class BleuRougeCalculator:
             relatorio.append(f"- **ROUGE-1**: {metricas.get('rouge1_medio', 0.0):.4f} ± {metricas.get('rouge1_std', 0.0):.4f}")
             relatorio.append(f"- **ROUGE-2**: {metricas.get('rouge2_medio', 0.0):.4f} ± {metricas.get('rouge2_std', 0.0):.4f}")
             relatorio.append(f"- **ROUGE-L**: {metricas.get('rougeL_medio', 0.0):.4f} ± {metricas.get('rougeL_std', 0.0):.4f}")
+            if 'bleu_corpus' in metricas:
+                relatorio.append(f"- **BLEU (corpus)**: {metricas['bleu_corpus']:.4f}")
+                relatorio.append(
+                    f"- **ROUGE micro (1/2/L)**: {metricas['rouge1_micro']:.4f} / "
+                    f"{metricas['rouge2_micro']:.4f} / {metricas['rougeL_micro']:.4f}"
+                )
             relatorio.append(f"- **Respostas Válidas**: {metricas['respostas_validas']}/{metricas['total_respostas']} ({metricas['taxa_validas']:.1%})")
             relatorio.append("")
         
         return "\n".join(relatorio)
 
-def calcular_bleu_rouge_completo(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict], str]:
+def calcular_bleu_rouge_completo(df: pd.DataFrame,
+                                 tokenizador: Optional[TokenizadorLexico] = None,
+                                 cliente=None) -> Tuple[pd.DataFrame, Dict[str, Dict], str]:
     """
     Função principal para calcular BLEU e ROUGE completos.
     
     Args:
         df: DataFrame com dados das respostas
+        tokenizador: Cache de tokenização da análise (reaproveitado entre modelos e execuções)
+        cliente: Cliente do servidor local de métricas (opcional; ver servidor_metricas.py)
         
     Returns:
         Tuple com (DataFrame com métricas, métricas por modelo, relatório)
     """
-    calculator = BleuRougeCalculator()
+    calculator = BleuRougeCalculator(tokenizador, cliente)
     
     # Calcular métricas individuais
     df_com_metricas = calculator.calcular_bleu_rouge_individual(df)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Cache em disco dos embeddings de tokens usados pelo BERTScore.
+Endereçado por conteúdo: cada texto é identificado pelo hash SHA-1 e os embeddings
+ficam em shards .npy float16 lidos via memmap, separados por encoder, camada,
+quantização e modo de janelas. Entre análises, apenas textos nunca vistos passam
+pelo encoder.
+"""
+
+import os
+import re
+import uuid
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+ARQUIVO_INDICE = "indice.tsv"
+PREFIXO_SHARD = "shard_"
+DTYPE_CACHE = np.float16
+
+_CARACTERES_INVALIDOS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def pasta_modelo_cache(pasta_base: str, model_type: str, num_layers: int, quantizado: bool = False,
+                       sobreposicao_janela: Optional[int] = None) -> str:
+    """
+    Retorna a pasta do cache de uma configuração de encoder.
+
+    Args:
+        pasta_base: Pasta raiz dos caches
+        model_type: Encoder do BERTScore (nome do Hugging Face ou caminho local)
+        num_layers: Camada usada nos embeddings
+        quantizado: Se o encoder foi quantizado (embeddings diferentes do fp32)
+        sobreposicao_janela: Sobreposição do modo de janelas (None = textos truncados)
+
+    Returns:
+        Caminho da pasta com índice e shards da configuração
+    """
+    nome = _CARACTERES_INVALIDOS.sub("_", model_type.strip("/\\")) + f"_L{num_layers}"
+    if quantizado:
+        nome += "_int8"
+    if sobreposicao_janela is not None:
+        nome += f"_jan{sobreposicao_janela}"
+    return os.path.join(pasta_base, "bertscore", nome)
+
+
+class CacheEmbeddings:
+    """
+    Cache de embeddings por texto de uma configuração de encoder.
+
+    O índice (hash do texto -> shard, linha inicial, linha final) é um TSV em modo
+    append; cada lote de textos novos vira um shard .npy com os embeddings de todos
+    os tokens concatenados, de modo que gravar nunca reescreve dados existentes.
+    Os shards têm nomes aleatórios (uuid4): processos que gravam na mesma pasta ao
+    mesmo tempo (servidor de métricas, análises concorrentes) nunca escolhem o mesmo.
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self._indice: Dict[str, Tuple[str, int, int]] = {}
+        self._shards: Dict[str, np.ndarray] = {}
+        self._carregar_indice()
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self._indice
+
+    def _caminho_shard(self, shard: str) -> str:
+        return os.path.join(self.pasta, f"{PREFIXO_SHARD}{shard}.npy")
+
+    def _carregar_indice(self) -> None:
+        """Lê o índice do disco (entradas de shards ausentes são ignoradas)."""
+        caminho = os.path.join(self.pasta, ARQUIVO_INDICE)
+        if not os.path.exists(caminho):
+            return
+
+        shards_existentes = {}
+        with open(caminho, encoding="utf-8") as f:
+            for linha in f:
+                partes = linha.rstrip("\n").split("\t")
+                if len(partes) != 4:
+                    continue
+                chave, shard, inicio, fim = partes[0], partes[1], int(partes[2]), int(partes[3])
+                if shard.isdigit():
+                    # Índices antigos numeravam os shards em sequência (shard_00000.npy)
+                    shard = f"{int(shard):05d}"
+                if shard not in shards_existentes:
+                    shards_existentes[shard] = os.path.exists(self._caminho_shard(shard))
+                if shards_existentes[shard]:
+                    self._indice[chave] = (shard, inicio, fim)
+
+    def _shard(self, shard: str) -> np.ndarray:
+        """Abre um shard via memmap (somente leitura), uma vez por processo."""
+        if shard not in self._shards:
+            self._shards[shard] = np.load(self._caminho_shard(shard), mmap_mode="r")
+        return self._shards[shard]
+
+    def obter(self, chave: str) -> Optional[np.ndarray]:
+        """
+        Retorna os embeddings (tokens x dimensão, float16 em memmap) de um texto.
+
+        Args:
+            chave: Hash do texto
+
+        Returns:
+            Matriz de embeddings ou None se o texto não está no cache
+        """
+        posicao = self._indice.get(chave)
+        if posicao is None:
+            return None
+        shard, inicio, fim = posicao
+        return self._shard(shard)[inicio:fim]
+
+    def adicionar(self, embeddings: Dict[str, np.ndarray]) -> None:
+        """
+        Grava os embeddings de textos novos em um único shard e atualiza o índice.
+
+        Args:
+            embeddings: Dicionário hash do texto -> matriz (tokens x dimensão)
+        """
+        novos = {chave: emb for chave, emb in embeddings.items() if chave not in self._indice}
+        if not novos:
+            return
+
+        os.makedirs(self.pasta, exist_ok=True)
+        shard = uuid.uuid4().hex
+
+        comprimentos = np.fromiter((len(emb) for emb in novos.values()), dtype=np.int64, count=len(novos))
+        fins = np.cumsum(comprimentos)
+        inicios = fins - comprimentos
+
+        # Grava o shard antes do índice: uma interrupção no meio deixa no máximo um
+        # shard órfão, nunca uma entrada de índice apontando para dados ausentes
+        caminho_tmp = self._caminho_shard(shard) + ".tmp"
+        with open(caminho_tmp, "wb") as f:
+            np.save(f, np.concatenate(list(novos.values())).astype(DTYPE_CACHE))
+        os.replace(caminho_tmp, self._caminho_shard(shard))
+
+        # Entradas do lote em uma única escrita em modo append, sem intercalar com as
+        # linhas de outro processo gravando o mesmo índice
+        linhas = "".join(f"{chave}\t{shard}\t{inicio}\t{fim}\n" for chave, inicio, fim in zip(novos, inicios, fins))
+        with open(os.path.join(self.pasta, ARQUIVO_INDICE), "a", encoding="utf-8") as f:
+            f.write(linhas)
+        for chave, inicio, fim in zip(novos, inicios, fins):
+            self._indice[chave] = (shard, int(inicio), int(fim))
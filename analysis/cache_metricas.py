@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Cache persistente de métricas por par (predição, referência).
+Endereçado por conteúdo: cada valor é guardado em SQLite sob a chave
+(métrica, versão, sha1(predição), sha1(referência)), em que a versão é o hash da
+configuração que afeta os valores da métrica. Respostas de execuções já analisadas
+nunca mudam, então uma nova análise só pontua os pares ainda não vistos.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .tokenizacao import hash_texto
+except ImportError:
+    from tokenizacao import hash_texto
+
+ARQUIVO_CACHE = "metricas.sqlite"
+
+# Chaves por consulta em lote (tabela temporária unida à tabela de métricas)
+CHAVES_POR_CONSULTA = 50_000
+
+_caches: Dict[str, "CacheMetricas"] = {}
+_lock = threading.Lock()
+
+# Conexões SQLite não atravessam fork: processos filhos abrem as suas
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_caches.clear)
+
+
+def versao_metrica(metrica: str, params: Dict) -> str:
+    """
+    Hash curto da configuração de uma métrica (parte da chave do cache).
+
+    Args:
+        metrica: Nome da métrica
+        params: Parâmetros que afetam os valores (modelo, camada, versão do cálculo...)
+
+    Returns:
+        Primeiros 16 caracteres do SHA-1 dos parâmetros serializados
+    """
+    serializado = json.dumps({'metrica': metrica, **params}, sort_keys=True, default=str)
+    return hashlib.sha1(serializado.encode("utf-8")).hexdigest()[:16]
+
+
+class CacheMetricas:
+    """
+    Tabela SQLite de valores de métricas por par.
+
+    Os valores de cada par são um vetor (ex.: precision, recall e F1 do BERTScore)
+    gravado como bytes; o dtype e o número de colunas vêm de quem consulta.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Métrica -> [pares consultados, pares encontrados] desde a última zerada
+        self.estatisticas: Dict[str, List[int]] = {}
+        with self._conexao:
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS metricas ("
+                " metrica TEXT NOT NULL, versao TEXT NOT NULL,"
+                " hash_pred TEXT NOT NULL, hash_ref TEXT NOT NULL, valores BLOB NOT NULL,"
+                " PRIMARY KEY (metrica, versao, hash_pred, hash_ref)) WITHOUT ROWID"
+            )
+
+    def buscar(self, metrica: str, versao: str, chaves: Sequence[Tuple[str, str]],
+               colunas: int, dtype=np.float64) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Consulta em lote os valores de vários pares.
+
+        Args:
+            metrica: Nome da métrica
+            versao: Versão da configuração (ver versao_metrica)
+            chaves: (hash da predição, hash da referência) de cada par
+            colunas: Valores por par
+            dtype: Tipo dos valores
+
+        Returns:
+            Tuple com (máscara dos pares encontrados, matriz pares x colunas; zeros nos ausentes)
+        """
+        encontrados = np.zeros(len(chaves), dtype=bool)
+        valores = np.zeros((len(chaves), colunas), dtype=dtype)
+
+        with self._lock:
+            for inicio in range(0, len(chaves), CHAVES_POR_CONSULTA):
+                bloco = chaves[inicio:inicio + CHAVES_POR_CONSULTA]
+                self._conexao.execute("CREATE TEMP TABLE IF NOT EXISTS consulta (pos INTEGER, hash_pred TEXT, hash_ref TEXT)")
+                self._conexao.execute("DELETE FROM consulta")
+                self._conexao.executemany(
+                    "INSERT INTO consulta VALUES (?, ?, ?)",
+                    ((inicio + i, hp, hr) for i, (hp, hr) in enumerate(bloco))
+                )
+                linhas = self._conexao.execute(
+                    "SELECT c.pos, m.valores FROM consulta c JOIN metricas m"
+                    " ON m.metrica = ? AND m.versao = ? AND m.hash_pred = c.hash_pred AND m.hash_ref = c.hash_ref",
+                    (metrica, versao)
+                ).fetchall()
+                for pos, blob in linhas:
+                    encontrados[pos] = True
+                    valores[pos] = np.frombuffer(blob, dtype=dtype)
+            self._conexao.commit()
+
+            contagem = self.estatisticas.setdefault(metrica, [0, 0])
+            contagem[0] += len(chaves)
+            contagem[1] += int(encontrados.sum())
+
+        return encontrados, valores
+
+    def gravar(self, metrica: str, versao: str, chaves: Sequence[Tuple[str, str]],
+               valores: np.ndarray, dtype=np.float64) -> None:
+        """
+        Grava os valores de vários pares em uma única transação.
+
+        Args:
+            metrica: Nome da métrica
+            versao: Versão da configuração
+            chaves: (hash da predição, hash da referência) de cada par
+            valores: Matriz pares x colunas
+            dtype: Tipo em que os valores são gravados
+        """
+        valores = np.asarray(valores, dtype=dtype)
+        with self._lock, self._conexao:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO metricas VALUES (?, ?, ?, ?, ?)",
+                ((metrica, versao, hp, hr, linha.tobytes()) for (hp, hr), linha in zip(chaves, valores))
+            )
+
+    def zerar_estatisticas(self) -> None:
+        """Zera as contagens de pares consultados/encontrados (início de uma análise)."""
+        with self._lock:
+            self.estatisticas.clear()
+
+    def somar_estatisticas(self, estatisticas: Dict[str, List[int]]) -> None:
+        """
+        Soma às contagens deste processo as de outro (ex.: processos da análise por modelo).
+
+        Args:
+            estatisticas: Métrica -> [pares consultados, pares encontrados]
+        """
+        with self._lock:
+            for metrica, (pares, acertos) in estatisticas.items():
+                contagem = self.estatisticas.setdefault(metrica, [0, 0])
+                contagem[0] += pares
+                contagem[1] += acertos
+
+    def taxas_acerto(self) -> Dict[str, Dict]:
+        """
+        Retorna pares consultados, encontrados e a taxa de acerto de cada métrica.
+
+        Returns:
+            Dicionário métrica -> {'pares', 'acertos', 'taxa_acerto'}
+        """
+        return {
+            metrica: {'pares': pares, 'acertos': acertos, 'taxa_acerto': acertos / pares if pares else 0.0}
+            for metrica, (pares, acertos) in sorted(self.estatisticas.items())
+        }
+
+
+def obter_cache_metricas() -> Optional[CacheMetricas]:
+    """
+    Retorna o cache de métricas do processo (None se desabilitado em Config.CACHE_METRICAS).
+
+    Returns:
+        Instância compartilhada de CacheMetricas, aberta na primeira chamada
+    """
+    config = get_config()
+    if not config.CACHE_METRICAS:
+        return None
+
+    caminho = os.path.join(config.PASTA_CACHE, ARQUIVO_CACHE)
+    cache = _caches.get(caminho)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(caminho)
+            if cache is None:
+                cache = _caches[caminho] = CacheMetricas(caminho)
+    return cache
+
+
+def pontuar_com_cache(metrica: str, versao: str, preds: List[str], refs: List[str],
+                      pontuar: Callable[[List[str], List[str]], np.ndarray],
+                      colunas: int, dtype=np.float64) -> np.ndarray:
+    """
+    Pontua pares (predição, referência) reaproveitando os valores já guardados no cache.
+
+    Os pares são consultados em lote; apenas os ausentes (sem repetição) são passados a
+    ``pontuar`` e gravados em seguida. Com o cache desabilitado, pontua todos os pares.
+    Só valores de uma pontuação bem-sucedida são gravados: se ``pontuar`` falhar, a
+    exceção é propagada sem gravar nada, e linhas com valores não finitos não entram
+    no cache.
+
+    Args:
+        metrica: Nome da métrica
+        versao: Versão da configuração (ver versao_metrica)
+        preds: Predições
+        refs: Referências (alinhadas às predições)
+        pontuar: Função que recebe (preds, refs) e devolve a matriz pares x colunas
+        colunas: Valores por par
+        dtype: Tipo dos valores
+
+    Returns:
+        Matriz pares x colunas com os valores de todos os pares
+    """
+    cache = obter_cache_metricas()
+    if cache is None:
+        return np.asarray(pontuar(preds, refs), dtype=dtype).reshape(len(preds), colunas)
+
+    chaves = [(hash_texto(p), hash_texto(r)) for p, r in zip(preds, refs)]
+    encontrados, valores = cache.buscar(metrica, versao, chaves, colunas, dtype)
+
+    faltantes = np.flatnonzero(~encontrados)
+    if len(faltantes):
+        # Pares repetidos entre os ausentes são pontuados uma única vez
+        primeiro_por_chave: Dict[Tuple[str, str], int] = {}
+        for i in faltantes:
+            primeiro_por_chave.setdefault(chaves[i], i)
+        unicos = list(primeiro_por_chave.values())
+
+        novos = np.asarray(pontuar([preds[i] for i in unicos], [refs[i] for i in unicos]),
+                           dtype=dtype).reshape(len(unicos), colunas)
+        posicao = {chaves[i]: j for j, i in enumerate(unicos)}
+        valores[faltantes] = novos[[posicao[chaves[i]] for i in faltantes]]
+        finitos = np.isfinite(novos).all(axis=1)
+        cache.gravar(metrica, versao, [chaves[i] for i, ok in zip(unicos, finitos) if ok], novos[finitos], dtype)
+
+    print(f"♻️ Cache de métricas ({metrica}): {len(preds) - len(faltantes)}/{len(preds)} pares reaproveitados")
+    return valores
+
+
+def relatorio_cache_metricas() -> str:
+    """
+    Gera a seção do relatório com a taxa de acerto do cache de métricas na análise.
+
+    Returns:
+        String com relatório formatado (vazia se o cache estiver desabilitado ou sem consultas)
+    """
+    cache = obter_cache_metricas()
+    if cache is None or not cache.estatisticas:
+        return ""
+
+    relatorio = []
+    relatorio.append("## ♻️ Cache de Métricas")
+    relatorio.append("")
+    relatorio.append("| Métrica | Pares | Reaproveitados | Taxa de Acerto |")
+    relatorio.append("|:-------|------:|------:|------:|")
+    for metrica, dados in cache.taxas_acerto().items():
+        relatorio.append(f"| {metrica} | {dados['pares']} | {dados['acertos']} | {dados['taxa_acerto']:.1%} |")
+    relatorio.append("")
+    relatorio.append(f"Apenas pares ausentes do cache (`{cache.caminho}`) foram pontuados nesta análise.")
+    relatorio.append("")
+    return "\n".join(relatorio)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Módulo para cálculo da consistência entre execuções.
+Mede o quanto a resposta de um modelo ao mesmo prompt se mantém entre execuções:
+todas as respostas de cada (modelo, prompt) são comparadas par a par pelo Jaccard
+de tokens (estimado via MinHash) e pela similaridade de cosseno dos embeddings de
+sentença. Os pares de cada grupo saem do triângulo superior da matriz do grupo,
+gerados de uma vez para todos os grupos de mesmo tamanho.
+"""
+
+import sys
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .invalid_responses import mascara_respostas_validas
+    from .minhash import GeradorMinHash
+except ImportError:
+    from invalid_responses import mascara_respostas_validas
+    from minhash import GeradorMinHash
+
+COLUNAS_GRUPO = ['model', 'prompt']
+
+# Pares comparados por bloco (limita a memória das matrizes pares x permutações)
+PARES_POR_BLOCO = 65_536
+
+
+def pares_triangulo_superior(grupos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Todos os pares (i, j), i < j, de linhas do mesmo grupo.
+
+    Para cada tamanho de grupo k, os pares de todos os grupos com k linhas saem de
+    np.triu_indices(k, 1) somado ao início de cada grupo (um laço por tamanho
+    distinto, não por grupo nem por par).
+
+    Args:
+        grupos: Código do grupo de cada linha
+
+    Returns:
+        Tuple com (grupo do par, linha i, linha j), índices nas linhas originais
+    """
+    ordem = np.argsort(grupos, kind='stable')
+    codigos, inicios, tamanhos = np.unique(grupos[ordem], return_index=True, return_counts=True)
+
+    partes_grupo, partes_i, partes_j = [], [], []
+    for k in np.unique(tamanhos[tamanhos > 1]):
+        selecionados = tamanhos == k
+        linha_i, linha_j = np.triu_indices(k, 1)
+        base = inicios[selecionados][:, None]
+        partes_grupo.append(np.repeat(codigos[selecionados], len(linha_i)))
+        partes_i.append(ordem[(base + linha_i).ravel()])
+        partes_j.append(ordem[(base + linha_j).ravel()])
+
+    if not partes_grupo:
+        vazio = np.zeros(0, dtype=np.int64)
+        return vazio, vazio, vazio
+    return np.concatenate(partes_grupo), np.concatenate(partes_i), np.concatenate(partes_j)
+
+
+def _similaridade_pares(matriz: np.ndarray, i: np.ndarray, j: np.ndarray, lexica: bool) -> np.ndarray:
+    """Similaridade de cada par (i, j): Jaccard MinHash (assinaturas) ou cosseno (embeddings normalizados)."""
+    resultado = np.empty(len(i), dtype=np.float64)
+    for inicio in range(0, len(i), PARES_POR_BLOCO):
+        bloco = slice(inicio, inicio + PARES_POR_BLOCO)
+        a, b = matriz[i[bloco]], matriz[j[bloco]]
+        resultado[bloco] = (a == b).mean(axis=1) if lexica else np.einsum('ij,ij->i', a, b)
+    return resultado
+
+
+class ConsistenciaCalculator:
+    """Calculadora da consistência das respostas de cada modelo entre execuções."""
+
+    def __init__(self):
+        self.config = get_config()
+        params = self.config.get_consistencia_params()
+        self.usar_embeddings = params['embeddings']
+        self.gerador = GeradorMinHash(params['permutacoes'], tamanho_shingle=1, semente=params['semente'])
+
+    def _embeddings(self, textos: pd.Series) -> Optional[np.ndarray]:
+        """Embeddings normalizados das respostas (None se desabilitado ou indisponível)."""
+        if not self.usar_embeddings:
+            return None
+        try:
+            try:
+                from .semantic_similarity import embeddings_normalizados
+            except ImportError:
+                from semantic_similarity import embeddings_normalizados
+            params = self.config.get_semantic_similarity_params()
+            return embeddings_normalizados(textos.tolist(), params['model'], params['batch_size'])
+        except Exception as e:
+            print(f"⚠️ Consistência semântica indisponível ({e}); usando apenas a lexical")
+            return None
+
+    def calcular_consistencia_por_prompt(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula a consistência de cada (modelo, prompt) com respostas em mais de uma execução.
+
+        Apenas respostas válidas de prompts textuais (fora dos benchmarks) entram na comparação.
+
+        Args:
+            df: DataFrame com colunas 'model', 'prompt', 'prediction' e 'execucao'
+
+        Returns:
+            DataFrame com uma linha por (modelo, prompt): execuções, pares e médias/mínimos
+            da consistência lexical e semântica
+        """
+        colunas = COLUNAS_GRUPO + ['execucoes', 'pares', 'consistencia_lexica', 'consistencia_lexica_min',
+                                   'consistencia_semantica', 'consistencia_semantica_min']
+        if not set(COLUNAS_GRUPO + ['prediction']).issubset(df.columns):
+            return pd.DataFrame(columns=colunas)
+
+        mascara = mascara_respostas_validas(df)
+        if 'is_benchmark_prompt' in df.columns:
+            mascara &= ~df['is_benchmark_prompt'].astype(bool)
+        df_validas = df.loc[mascara, COLUNAS_GRUPO + ['prediction']
+                            + (['execucao'] if 'execucao' in df.columns else [])]
+        df_validas = df_validas.dropna(subset=COLUNAS_GRUPO).reset_index(drop=True)
+
+        grupos = df_validas.groupby(COLUNAS_GRUPO, sort=True, observed=True).ngroup().to_numpy()
+        grupo_par, i, j = pares_triangulo_superior(grupos)
+        if len(grupo_par) == 0:
+            return pd.DataFrame(columns=colunas)
+
+        # Só as linhas que participam de algum par são codificadas
+        usadas = np.unique(np.concatenate([i, j]))
+        posicao = np.full(len(df_validas), -1, dtype=np.int64)
+        posicao[usadas] = np.arange(len(usadas))
+        i, j = posicao[i], posicao[j]
+        predicoes = df_validas['prediction'].astype(str).iloc[usadas]
+
+        pares = pd.DataFrame({
+            'grupo': grupo_par,
+            'lexica': _similaridade_pares(self.gerador.assinaturas(predicoes.tolist()), i, j, lexica=True)
+        })
+        embeddings = self._embeddings(predicoes)
+        pares['semantica'] = (_similaridade_pares(embeddings, i, j, lexica=False)
+                              if embeddings is not None else np.nan)
+
+        por_grupo = pares.groupby('grupo').agg(
+            pares=('lexica', 'size'),
+            consistencia_lexica=('lexica', 'mean'),
+            consistencia_lexica_min=('lexica', 'min'),
+            consistencia_semantica=('semantica', 'mean'),
+            consistencia_semantica_min=('semantica', 'min')
+        )
+
+        chaves = df_validas.assign(grupo=grupos).groupby('grupo', sort=True)
+        por_grupo[COLUNAS_GRUPO] = chaves[COLUNAS_GRUPO].first().loc[por_grupo.index]
+        por_grupo['execucoes'] = (chaves['execucao'].nunique() if 'execucao' in df_validas.columns
+                                  else chaves.size()).loc[por_grupo.index]
+        return por_grupo[colunas].reset_index(drop=True)
+
+    def calcular_metricas_por_modelo(self, por_prompt: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        Agrega a consistência por modelo.
+
+        A média é tomada sobre os prompts; o mínimo é o do prompt menos estável.
+
+        Args:
+            por_prompt: Resultado de calcular_consistencia_por_prompt
+
+        Returns:
+            Dicionário com métricas por modelo
+        """
+        metricas_por_modelo = {}
+        for modelo, df_modelo in por_prompt.groupby('model', observed=True, sort=True):
+            metricas = {
+                'consistencia_lexica_media': float(df_modelo['consistencia_lexica'].mean()),
+                'consistencia_lexica_min': float(df_modelo['consistencia_lexica'].min()),
+                'prompts_comparados': int(len(df_modelo)),
+                'pares_comparados': int(df_modelo['pares'].sum())
+            }
+            if df_modelo['consistencia_semantica'].notna().any():
+                metricas['consistencia_semantica_media'] = float(df_modelo['consistencia_semantica'].mean())
+                metricas['consistencia_semantica_min'] = float(df_modelo['consistencia_semantica'].min())
+            metricas_por_modelo[modelo] = metricas
+        return metricas_por_modelo
+
+    def gerar_relatorio_consistencia(self, metricas_por_modelo: Dict[str, Dict]) -> str:
+        """
+        Gera relatório em texto da consistência entre execuções.
+
+        Args:
+            metricas_por_modelo: Dicionário com métricas por modelo
+
+        Returns:
+            String com relatório formatado
+        """
+        relatorio = []
+        relatorio.append("## 🔁 Consistência entre Execuções")
+        relatorio.append("")
+
+        if not metricas_por_modelo:
+            relatorio.append("Nenhum prompt com respostas válidas em mais de uma execução.")
+            return "\n".join(relatorio)
+
+        relatorio.append("| Modelo | Lexical (média) | Lexical (mín.) | Semântica (média) | Semântica (mín.) | Prompts | Pares |")
+        relatorio.append("|:-------|------:|------:|------:|------:|------:|------:|")
+        for modelo, metricas in metricas_por_modelo.items():
+            semantica_media = metricas.get('consistencia_semantica_media')
+            semantica_min = metricas.get('consistencia_semantica_min')
+            relatorio.append(
+                f"| {modelo} | {metricas['consistencia_lexica_media']:.4f} | {metricas['consistencia_lexica_min']:.4f} | "
+                f"{f'{semantica_media:.4f}' if semantica_media is not None else '-'} | "
+                f"{f'{semantica_min:.4f}' if semantica_min is not None else '-'} | "
+                f"{metricas['prompts_comparados']} | {metricas['pares_comparados']} |"
+            )
+        relatorio.append("")
+        relatorio.append("Lexical: Jaccard de tokens (MinHash). Semântica: cosseno dos embeddings de sentença. "
+                         "Mínimo: prompt menos estável do modelo.")
+        return "\n".join(relatorio)
+
+
+def calcular_consistencia_completa(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict], str]:
+    """
+    Função principal para calcular a consistência entre execuções.
+
+    Args:
+        df: DataFrame com dados das respostas (um ou mais modelos)
+
+    Returns:
+        Tuple com (consistência por prompt, métricas por modelo, relatório)
+    """
+    calculator = ConsistenciaCalculator()
+
+    por_prompt = calculator.calcular_consistencia_por_prompt(df)
+    metricas_por_modelo = calculator.calcular_metricas_por_modelo(por_prompt)
+    relatorio = calculator.gerar_relatorio_consistencia(metricas_por_modelo)
+
+    return por_prompt, metricas_por_modelo, relatorio
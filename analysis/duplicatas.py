@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Módulo de detecção de respostas quase duplicadas (MinHash + LSH).
+Encontra respostas padronizadas, copiadas ou degeneradas (recusas idênticas,
+boilerplate repetido) entre milhares de predições sem compará-las par a par:
+as assinaturas MinHash dos shingles de cada resposta são indexadas em uma tabela
+LSH por bandas, e só respostas que caem no mesmo balde de alguma banda são
+verificadas e agrupadas.
+"""
+
+import sys
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .invalid_responses import mascara_respostas_validas
+    from .minhash import GeradorMinHash, HASH_VAZIO
+except ImportError:
+    from invalid_responses import mascara_respostas_validas
+    from minhash import GeradorMinHash, HASH_VAZIO
+
+# Caracteres do trecho de exemplo mostrado nos relatórios
+TAMANHO_EXEMPLO = 100
+
+# Grupos listados por modelo e entre modelos nos relatórios
+MAX_GRUPOS_RELATORIO = 5
+
+
+def _componentes_conexos(n: int, origem: np.ndarray, destino: np.ndarray) -> np.ndarray:
+    """
+    Rótulo do componente conexo de cada nó (menor índice do componente).
+
+    Propagação do menor rótulo pelas arestas com saltos de ponteiro, toda em NumPy.
+    """
+    rotulos = np.arange(n)
+    if len(origem) == 0:
+        return rotulos
+    while True:
+        anteriores = rotulos.copy()
+        np.minimum.at(rotulos, origem, rotulos[destino])
+        np.minimum.at(rotulos, destino, rotulos[origem])
+        rotulos = rotulos[rotulos]
+        if np.array_equal(rotulos, anteriores):
+            return rotulos
+
+
+def agrupar_quase_duplicatas(assinaturas: np.ndarray, bandas: int, limiar_jaccard: float) -> np.ndarray:
+    """
+    Agrupa assinaturas MinHash quase duplicadas via LSH por bandas.
+
+    Em cada banda, as linhas com os mesmos valores caem no mesmo balde; cada linha é
+    verificada (Jaccard estimado pela assinatura inteira) contra o primeiro membro do
+    balde e ligada a ele se passar do limiar. Os grupos são os componentes conexos
+    dessas ligações, com custo linear no número de respostas.
+
+    Args:
+        assinaturas: Matriz (respostas x permutações) de GeradorMinHash.assinaturas
+        bandas: Número de bandas (divide o número de permutações)
+        limiar_jaccard: Jaccard estimado mínimo para ligar duas respostas
+
+    Returns:
+        Rótulo do grupo de cada resposta (menor índice do grupo)
+    """
+    n, permutacoes = assinaturas.shape
+    linhas_banda = permutacoes // bandas
+    com_conteudo = ~(assinaturas == HASH_VAZIO).all(axis=1)
+
+    origens, destinos = [], []
+    for banda in range(bandas):
+        valores = np.ascontiguousarray(assinaturas[:, banda * linhas_banda:(banda + 1) * linhas_banda])
+        chaves = valores.view(np.dtype((np.void, valores.dtype.itemsize * linhas_banda))).ravel()
+        _, primeiro, balde = np.unique(chaves, return_index=True, return_inverse=True)
+        representante = primeiro[balde.ravel()]
+
+        candidatos = np.flatnonzero((representante != np.arange(n)) & com_conteudo)
+        if len(candidatos) == 0:
+            continue
+        jaccard = (assinaturas[candidatos] == assinaturas[representante[candidatos]]).mean(axis=1)
+        aceitos = candidatos[jaccard >= limiar_jaccard]
+        origens.append(aceitos)
+        destinos.append(representante[aceitos])
+
+    if not origens:
+        return np.arange(n)
+    return _componentes_conexos(n, np.concatenate(origens), np.concatenate(destinos))
+
+
+def _exemplo(texto: str) -> str:
+    """Trecho curto de uma resposta em uma linha (para tabelas markdown)."""
+    texto = " ".join(str(texto).split()).replace("|", "\\|")
+    return texto if len(texto) <= TAMANHO_EXEMPLO else texto[:TAMANHO_EXEMPLO] + "…"
+
+
+class DetectorDuplicatas:
+    """Detector de respostas quase duplicadas por modelo e entre modelos."""
+
+    def __init__(self):
+        self.config = get_config()
+        self.params = self.config.get_duplicatas_params()
+        self.gerador = GeradorMinHash(self.params['permutacoes'], self.params['tamanho_shingle'],
+                                      self.params['semente'])
+
+    def detectar_duplicatas(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrupa as respostas válidas de prompts textuais em grupos de quase duplicatas.
+
+        Args:
+            df: DataFrame com colunas 'model', 'prompt' e 'prediction' (um ou mais modelos)
+
+        Returns:
+            DataFrame (índice original) com 'grupo', 'tamanho_grupo', 'prompts_grupo' e
+            'modelos_grupo' de cada resposta avaliada
+        """
+        mascara = mascara_respostas_validas(df)
+        if 'is_benchmark_prompt' in df.columns:
+            mascara &= ~df['is_benchmark_prompt'].astype(bool)
+        colunas = ['model', 'prompt', 'prediction'] + (['execucao'] if 'execucao' in df.columns else [])
+        df_validas = df.loc[mascara, colunas].copy()
+        if df_validas.empty:
+            return df_validas.assign(grupo=[], tamanho_grupo=[], prompts_grupo=[], modelos_grupo=[])
+
+        assinaturas = self.gerador.assinaturas(df_validas['prediction'].astype(str).tolist())
+        df_validas['grupo'] = agrupar_quase_duplicatas(
+            assinaturas, self.params['bandas'], self.params['limiar_jaccard']
+        )
+
+        por_grupo = df_validas.groupby('grupo', sort=False)
+        df_validas['tamanho_grupo'] = por_grupo['prediction'].transform('size')
+        df_validas['prompts_grupo'] = por_grupo['prompt'].transform('nunique')
+        df_validas['modelos_grupo'] = por_grupo['model'].transform('nunique')
+        return df_validas
+
+    def calcular_metricas_por_modelo(self, duplicatas: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        Calcula, por modelo, quanto das respostas cai em templates.
+
+        Um template é um grupo de respostas quase idênticas do mesmo modelo a prompts
+        diferentes (respostas parecidas ao mesmo prompt em outra execução são
+        consistência, não template).
+
+        Args:
+            duplicatas: Resultado de detectar_duplicatas
+
+        Returns:
+            Dicionário com métricas por modelo
+        """
+        metricas_por_modelo = {}
+        for modelo, df_modelo in duplicatas.groupby('model', observed=True, sort=True):
+            grupos = df_modelo.groupby('grupo', sort=False).agg(
+                respostas=('prediction', 'size'),
+                prompts=('prompt', 'nunique'),
+                exemplo=('prediction', 'first')
+            )
+            templates = grupos[grupos['prompts'] > 1].sort_values('respostas', ascending=False, kind='stable')
+            respostas_em_templates = int(templates['respostas'].sum())
+            taxa = respostas_em_templates / len(df_modelo)
+
+            metricas_por_modelo[modelo] = {
+                'respostas_avaliadas': int(len(df_modelo)),
+                'grupos_distintos': int(len(grupos)),
+                'templates': int(len(templates)),
+                'respostas_em_templates': respostas_em_templates,
+                'taxa_templates': taxa,
+                'maior_template': int(templates['respostas'].iloc[0]) if len(templates) else 0,
+                'colapso_em_templates': bool(taxa >= self.params['limiar_colapso']),
+                'exemplos_templates': [
+                    {'respostas': int(linha.respostas), 'prompts': int(linha.prompts), 'exemplo': _exemplo(linha.exemplo)}
+                    for linha in templates.head(MAX_GRUPOS_RELATORIO).itertuples()
+                ]
+            }
+        return metricas_por_modelo
+
+    def grupos_entre_modelos(self, duplicatas: pd.DataFrame) -> List[Dict]:
+        """
+        Lista os grupos de quase duplicatas compartilhados por mais de um modelo.
+
+        Args:
+            duplicatas: Resultado de detectar_duplicatas
+
+        Returns:
+            Lista (maiores primeiro) com respostas, modelos e um exemplo de cada grupo
+        """
+        compartilhadas = duplicatas[duplicatas['modelos_grupo'] > 1]
+        grupos = []
+        for _, df_grupo in compartilhadas.groupby('grupo', sort=False):
+            grupos.append({
+                'respostas': int(len(df_grupo)),
+                'prompts': int(df_grupo['prompt'].nunique()),
+                'modelos': sorted(df_grupo['model'].astype(str).unique()),
+                'exemplo': _exemplo(df_grupo['prediction'].iloc[0])
+            })
+        return sorted(grupos, key=lambda g: (-g['respostas'], g['modelos'], g['exemplo']))
+
+    def gerar_relatorio_duplicatas(self, metricas_por_modelo: Dict[str, Dict],
+                                   grupos_compartilhados: List[Dict]) -> str:
+        """
+        Gera relatório em texto das respostas quase duplicadas.
+
+        Args:
+            metricas_por_modelo: Dicionário com métricas por modelo
+            grupos_compartilhados: Grupos presentes em mais de um modelo
+
+        Returns:
+            String com relatório formatado
+        """
+        relatorio = []
+        relatorio.append("## 🧬 Respostas Quase Duplicadas (MinHash + LSH)")
+        relatorio.append("")
+        relatorio.append(f"Jaccard mínimo de {self.params['limiar_jaccard']:.2f} entre shingles de "
+                         f"{self.params['tamanho_shingle']} palavras.")
+        relatorio.append("")
+
+        relatorio.append("| Modelo | Respostas | Grupos | Templates | Em templates | Maior template | Colapso |")
+        relatorio.append("|:-------|------:|------:|------:|------:|------:|:------:|")
+        for modelo, metricas in metricas_por_modelo.items():
+            relatorio.append(
+                f"| {modelo} | {metricas['respostas_avaliadas']} | {metricas['grupos_distintos']} | "
+                f"{metricas['templates']} | {metricas['taxa_templates']:.1%} | {metricas['maior_template']} | "
+                f"{'⚠️' if metricas['colapso_em_templates'] else '✅'} |"
+            )
+        relatorio.append("")
+
+        relatorio.append("### 🔗 Grupos Compartilhados entre Modelos")
+        relatorio.append("")
+        if not grupos_compartilhados:
+            relatorio.append("Nenhum grupo de quase duplicatas compartilhado entre modelos.")
+        else:
+            relatorio.append(f"**Total de grupos**: {len(grupos_compartilhados)}")
+            relatorio.append("")
+            relatorio.append("| Respostas | Prompts | Modelos | Exemplo |")
+            relatorio.append("|------:|------:|:-------|:-------|")
+            for grupo in grupos_compartilhados[:MAX_GRUPOS_RELATORIO]:
+                relatorio.append(
+                    f"| {grupo['respostas']} | {grupo['prompts']} | {', '.join(grupo['modelos'])} | {grupo['exemplo']} |"
+                )
+        relatorio.append("")
+
+        return "\n".join(relatorio)
+
+
+def detectar_duplicatas_completo(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict], List[Dict], str]:
+    """
+    Função principal para detectar respostas quase duplicadas.
+
+    Args:
+        df: DataFrame com dados das respostas (um ou mais modelos)
+
+    Returns:
+        Tuple com (grupo de cada resposta, métricas por modelo, grupos entre modelos, relatório)
+    """
+    detector = DetectorDuplicatas()
+
+    duplicatas = detector.detectar_duplicatas(df)
+    metricas_por_modelo = detector.calcular_metricas_por_modelo(duplicatas)
+    grupos_compartilhados = detector.grupos_entre_modelos(duplicatas)
+    relatorio = detector.gerar_relatorio_duplicatas(metricas_por_modelo, grupos_compartilhados)
+
+    return duplicatas, metricas_por_modelo, grupos_compartilhados, relatorio
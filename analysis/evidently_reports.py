@@ -1,17 +1,29 @@
 #!/usr/bin/env python3
 """
 Sistema de Relatórios Evidently AI
-Gera relatórios HTML e análises de qualidade textual por modelo.
+Calcula as métricas de qualidade textual por modelo a partir do snapshot avaliado;
+o HTML do relatório é um artefato opcional.
 Baseado na documentação oficial: https://docs.evidentlyai.com/
 """
 
 import pandas as pd
 import numpy as np
 import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 import json
 
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .invalid_responses import classificar_respostas
+except ImportError:
+    from invalid_responses import classificar_respostas
+
 try:
     from evidently import Report, Dataset, DataDefinition
     from evidently.metrics import *
@@ -22,11 +34,44 @@ except ImportError:
     EVIDENTLY_AVAILABLE = False
     print("⚠️ Evidently AI não disponível. Instale com: pip install evidently")
 
+# Arquivo com os valores das métricas dos relatórios (ao lado dos HTMLs opcionais)
+ARQUIVO_METRICAS = "evidently_metricas.json"
+
+
+def valores_metricas(snapshot) -> Dict[str, Any]:
+    """
+    Extrai os valores das métricas de um snapshot avaliado do Evidently AI.
+    
+    Args:
+        snapshot: Resultado de Report.run
+        
+    Returns:
+        Dicionário id da métrica -> valor (número ou dicionário, ex.: count/share)
+    """
+    valores = {}
+    for metrica in snapshot.dict().get('metrics', []):
+        nome = metrica.get('metric_id') or metrica.get('id')
+        if nome is not None:
+            valores[str(nome)] = metrica.get('value')
+    return valores
+
+
+def _formatar_valor(valor: Any) -> str:
+    """Valor de métrica em texto curto para as tabelas markdown."""
+    if isinstance(valor, dict):
+        return ", ".join(f"{chave}: {_formatar_valor(sub)}" for chave, sub in valor.items())
+    if isinstance(valor, (float, np.floating)):
+        return f"{valor:.0f}" if float(valor).is_integer() else f"{valor:.4f}"
+    return str(valor)
+
+
 class EvidentlyReporter:
     """Gerador de relatórios Evidently AI."""
     
-    def __init__(self):
+    def __init__(self, salvar_html: Optional[bool] = None):
         self.evidently_available = EVIDENTLY_AVAILABLE
+        # HTML é apenas um artefato para inspeção; as métricas vêm do snapshot em memória
+        self.salvar_html = get_config().EVIDENTLY_SALVAR_HTML if salvar_html is None else salvar_html
     
     def preparar_dados_evidently(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepara dados para análise Evidently AI."""
@@ -35,7 +80,9 @@ class EvidentlyReporter:
         # Adicionar colunas necessárias
         df_evidently['text_length'] = df_evidently['prediction'].astype(str).str.len()
         df_evidently['word_count'] = df_evidently['prediction'].astype(str).str.split().str.len()
-        df_evidently['is_valid'] = ~df_evidently['prediction'].apply(self._eh_resposta_invalida)
+        classificacao = classificar_respostas(df_evidently['prediction'])
+        df_evidently['is_valid'] = classificacao['is_valid']
+        df_evidently['invalid_reason'] = classificacao['invalid_reason']
         df_evidently['timestamp'] = pd.Timestamp.now()
         
         # Garantir que as colunas de texto sejam strings
@@ -45,32 +92,43 @@ class EvidentlyReporter:
         
         return df_evidently
     
-    def _eh_resposta_invalida(self, resposta: str) -> bool:
-        """Verifica se uma resposta é inválida."""
-        if not resposta or pd.isna(resposta):
-            return True
-        
-        resposta_str = str(resposta).strip().lower()
-        padroes_erro = [
-            'erro', 'error', 'timeout', 'rate limit', 'api key',
-            'authentication', 'connection', 'network', 'failed',
-            'exception', 'traceback', 'null', 'none', 'undefined'
-        ]
+    def _executar_relatorio(self, metricas: list, df: pd.DataFrame, pasta_destino: str,
+                            nome_arquivo: str) -> Dict[str, Any]:
+        """
+        Executa um relatório e retorna os valores das métricas do snapshot.
+        
+        Args:
+            metricas: Métricas e presets do relatório
+            df: DataFrame preparado
+            pasta_destino: Pasta do HTML opcional
+            nome_arquivo: Nome do HTML opcional
+            
+        Returns:
+            Dicionário com 'metricas' (id -> valor) e 'html' (caminho ou None)
+        """
+        # Criar Dataset com DataDefinition
+        data_definition = DataDefinition()
+        eval_data = Dataset.from_pandas(df, data_definition=data_definition)
+        
+        # Executar relatório
+        my_eval = Report(metricas).run(eval_data, None)
+        resultado = {'metricas': valores_metricas(my_eval), 'html': None}
+        
+        if self.salvar_html:
+            arquivo_relatorio = os.path.join(pasta_destino, nome_arquivo)
+            my_eval.save_html(arquivo_relatorio)
+            resultado['html'] = arquivo_relatorio
         
-        return any(padrao in resposta_str for padrao in padroes_erro)
+        return resultado
     
-    def gerar_relatorio_qualidade(self, df: pd.DataFrame, pasta_destino: str) -> Optional[str]:
+    def gerar_relatorio_qualidade(self, df: pd.DataFrame, pasta_destino: str) -> Optional[Dict[str, Any]]:
         """Gera relatório de qualidade de dados usando a API moderna do Evidently AI."""
         if not self.evidently_available:
             return None
         
         try:
-            # Criar Dataset com DataDefinition
-            data_definition = DataDefinition()
-            eval_data = Dataset.from_pandas(df, data_definition=data_definition)
-            
             # Criar relatório usando presets e métricas específicas
-            report = Report([
+            return self._executar_relatorio([
                 DataSummaryPreset(),
                 TextEvals(),
                 # Métricas para colunas numéricas
@@ -82,55 +140,41 @@ class EvidentlyReporter:
                 # Métricas para colunas específicas
                 ColumnMetricGenerator(MinValue, columns=['text_length', 'word_count']),
                 ColumnMetricGenerator(MaxValue, columns=['text_length', 'word_count']),
-            ])
-            
-            # Executar relatório
-            my_eval = report.run(eval_data, None)
-            
-            # Salvar relatório
-            arquivo_relatorio = os.path.join(pasta_destino, "evidently_qualidade.html")
-            my_eval.save_html(arquivo_relatorio)
-            
-            return arquivo_relatorio
+            ], df, pasta_destino, "evidently_qualidade.html")
             
         except Exception as e:
             print(f"❌ Erro ao gerar relatório de qualidade: {e}")
             return None
     
-    def gerar_relatorio_texto(self, df: pd.DataFrame, pasta_destino: str) -> Optional[str]:
+    def gerar_relatorio_texto(self, df: pd.DataFrame, pasta_destino: str) -> Optional[Dict[str, Any]]:
         """Gera relatório de análise de texto usando a API moderna do Evidently AI."""
         if not self.evidently_available:
             return None
         
         try:
-            # Criar Dataset com DataDefinition
-            data_definition = DataDefinition()
-            eval_data = Dataset.from_pandas(df, data_definition=data_definition)
-            
             # Criar relatório focado em análise de texto
-            report = Report([
+            return self._executar_relatorio([
                 TextEvals(),
                 # Métricas específicas para análise de texto
                 ColumnMetricGenerator(MinValue, columns=['text_length', 'word_count']),
                 ColumnMetricGenerator(MaxValue, columns=['text_length', 'word_count']),
                 ColumnMetricGenerator(MeanValue, columns=['text_length', 'word_count']),
-            ])
-            
-            # Executar relatório
-            my_eval = report.run(eval_data, None)
-            
-            # Salvar relatório
-            arquivo_relatorio = os.path.join(pasta_destino, "evidently_texto.html")
-            my_eval.save_html(arquivo_relatorio)
-            
-            return arquivo_relatorio
+            ], df, pasta_destino, "evidently_texto.html")
             
         except Exception as e:
             print(f"❌ Erro ao gerar relatório de texto: {e}")
             return None
     
-    def gerar_relatorios_evidently(self, df: pd.DataFrame, pasta_destino: str) -> Dict[str, str]:
-        """Gera todos os relatórios Evidently AI."""
+    def gerar_relatorios_evidently(self, df: pd.DataFrame, pasta_destino: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Gera todos os relatórios Evidently AI.
+        
+        Os valores das métricas de cada relatório são salvos em evidently_metricas.json;
+        os HTMLs só são gravados com EVIDENTLY_SALVAR_HTML.
+        
+        Returns:
+            Dicionário relatório ('qualidade', 'texto') -> {'metricas', 'html'}
+        """
         print(f"📊 Gerando relatórios Evidently AI para {len(df)} registros...")
         
         # Preparar dados
@@ -151,30 +195,51 @@ class EvidentlyReporter:
         if relatorio_texto:
             relatorios['texto'] = relatorio_texto
         
+        if relatorios:
+            with open(os.path.join(pasta_destino, ARQUIVO_METRICAS), 'w', encoding='utf-8') as f:
+                json.dump({nome: relatorio['metricas'] for nome, relatorio in relatorios.items()},
+                          f, indent=2, ensure_ascii=False, default=str)
+        
         return relatorios
     
-    def gerar_relatorio_consolidado(self, relatorios: Dict[str, str]) -> str:
-        """Gera relatório consolidado em markdown."""
+    def gerar_relatorio_consolidado(self, relatorios: Dict[str, Dict[str, Any]]) -> str:
+        """Gera relatório consolidado em markdown a partir dos valores das métricas."""
         relatorio = []
         relatorio.append("## 📊 Análise Evidently AI")
         relatorio.append("")
         
-        if relatorios.get('qualidade'):
-            relatorio.append(f"- **Relatório de Qualidade**: [evidently_qualidade.html]({relatorios['qualidade']})")
-        
-        if relatorios.get('texto'):
-            relatorio.append(f"- **Relatório de Texto**: [evidently_texto.html]({relatorios['texto']})")
+        if not relatorios:
+            relatorio.append("Nenhum relatório Evidently AI gerado nesta análise.")
+            return "\n".join(relatorio)
         
-        relatorio.append("")
-        relatorio.append("### 📈 Métricas Calculadas")
-        relatorio.append("- **Qualidade de Dados**: Valores ausentes, distribuições, correlações")
-        relatorio.append("- **Análise de Texto**: Comprimento, qualidade, descritores textuais")
-        relatorio.append("- **Distribuições**: Análise estatística das respostas")
-        relatorio.append("- **Validação**: Detecção de respostas inválidas")
+        secoes = [
+            ('qualidade', "### 📊 Análise de Qualidade dos Dados", "Relatório de Qualidade"),
+            ('texto', "### 📝 Análise de Texto", "Relatório de Texto"),
+        ]
+        for chave, titulo, rotulo_html in secoes:
+            resultado = relatorios.get(chave)
+            if not resultado:
+                continue
+            
+            relatorio.append(titulo)
+            relatorio.append("")
+            if resultado.get('html'):
+                relatorio.append(f"- **{rotulo_html}**: [{os.path.basename(resultado['html'])}]({resultado['html']})")
+                relatorio.append("")
+            
+            if not resultado['metricas']:
+                relatorio.append("Nenhuma métrica retornada pelo relatório.")
+            else:
+                relatorio.append("| Métrica | Valor |")
+                relatorio.append("|:-------|------:|")
+                for metrica, valor in resultado['metricas'].items():
+                    nome = metrica.replace('|', '\\|')
+                    relatorio.append(f"| {nome} | {_formatar_valor(valor)} |")
+            relatorio.append("")
         
         return "\n".join(relatorio)
 
-def gerar_relatorios_evidently_completo(df: pd.DataFrame, pasta_destino: str) -> Tuple[Dict[str, str], str]:
+def gerar_relatorios_evidently_completo(df: pd.DataFrame, pasta_destino: str) -> Tuple[Dict[str, Dict[str, Any]], str]:
     """Função principal para gerar relatórios Evidently AI completos."""
     reporter = EvidentlyReporter()
     
@@ -19,46 +19,6 @@ class HellaSwagBenchmark(BaseBenchmark):
     def __init__(self):
         super().__init__("hellaswag")
     
-    def calculate_metrics(self, predictions: List[str], references: List[str]) -> Dict[str, Any]:
-        """
-        Calcula métricas HellaSwag.
-        
-        Args:
-            predictions: Lista de predições do modelo
-            references: Lista de respostas de referência
-            
-        Returns:
-            Dicionário com métricas HellaSwag
-        """
-        if not predictions or not references:
-            return {
-                "accuracy": 0.0,
-                "total_questions": 0,
-                "correct_answers": 0
-            }
-        
-        # Accuracy global (inclui inv?lidas como erro)
-        accuracy = self.calculate_accuracy(predictions, references)
-        correct_answers = sum(1 for p, r in zip(predictions, references)
-                             if self.validate_prediction(p, r))
-
-        # Accuracy apenas em respostas v?lidas + cobertura
-        valid_pairs = [(p, r) for p, r in zip(predictions, references) if not self.is_invalid_prediction(p)]
-        valid_answers = len(valid_pairs)
-        correct_valid_answers = sum(1 for p, r in valid_pairs if self.validate_prediction(p, r))
-        accuracy_valid_only = (correct_valid_answers / valid_answers) if valid_answers > 0 else 0.0
-        coverage = (valid_answers / len(predictions)) if len(predictions) > 0 else 0.0
-        
-        return {
-            "accuracy": accuracy,
-            "accuracy_valid_only": accuracy_valid_only,
-            "coverage": coverage,
-            "total_questions": len(predictions),
-            "valid_answers": valid_answers,
-            "correct_answers": correct_answers,
-            "correct_valid_answers": correct_valid_answers
-        }
-    
     def format_prompt(self, question_data: Dict[str, Any]) -> str:
         """
         Formata prompt para HellaSwag.
@@ -72,60 +32,6 @@ class HellaSwagBenchmark(BaseBenchmark):
         choices = "\n".join([f"{choice}" for choice in question_data['choices']])
         return f"Context: {question_data['context']}\n\nQuestion: {question_data['question']}\n\nChoices:\n{choices}\n\nInstructions: Choose the correct answer and respond with ONLY the letter (A, B, C, or D). Do not provide any explanation or additional text.\n\nAnswer:"
     
-    def validate_prediction(self, prediction: str, reference: str) -> bool:
-        """
-        Valida se a predição HellaSwag está correta.
-        
-        Args:
-            prediction: Predição do modelo
-            reference: Resposta de referência (A, B, C, D)
-            
-        Returns:
-            True se a predição está correta, False caso contrário
-        """
-        if not prediction or not reference:
-            return False
-        
-        # Normalizar strings para comparação
-        pred_clean = prediction.strip().upper()
-        ref_clean = reference.strip().upper()
-        
-        # Para HellaSwag, verificar se a predição contém a resposta correta
-        # ou se é exatamente igual
-        if pred_clean == ref_clean:
-            return True
-        
-        # Verificar se a predição contém a letra da resposta correta
-        # mas apenas se for uma resposta de múltipla escolha válida
-        if ref_clean in ['A', 'B', 'C', 'D']:
-            # Padrões mais específicos para capturar respostas corretas
-            patterns = [
-                f"{ref_clean})",  # A), B), C), D)
-                f"ANSWER IS {ref_clean}",  # ANSWER IS A
-                f"RESPOSTA É {ref_clean}",  # RESPOSTA É A
-                f"THE ANSWER IS {ref_clean}",  # THE ANSWER IS A
-                f"ANSWER: {ref_clean}",  # ANSWER: A
-                f"RESPOSTA: {ref_clean}",  # RESPOSTA: A
-                f"THE ANSWER: {ref_clean}",  # THE ANSWER: A
-                f"CHOICE {ref_clean}",  # CHOICE A
-                f"OPÇÃO {ref_clean}",  # OPÇÃO A
-                f"OPTION {ref_clean}",  # OPTION A
-            ]
-            
-            for pattern in patterns:
-                if pattern in pred_clean:
-                    return True
-            
-            # Verificar se a predição começa com a letra correta seguida de parênteses
-            if pred_clean.startswith(f"{ref_clean})"):
-                return True
-            
-            # Verificar se a predição é apenas a letra (caso mais simples)
-            if pred_clean == ref_clean:
-                return True
-        
-        return False
-    
     def get_description(self) -> str:
         """
         Retorna descrição do benchmark HellaSwag.
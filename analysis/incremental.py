@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Análise incremental das execuções.
+Um manifesto em PASTA_CACHE guarda, por execução, o hash do arquivo de resultados,
+o número de linhas, o snapshot da configuração das métricas e os agregados
+parciais de cada modelo (contagens, somas e somas de quadrados dos desvios das
+métricas, contagens dos benchmarks). Uma nova análise só carrega e pontua as
+execuções novas ou alteradas; as métricas por modelo saem da combinação dos
+agregados guardados, sem reler as execuções já analisadas.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .benchmarks import BaseBenchmark
+    from .bleu_rouge import (COLUNAS_ESTATISTICAS_LEXICAS, VERSAO_ESTATISTICAS_LEXICAS,
+                             bleu_de_estatisticas, rouge_de_estatisticas)
+    from .invalid_responses import classificar_respostas, mascara_respostas_validas
+except ImportError:
+    from benchmarks import BaseBenchmark
+    from bleu_rouge import (COLUNAS_ESTATISTICAS_LEXICAS, VERSAO_ESTATISTICAS_LEXICAS,
+                            bleu_de_estatisticas, rouge_de_estatisticas)
+    from invalid_responses import classificar_respostas, mascara_respostas_validas
+
+ARQUIVO_MANIFESTO = "manifesto_execucoes.json"
+
+# Versão do formato dos agregados parciais (incrementar ao mudar o que é guardado)
+VERSAO_AGREGADOS = 1
+
+# Coluna da métrica por resposta -> prefixo das chaves '<prefixo>_medio' / '<prefixo>_std'
+PREFIXOS_METRICAS = {
+    'bleu_score': 'bleu',
+    'rouge1_score': 'rouge1',
+    'rouge2_score': 'rouge2',
+    'rougeL_score': 'rougeL',
+    'bertscore_f1': 'bertscore_f1',
+    'semantic_similarity': 'semantic_similarity',
+}
+
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """
+    SHA-1 do conteúdo de um arquivo, lido em blocos.
+
+    Args:
+        caminho: Caminho do arquivo
+        tamanho_bloco: Bytes lidos por vez
+
+    Returns:
+        Hash hexadecimal do conteúdo
+    """
+    sha1 = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha1.update(bloco)
+    return sha1.hexdigest()
+
+
+def snapshot_configuracao() -> Dict[str, Any]:
+    """
+    Configuração que afeta os agregados guardados no manifesto.
+
+    Execuções analisadas com um snapshot diferente do atual são analisadas de novo.
+
+    Returns:
+        Dicionário com as métricas semânticas habilitadas e as versões de cada métrica
+    """
+    try:
+        from .bertscore import BertScoreCalculator
+        from .semantic_similarity import VERSAO_SIMILARIDADE
+    except ImportError:
+        from bertscore import BertScoreCalculator
+        from semantic_similarity import VERSAO_SIMILARIDADE
+
+    config = get_config()
+    return {
+        'agregados': VERSAO_AGREGADOS,
+        'metricas_semanticas': list(config.METRICAS_SEMANTICAS),
+        'bertscore': BertScoreCalculator()._versao_metrica(),
+        'estatisticas_lexicas': VERSAO_ESTATISTICAS_LEXICAS,
+        'semantic_similarity': {'model': config.get_semantic_similarity_params()['model'],
+                                'versao': VERSAO_SIMILARIDADE},
+    }
+
+
+def _momentos(valores: pd.Series) -> List[float]:
+    """[contagem, soma, soma dos quadrados dos desvios] dos valores não nulos."""
+    valores = valores.dropna().to_numpy(dtype=np.float64)
+    if len(valores) == 0:
+        return [0, 0.0, 0.0]
+    soma = float(valores.sum())
+    return [int(len(valores)), soma, float(((valores - soma / len(valores)) ** 2).sum())]
+
+
+def _combinar_momentos(a: List[float], b: List[float]) -> List[float]:
+    """Combina momentos de dois subconjuntos (fórmula de Chan et al. para a variância)."""
+    n_a, soma_a, m2_a = a
+    n_b, soma_b, m2_b = b
+    if n_a == 0:
+        return list(b)
+    if n_b == 0:
+        return list(a)
+    n = n_a + n_b
+    delta = soma_b / n_b - soma_a / n_a
+    return [n, soma_a + soma_b, m2_a + m2_b + delta * delta * n_a * n_b / n]
+
+
+def _media_std(momentos: List[float]) -> tuple:
+    """Média e desvio padrão amostral (ddof=1, como no pandas) a partir dos momentos."""
+    n, soma, m2 = momentos
+    if n == 0:
+        return np.nan, np.nan
+    return soma / n, (np.sqrt(m2 / (n - 1)) if n > 1 else np.nan)
+
+
+def _somar_contagens(a: Dict[str, int], b: Dict[str, int]) -> Dict[str, int]:
+    """Soma dois dicionários de contagens."""
+    return {chave: a.get(chave, 0) + b.get(chave, 0) for chave in list(a) + [c for c in b if c not in a]}
+
+
+def agregados_parciais(df: pd.DataFrame, contagens_benchmarks: Dict[str, Dict]) -> Dict[str, Any]:
+    """
+    Agregados parciais de um modelo em uma execução.
+
+    Guardam o suficiente para reproduzir as métricas acadêmicas, Evidently e de
+    benchmarks do modelo somando várias execuções.
+
+    Args:
+        df: DataFrame do modelo com as métricas por resposta (saída de calcular_metricas_academicas)
+        contagens_benchmarks: Contagens por benchmark (AnalysisSystem.contar_respostas_benchmarks)
+
+    Returns:
+        Dicionário serializável em JSON
+    """
+    classificacao = classificar_respostas(df['prediction'])
+    validas = mascara_respostas_validas(df)
+    textual = ~df['is_benchmark_prompt'].astype(bool)
+    df_textual_validas = df[textual & validas]
+
+    if 'response_length' in df.columns:
+        comprimento = df['response_length']
+    else:
+        comprimento = df['prediction'].astype(str).str.len()
+    if 'word_count' in df.columns:
+        palavras = df['word_count']
+    else:
+        palavras = df['prediction'].astype(str).str.split().str.len()
+
+    motivos = classificacao['invalid_reason'].value_counts()
+    return {
+        'total': int(len(df)),
+        'validas': int(validas.sum()),
+        'textuais': int(textual.sum()),
+        'textuais_validas': int(len(df_textual_validas)),
+        'metricas': {
+            col: _momentos(df_textual_validas[col])
+            for col in PREFIXOS_METRICAS if col in df.columns
+        },
+        'estatisticas_lexicas': {
+            col: int(df[col].sum())
+            for col in COLUNAS_ESTATISTICAS_LEXICAS if col in df.columns
+        },
+        'comprimento': _momentos(comprimento[validas]),
+        'palavras': _momentos(palavras[validas]),
+        'motivos_invalidez': {motivo: int(qtd) for motivo, qtd in motivos.items() if qtd > 0},
+        'benchmarks': contagens_benchmarks,
+    }
+
+
+def combinar_agregados(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combina os agregados parciais de um modelo em duas execuções (ou grupos de execuções).
+
+    Args:
+        a: Agregados de agregados_parciais (ou de uma combinação anterior)
+        b: Agregados a somar
+
+    Returns:
+        Agregados combinados
+    """
+    benchmarks = dict(a['benchmarks'])
+    for nome, contagens in b['benchmarks'].items():
+        benchmarks[nome] = BaseBenchmark.merge_counts(benchmarks.get(nome, {}), contagens)
+
+    metricas = dict(a['metricas'])
+    for col, momentos in b['metricas'].items():
+        metricas[col] = _combinar_momentos(metricas.get(col, [0, 0.0, 0.0]), momentos)
+
+    return {
+        'total': a['total'] + b['total'],
+        'validas': a['validas'] + b['validas'],
+        'textuais': a['textuais'] + b['textuais'],
+        'textuais_validas': a['textuais_validas'] + b['textuais_validas'],
+        'metricas': metricas,
+        'estatisticas_lexicas': _somar_contagens(a['estatisticas_lexicas'], b['estatisticas_lexicas']),
+        'comprimento': _combinar_momentos(a['comprimento'], b['comprimento']),
+        'palavras': _combinar_momentos(a['palavras'], b['palavras']),
+        'motivos_invalidez': _somar_contagens(a['motivos_invalidez'], b['motivos_invalidez']),
+        'benchmarks': benchmarks,
+    }
+
+
+def metricas_de_agregados(agregados: Dict[str, Any], benchmarks: Dict[str, BaseBenchmark]) -> Dict[str, Dict]:
+    """
+    Converte os agregados combinados de um modelo nas métricas da análise completa.
+
+    O formato é o de metricas_consolidadas.json: 'academicas' (vazio para modelos com
+    mais de 40% de respostas inválidas), 'evidently' e 'benchmarks'.
+
+    Args:
+        agregados: Agregados combinados do modelo
+        benchmarks: Calculadoras de benchmark por nome (AnalysisSystem.benchmarks)
+
+    Returns:
+        Dicionário com as métricas do modelo
+    """
+    total, validas = agregados['total'], agregados['validas']
+
+    # Métricas acadêmicas (prompts textuais), com os mesmos casos especiais da análise completa
+    academicas = {}
+    taxa_erro = 1.0 - validas / total if total else 1.0
+    if agregados['textuais'] > 0 and taxa_erro <= 0.4:
+        if agregados['textuais_validas'] == 0:
+            academicas = {
+                'bleu_medio': 0.0, 'rouge1_medio': 0.0, 'rouge2_medio': 0.0, 'rougeL_medio': 0.0,
+                'bertscore_f1_medio': 0.0, 'total_respostas': agregados['textuais'],
+                'respostas_validas': 0, 'taxa_validas': 0.0
+            }
+        else:
+            medias, desvios = {}, {}
+            for col, prefixo in PREFIXOS_METRICAS.items():
+                if col in agregados['metricas']:
+                    medias[prefixo], desvios[prefixo] = _media_std(agregados['metricas'][col])
+            for prefixo in ['bleu', 'rouge1', 'rouge2', 'rougeL', 'bertscore_f1']:
+                academicas[f'{prefixo}_medio'] = medias.get(prefixo, np.nan)
+            for prefixo in ['bleu', 'rouge1', 'rouge2', 'rougeL', 'bertscore_f1']:
+                academicas[f'{prefixo}_std'] = desvios.get(prefixo, np.nan)
+            academicas['total_respostas'] = agregados['textuais']
+            academicas['respostas_validas'] = agregados['textuais_validas']
+            academicas['taxa_validas'] = agregados['textuais_validas'] / agregados['textuais']
+            if 'semantic_similarity' in medias:
+                academicas['semantic_similarity_medio'] = medias['semantic_similarity']
+                academicas['semantic_similarity_std'] = desvios['semantic_similarity']
+            if set(COLUNAS_ESTATISTICAS_LEXICAS).issubset(agregados['estatisticas_lexicas']):
+                somas = pd.DataFrame([agregados['estatisticas_lexicas']])[COLUNAS_ESTATISTICAS_LEXICAS]
+                rouge = rouge_de_estatisticas(somas)
+                academicas['bleu_corpus'] = float(bleu_de_estatisticas(somas)[0])
+                academicas['rouge1_micro'] = float(rouge[0, 0])
+                academicas['rouge2_micro'] = float(rouge[0, 1])
+                academicas['rougeL_micro'] = float(rouge[0, 2])
+
+    # Métricas Evidently (todas as respostas)
+    comprimento_medio, comprimento_std = _media_std(agregados['comprimento'])
+    palavras_medias, palavras_std = _media_std(agregados['palavras'])
+    sem_validas = agregados['comprimento'][0] == 0
+    evidently = {
+        'total_respostas': total,
+        'respostas_validas': validas,
+        'taxa_validas': validas / total if total > 0 else 0,
+        'comprimento_medio': 0 if sem_validas else comprimento_medio,
+        'comprimento_std': 0 if sem_validas else comprimento_std,
+        'palavras_medias': 0 if sem_validas else palavras_medias,
+        'palavras_std': 0 if sem_validas else palavras_std,
+        'motivos_invalidez': dict(sorted(agregados['motivos_invalidez'].items(), key=lambda item: -item[1]))
+    }
+
+    return {
+        'academicas': academicas,
+        'evidently': evidently,
+        'benchmarks': {
+            nome: benchmarks[nome].calculate_metrics_from_counts(contagens)
+            for nome, contagens in agregados['benchmarks'].items() if nome in benchmarks
+        }
+    }
+
+
+class ManifestoExecucoes:
+    """
+    Manifesto (JSON) das execuções já analisadas e dos seus agregados parciais.
+
+    Cada execução é registrada pelo nome da pasta com o hash do arquivo de
+    resultados, o número de linhas, o snapshot da configuração e os agregados de
+    cada modelo.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.execucoes: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(caminho):
+            try:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    self.execucoes = json.load(f).get('execucoes', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Manifesto {caminho} ilegível ({e}); todas as execuções serão analisadas")
+
+    def precisa_analisar(self, nome: str, hash_resultados: str, snapshot: Dict[str, Any]) -> bool:
+        """
+        Verifica se uma execução é nova ou mudou desde o registro no manifesto.
+
+        Args:
+            nome: Nome da execução
+            hash_resultados: Hash atual do arquivo de resultados
+            snapshot: Snapshot atual da configuração
+
+        Returns:
+            True se a execução precisa ser (re)analisada
+        """
+        registro = self.execucoes.get(nome)
+        return (registro is None or registro['hash'] != hash_resultados
+                or registro['configuracao'] != snapshot)
+
+    def registrar(self, nome: str, hash_resultados: str, linhas: int, snapshot: Dict[str, Any],
+                  agregados_por_modelo: Dict[str, Dict]) -> None:
+        """
+        Registra (ou substitui) uma execução analisada.
+
+        Args:
+            nome: Nome da execução
+            hash_resultados: Hash do arquivo de resultados
+            linhas: Linhas do arquivo de resultados
+            snapshot: Snapshot da configuração usada
+            agregados_por_modelo: Agregados parciais de cada modelo da execução
+        """
+        self.execucoes[nome] = {
+            'hash': hash_resultados,
+            'linhas': int(linhas),
+            'analisada_em': datetime.now().isoformat(timespec='seconds'),
+            'configuracao': snapshot,
+            'modelos': agregados_por_modelo,
+        }
+
+    def remover(self, nome: str) -> None:
+        """
+        Remove uma execução do manifesto (ela volta a ser analisada na próxima vez).
+
+        Args:
+            nome: Nome da execução
+        """
+        self.execucoes.pop(nome, None)
+
+    def manter_apenas(self, nomes: List[str]) -> List[str]:
+        """
+        Remove do manifesto as execuções que não existem mais.
+
+        Args:
+            nomes: Execuções presentes na pasta de resultados
+
+        Returns:
+            Nomes das execuções removidas
+        """
+        removidas = [nome for nome in self.execucoes if nome not in nomes]
+        for nome in removidas:
+            del self.execucoes[nome]
+        return removidas
+
+    def agregados_por_modelo(self) -> Dict[str, Dict]:
+        """
+        Combina os agregados de todas as execuções registradas (em ordem de nome).
+
+        Returns:
+            Dicionário modelo -> agregados combinados
+        """
+        combinados: Dict[str, Dict] = {}
+        for nome in sorted(self.execucoes):
+            for modelo, agregados in self.execucoes[nome]['modelos'].items():
+                combinados[modelo] = (combinar_agregados(combinados[modelo], agregados)
+                                      if modelo in combinados else agregados)
+        return combinados
+
+    def salvar(self) -> None:
+        """Grava o manifesto (arquivo temporário + rename)."""
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = self.caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_AGREGADOS, 'execucoes': self.execucoes}, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+
+def obter_manifesto() -> ManifestoExecucoes:
+    """Abre o manifesto de execuções em PASTA_CACHE."""
+    return ManifestoExecucoes(os.path.join(get_config().PASTA_CACHE, ARQUIVO_MANIFESTO))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Detector unificado de respostas inválidas.
+Classifica uma série inteira de predições em uma única passada vetorizada e é
+compartilhado por todos os módulos de análise (BLEU/ROUGE, BERTScore, Evidently, benchmarks).
+"""
+
+import re
+from typing import Optional
+
+import pandas as pd
+
+
+# Motivos de invalidez (categorias da coluna 'invalid_reason')
+MOTIVO_VAZIA = "vazia"
+MOTIVO_ERRO_PIPELINE = "erro_pipeline"
+MOTIVO_ERRO_API = "erro_api"
+MOTIVO_TRACEBACK = "traceback"
+MOTIVO_PLACEHOLDER = "placeholder"
+
+MOTIVOS_INVALIDEZ = [
+    MOTIVO_VAZIA,
+    MOTIVO_ERRO_PIPELINE,
+    MOTIVO_ERRO_API,
+    MOTIVO_TRACEBACK,
+    MOTIVO_PLACEHOLDER,
+]
+
+# Uma única alternação compilada. Os padrões são ancorados no início da resposta:
+# mensagens de erro da pipeline/APIs sempre começam com o marcador, enquanto respostas
+# válidas que apenas mencionam "none", "network" ou "error" no meio do texto não são afetadas.
+_PADRAO_INVALIDO = re.compile(
+    r"^\s*(?:"
+    r"(?P<erro_pipeline>\[ERRO\])"
+    r"|(?P<traceback>Traceback \(most recent call last\))"
+    r"|(?P<erro_api>(?:error|erro|exception)\s*[:\[])"
+    r"|(?P<placeholder>(?:none|null|nan|undefined)\s*$)"
+    r")",
+    re.IGNORECASE
+)
+
+
+def classificar_respostas(predictions: pd.Series) -> pd.DataFrame:
+    """
+    Classifica todas as predições de uma série em uma única passada vetorizada.
+
+    Args:
+        predictions: Série com as predições dos modelos
+
+    Returns:
+        DataFrame (mesmo índice) com colunas 'is_valid' (bool) e
+        'invalid_reason' (categórica; NaN para respostas válidas)
+    """
+    textos = predictions.astype(object).where(predictions.notna(), "").astype(str)
+
+    grupos = textos.str.extract(_PADRAO_INVALIDO)
+    encontrados = grupos.notna()
+    motivo = encontrados.idxmax(axis=1).where(encontrados.any(axis=1))
+    motivo = motivo.mask(textos.str.strip() == "", MOTIVO_VAZIA)
+
+    return pd.DataFrame({
+        'is_valid': motivo.isna(),
+        'invalid_reason': pd.Categorical(motivo, categories=MOTIVOS_INVALIDEZ)
+    }, index=predictions.index)
+
+
+def mascara_respostas_validas(df: pd.DataFrame, classificacao: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    Retorna máscara booleana de respostas válidas de um DataFrame de resultados.
+
+    Combina o detector de padrões com a flag 'is_error' da coleta, quando disponível.
+
+    Args:
+        df: DataFrame com a coluna 'prediction' (e opcionalmente 'is_error')
+        classificacao: Resultado de classificar_respostas já calculado para df (evita
+            classificar as respostas de novo)
+
+    Returns:
+        Série booleana com True para respostas válidas
+    """
+    if classificacao is not None:
+        validas = classificacao['is_valid']
+    elif 'is_valid' in df.columns and 'invalid_reason' in df.columns:
+        validas = df['is_valid'].astype(bool)
+    else:
+        validas = classificar_respostas(df['prediction'])['is_valid']
+
+    if 'is_error' in df.columns:
+        validas = validas & ~df['is_error'].fillna(False).astype(bool)
+    return validas
+
+
+def eh_resposta_invalida(resposta: Optional[str]) -> bool:
+    """
+    Verifica se uma única resposta é inválida (erro de API, vazia, etc.).
+
+    Args:
+        resposta: Resposta do modelo
+
+    Returns:
+        True se a resposta é inválida
+    """
+    return not bool(classificar_respostas(pd.Series([resposta], dtype=object))['is_valid'].iloc[0])
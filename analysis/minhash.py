@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Assinaturas MinHash vetorizadas com NumPy.
+Cada texto vira o conjunto dos seus shingles (n-gramas de palavras) e cada shingle
+um hash de 32 bits; a assinatura guarda, para cada permutação, o menor hash do
+conjunto. A fração de posições iguais entre duas assinaturas estima o índice de
+Jaccard entre os conjuntos, sem comparar os textos diretamente.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+# Palavras em minúsculas (\w cobre letras acentuadas do português)
+_PALAVRA = re.compile(r"\w+")
+
+# Valor da assinatura de um texto sem shingles (conjunto vazio)
+HASH_VAZIO = np.iinfo(np.uint32).max
+
+# Multiplicador usado para combinar os hashes das palavras de um shingle
+_MULTIPLICADOR_SHINGLE = np.uint64(0x9E3779B97F4A7C15)
+
+# Limite de elementos (shingles x permutações) da matriz intermediária por bloco
+MAX_ELEMENTOS_BLOCO = 8_000_000
+
+
+class GeradorMinHash:
+    """
+    Gera assinaturas MinHash de textos.
+
+    As permutações são funções multiply-add-shift (a * x + b) >> 32 em aritmética
+    de 64 bits com estouro, com a ímpar; a mesma semente gera as mesmas assinaturas
+    em qualquer processo.
+    """
+
+    def __init__(self, num_permutacoes: int = 128, tamanho_shingle: int = 1, semente: int = 42):
+        """
+        Args:
+            num_permutacoes: Tamanho da assinatura
+            tamanho_shingle: Palavras por shingle (1 = conjunto de tokens)
+            semente: Semente das permutações
+        """
+        self.num_permutacoes = num_permutacoes
+        self.tamanho_shingle = tamanho_shingle
+        rng = np.random.default_rng(semente)
+        self._a = rng.integers(0, 2**63, size=num_permutacoes, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_permutacoes, dtype=np.uint64)
+        self._hash_palavras: Dict[str, int] = {}
+
+    def _hashes_palavras(self, texto: str) -> np.ndarray:
+        """Hash de 32 bits (CRC32, estável entre processos) de cada palavra do texto."""
+        cache = self._hash_palavras
+        hashes = []
+        for palavra in _PALAVRA.findall(texto.lower()):
+            valor = cache.get(palavra)
+            if valor is None:
+                valor = cache[palavra] = zlib.crc32(palavra.encode("utf-8"))
+            hashes.append(valor)
+        return np.asarray(hashes, dtype=np.uint64)
+
+    def shingles(self, texto: str) -> np.ndarray:
+        """
+        Hashes distintos dos shingles de um texto.
+
+        Textos com menos palavras que o tamanho do shingle viram um único shingle.
+
+        Args:
+            texto: Texto de entrada
+
+        Returns:
+            Vetor uint64 (valores de 32 bits) ordenado e sem repetições
+        """
+        palavras = self._hashes_palavras(texto)
+        k = min(self.tamanho_shingle, len(palavras))
+        if k <= 1:
+            return np.unique(palavras)
+
+        # Combina as k palavras de cada janela: h = h * M + palavra (com estouro)
+        hashes = palavras[:len(palavras) - k + 1].copy()
+        for deslocamento in range(1, k):
+            hashes = hashes * _MULTIPLICADOR_SHINGLE + palavras[deslocamento:len(palavras) - k + 1 + deslocamento]
+        return np.unique((hashes >> np.uint64(32)) ^ (hashes & np.uint64(0xFFFFFFFF)))
+
+    def assinaturas(self, textos: Sequence[str]) -> np.ndarray:
+        """
+        Assinaturas MinHash de vários textos.
+
+        Os shingles de todos os textos são concatenados e as permutações aplicadas
+        em blocos de textos (limitados por MAX_ELEMENTOS_BLOCO); o mínimo de cada
+        texto sai de um único np.minimum.reduceat por bloco.
+
+        Args:
+            textos: Textos de entrada
+
+        Returns:
+            Matriz (textos x permutações) uint32; textos sem palavras ficam com HASH_VAZIO
+        """
+        conjuntos = [self.shingles(str(texto)) for texto in textos]
+        resultado = np.full((len(conjuntos), self.num_permutacoes), HASH_VAZIO, dtype=np.uint32)
+        if not conjuntos:
+            return resultado
+
+        comprimentos = np.fromiter((len(c) for c in conjuntos), dtype=np.int64, count=len(conjuntos))
+        max_shingles = max(1, MAX_ELEMENTOS_BLOCO // self.num_permutacoes)
+
+        acumulado = np.cumsum(comprimentos)
+        inicio = 0
+        while inicio < len(conjuntos):
+            # Bloco de textos cujo total de shingles cabe no limite (ao menos um texto)
+            base = acumulado[inicio - 1] if inicio else 0
+            fim = max(inicio + 1, int(np.searchsorted(acumulado, base + max_shingles, side='right')))
+            self._preencher_bloco(conjuntos[inicio:fim], comprimentos[inicio:fim], resultado[inicio:fim])
+            inicio = fim
+
+        return resultado
+
+    def _preencher_bloco(self, conjuntos: List[np.ndarray], comprimentos: np.ndarray,
+                         destino: np.ndarray) -> None:
+        """Calcula as assinaturas de um bloco de textos direto na matriz de destino."""
+        nao_vazios = comprimentos > 0
+        if not nao_vazios.any():
+            return
+
+        valores = np.concatenate([c for c in conjuntos if len(c)])
+        permutados = ((valores[:, None] * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+        inicios = np.concatenate(([0], np.cumsum(comprimentos[nao_vazios])[:-1]))
+        destino[nao_vazios] = np.minimum.reduceat(permutados, inicios, axis=0)
+
+
+def jaccard_estimado(assinaturas_a: np.ndarray, assinaturas_b: np.ndarray) -> np.ndarray:
+    """
+    Jaccard estimado entre pares de assinaturas alinhadas (linha a linha).
+
+    Args:
+        assinaturas_a: Matriz (pares x permutações)
+        assinaturas_b: Matriz (pares x permutações)
+
+    Returns:
+        Vetor com a fração de permutações em que as assinaturas coincidem
+    """
+    return (assinaturas_a == assinaturas_b).mean(axis=1)
@@ -4,12 +4,51 @@ Calculadora de métricas MMLU (Massive Multitask Language Understanding).
 """
 
 from typing import Dict, List, Any
+import pandas as pd
 
 # Import compatível com execução direta e via import
 try:
-    from .benchmarks import BaseBenchmark
+    from .benchmarks import BaseBenchmark, COUNT_COLUMNS
 except ImportError:
-    from benchmarks import BaseBenchmark
+    from benchmarks import BaseBenchmark, COUNT_COLUMNS
+
+
+# Categorias oficiais do MMLU (Hendrycks et al.) para os 57 subjects.
+MMLU_CATEGORIES = {
+    "STEM": [
+        "abstract_algebra", "astronomy", "college_biology", "college_chemistry",
+        "college_computer_science", "college_mathematics", "college_physics",
+        "computer_security", "conceptual_physics", "electrical_engineering",
+        "elementary_mathematics", "high_school_biology", "high_school_chemistry",
+        "high_school_computer_science", "high_school_mathematics", "high_school_physics",
+        "high_school_statistics", "machine_learning"
+    ],
+    "humanities": [
+        "formal_logic", "high_school_european_history", "high_school_us_history",
+        "high_school_world_history", "international_law", "jurisprudence",
+        "logical_fallacies", "moral_disputes", "moral_scenarios", "philosophy",
+        "prehistory", "professional_law", "world_religions"
+    ],
+    "social_sciences": [
+        "econometrics", "high_school_geography", "high_school_government_and_politics",
+        "high_school_macroeconomics", "high_school_microeconomics", "high_school_psychology",
+        "human_sexuality", "professional_psychology", "public_relations",
+        "security_studies", "sociology", "us_foreign_policy"
+    ],
+    "other": [
+        "anatomy", "business_ethics", "clinical_knowledge", "college_medicine",
+        "global_facts", "human_aging", "management", "marketing", "medical_genetics",
+        "miscellaneous", "nutrition", "professional_accounting", "professional_medicine",
+        "virology"
+    ]
+}
+
+# Mapeamento inverso subject -> categoria
+MMLU_SUBJECT_TO_CATEGORY = {
+    subject: category
+    for category, subjects in MMLU_CATEGORIES.items()
+    for subject in subjects
+}
 
 
 class MMLUBenchmark(BaseBenchmark):
@@ -19,127 +58,91 @@ class MMLUBenchmark(BaseBenchmark):
     
     def __init__(self):
         super().__init__("mmlu")
-        self.subjects = []
     
-    def calculate_metrics(self, predictions: List[str], references: List[str]) -> Dict[str, Any]:
+    def count_answers_from_frame(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
-        Calcula métricas MMLU.
+        Conta questões, respostas válidas e corretas no total e por subject.
+        
+        As contagens por subject são obtidas em uma única agregação agrupada sobre
+        as linhas do benchmark.
         
         Args:
-            predictions: Lista de predições do modelo
-            references: Lista de respostas de referência
+            df: DataFrame com colunas 'prediction', 'reference', 'extracted_choice'
+                e, opcionalmente, 'subject'
             
         Returns:
-            Dicionário com métricas MMLU
+            Contagens totais e, em 'subjects', as contagens de cada subject
         """
-        if not predictions or not references:
-            return {
-                "accuracy": 0.0,
-                "total_questions": 0,
-                "correct_answers": 0,
-                "subjects": {}
-            }
+        counts = super().count_answers_from_frame(df)
+        counts["subjects"] = {}
         
-        # Accuracy global (inclui inv?lidas como erro)
-        accuracy = self.calculate_accuracy(predictions, references)
-        correct_answers = sum(1 for p, r in zip(predictions, references)
-                             if self.validate_prediction(p, r))
-
-        # Accuracy apenas em respostas v?lidas + cobertura
-        valid_pairs = [(p, r) for p, r in zip(predictions, references) if not self.is_invalid_prediction(p)]
-        valid_answers = len(valid_pairs)
-        correct_valid_answers = sum(1 for p, r in valid_pairs if self.validate_prediction(p, r))
-        accuracy_valid_only = (correct_valid_answers / valid_answers) if valid_answers > 0 else 0.0
-        coverage = (valid_answers / len(predictions)) if len(predictions) > 0 else 0.0
-        
-        # Calcular accuracy por subject (se disponível)
-        subjects_accuracy = {}
-        if hasattr(self, 'subjects') and self.subjects:
-            for subject in self.subjects:
-                subject_predictions = [p for p in predictions if p.get('subject') == subject]
-                subject_references = [r for r in references if r.get('subject') == subject]
-                if subject_predictions and subject_references:
-                    subjects_accuracy[subject] = self.calculate_accuracy(
-                        subject_predictions, subject_references
-                    )
+        if df.empty or 'subject' not in df.columns or not df['subject'].notna().any():
+            return counts
         
-        return {
-            "accuracy": accuracy,
-            "accuracy_valid_only": accuracy_valid_only,
-            "coverage": coverage,
-            "total_questions": len(predictions),
-            "valid_answers": valid_answers,
-            "correct_answers": correct_answers,
-            "correct_valid_answers": correct_valid_answers,
-            "subjects": subjects_accuracy
+        scored = self._score_frame(df)
+        grouped = scored.groupby(df['subject'], observed=True)
+        counts_por_subject = grouped.sum()
+        counts_por_subject['total_questions'] = grouped.size()
+        counts["subjects"] = {
+            subject: {col: int(valor) for col, valor in linha.items()}
+            for subject, linha in counts_por_subject.to_dict(orient='index').items()
         }
+        return counts
     
-    def format_prompt(self, question_data: Dict[str, Any]) -> str:
+    def calculate_metrics_from_counts(self, counts: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Formata prompt para MMLU.
+        Calcula métricas MMLU (totais, por subject e por categoria) a partir das contagens.
         
         Args:
-            question_data: Dados da questão MMLU
+            counts: Contagens de count_answers_from_frame (ou somadas com merge_counts)
             
         Returns:
-            String formatada do prompt
+            Dicionário com métricas MMLU
         """
-        choices = "\n".join([f"{choice}" for choice in question_data['choices']])
-        return f"Question: {question_data['question']}\n\nChoices:\n{choices}\n\nInstructions: Choose the correct answer and respond with ONLY the letter (A, B, C, or D). Do not provide any explanation or additional text.\n\nAnswer:"
+        if not counts.get('total_questions'):
+            return self.empty_metrics()
+        
+        metrics = super().calculate_metrics_from_counts(counts)
+        metrics["subjects"] = {}
+        metrics["categories"] = {}
+        
+        if not counts.get("subjects"):
+            return metrics
+        
+        counts_por_subject = pd.DataFrame.from_dict(counts["subjects"], orient='index')[COUNT_COLUMNS].sort_index()
+        
+        # Categorias agregam as contagens dos subjects (sem nova passada pelas linhas)
+        categorias = counts_por_subject.index.map(lambda s: MMLU_SUBJECT_TO_CATEGORY.get(s, "other"))
+        counts_por_categoria = counts_por_subject.groupby(categorias).sum()
+        
+        metrics["subjects"] = self._counts_to_metrics(counts_por_subject).to_dict(orient='index')
+        metrics["categories"] = self._counts_to_metrics(counts_por_categoria).to_dict(orient='index')
+        return metrics
     
-    def validate_prediction(self, prediction: str, reference: str) -> bool:
+    def empty_metrics(self) -> Dict[str, Any]:
         """
-        Valida se a predição MMLU está correta.
+        Retorna métricas MMLU zeradas.
         
-        Args:
-            prediction: Predição do modelo
-            reference: Resposta de referência (A, B, C, D)
-            
         Returns:
-            True se a predição está correta, False caso contrário
+            Dicionário com métricas zeradas
         """
-        if not prediction or not reference:
-            return False
-        
-        # Normalizar strings para comparação
-        pred_clean = prediction.strip().upper()
-        ref_clean = reference.strip().upper()
-        
-        # Para MMLU, verificar se a predição contém a resposta correta
-        # ou se é exatamente igual
-        if pred_clean == ref_clean:
-            return True
+        metrics = super().empty_metrics()
+        metrics["subjects"] = {}
+        metrics["categories"] = {}
+        return metrics
+    
+    def format_prompt(self, question_data: Dict[str, Any]) -> str:
+        """
+        Formata prompt para MMLU.
         
-        # Verificar se a predição contém a letra da resposta correta
-        # mas apenas se for uma resposta de múltipla escolha válida
-        if ref_clean in ['A', 'B', 'C', 'D']:
-            # Padrões mais específicos para capturar respostas corretas
-            patterns = [
-                f"{ref_clean})",  # A), B), C), D)
-                f"ANSWER IS {ref_clean}",  # ANSWER IS A
-                f"RESPOSTA É {ref_clean}",  # RESPOSTA É A
-                f"THE ANSWER IS {ref_clean}",  # THE ANSWER IS A
-                f"ANSWER: {ref_clean}",  # ANSWER: A
-                f"RESPOSTA: {ref_clean}",  # RESPOSTA: A
-                f"THE ANSWER: {ref_clean}",  # THE ANSWER: A
-                f"CHOICE {ref_clean}",  # CHOICE A
-                f"OPÇÃO {ref_clean}",  # OPÇÃO A
-                f"OPTION {ref_clean}",  # OPTION A
-            ]
-            
-            for pattern in patterns:
-                if pattern in pred_clean:
-                    return True
-            
-            # Verificar se a predição começa com a letra correta seguida de parênteses
-            if pred_clean.startswith(f"{ref_clean})"):
-                return True
+        Args:
+            question_data: Dados da questão MMLU
             
-            # Verificar se a predição é apenas a letra (caso mais simples)
-            if pred_clean == ref_clean:
-                return True
-        
-        return False
+        Returns:
+            String formatada do prompt
+        """
+        choices = "\n".join([f"{choice}" for choice in question_data['choices']])
+        return f"Question: {question_data['question']}\n\nChoices:\n{choices}\n\nInstructions: Choose the correct answer and respond with ONLY the letter (A, B, C, or D). Do not provide any explanation or additional text.\n\nAnswer:"
     
     def get_description(self) -> str:
         """
@@ -157,4 +160,4 @@ class MMLUBenchmark(BaseBenchmark):
         Returns:
             Lista de strings com nomes das métricas
         """
-        return ["accuracy", "accuracy_valid_only", "coverage", "total_questions", "valid_answers", "correct_answers", "correct_valid_answers", "subjects"]
+        return ["accuracy", "accuracy_valid_only", "coverage", "total_questions", "valid_answers", "correct_answers", "correct_valid_answers", "subjects", "categories"]
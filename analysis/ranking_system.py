@@ -18,6 +18,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config import get_config
 
+# Imports compatíveis com execução direta e via import
+try:
+    from .mmlu import MMLU_CATEGORIES
+except ImportError:
+    from mmlu import MMLU_CATEGORIES
+
 class RankingSystem:
     """Sistema de ranking comparativo de modelos LLM."""
     
@@ -47,7 +53,7 @@ class RankingSystem:
         self.benchmark_metrics = [
             "MMLU Accuracy",
             "HellaSwag Accuracy"
-        ]
+        ] + [f"MMLU {categoria} Accuracy" for categoria in MMLU_CATEGORIES]
     
     def extrair_metricas_de_relatorios(self, pasta_analise: str) -> Dict[str, Dict]:
         """
@@ -120,6 +126,12 @@ class RankingSystem:
                         metricas_benchmarks[modelo]['MMLU Coverage'] = mmlu_data.get('coverage', 0.0)
                         metricas_benchmarks[modelo]['MMLU Total Questions'] = mmlu_data.get('total_questions', 0)
                         metricas_benchmarks[modelo]['MMLU Correct Answers'] = mmlu_data.get('correct_answers', 0)
+                        
+                        # Accuracy por categoria MMLU (STEM, humanities, ...)
+                        for categoria, dados_categoria in mmlu_data.get('categories', {}).items():
+                            metricas_benchmarks[modelo][f'MMLU {categoria} Accuracy'] = dados_categoria.get(
+                                'accuracy_valid_only', dados_categoria.get('accuracy', 0.0)
+                            )
                     
                     # HellaSwag
                     if 'hellaswag' in metricas['benchmarks']:
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Módulo para cálculo da métrica de similaridade semântica (semantic_similarity)
+Embeddings de sentença de um modelo pequeno do sentence-transformers e similaridade
+de cosseno entre predição e referência: alternativa barata ao BERTScore.
+"""
+
+import sys
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .cache_metricas import pontuar_com_cache, versao_metrica
+    from .invalid_responses import mascara_respostas_validas
+    from .tokenizacao import hash_texto
+except ImportError:
+    from cache_metricas import pontuar_com_cache, versao_metrica
+    from invalid_responses import mascara_respostas_validas
+    from tokenizacao import hash_texto
+
+COLUNA_SIMILARIDADE = 'semantic_similarity'
+
+# Versão do cálculo no cache de métricas (incrementar ao mudar a similaridade)
+VERSAO_SIMILARIDADE = 1
+
+# Modelos de sentença carregados no processo (um por nome) e embeddings normalizados
+# das referências, que se repetem em todos os modelos e execuções
+_modelos: Dict[str, object] = {}
+_embeddings_referencias: Dict[Tuple[str, str], np.ndarray] = {}
+_lock = threading.Lock()
+
+
+def obter_modelo_sentencas(nome_modelo: str):
+    """
+    Retorna o SentenceTransformer do processo, carregando-o na primeira chamada (thread-safe).
+
+    Args:
+        nome_modelo: Nome do modelo no Hugging Face ou caminho local
+
+    Returns:
+        Instância compartilhada de sentence_transformers.SentenceTransformer
+    """
+    modelo = _modelos.get(nome_modelo)
+    if modelo is not None:
+        return modelo
+
+    with _lock:
+        modelo = _modelos.get(nome_modelo)
+        if modelo is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"🧠 Carregando modelo de sentenças ({nome_modelo})...")
+            modelo = SentenceTransformer(nome_modelo)
+            _modelos[nome_modelo] = modelo
+        return modelo
+
+
+def _codificar(modelo, textos: List[str], batch_size: int) -> np.ndarray:
+    """Embeddings normalizados (norma 1, float32) de textos, em lotes grandes."""
+    if not textos:
+        return np.zeros((0, modelo.get_sentence_embedding_dimension()), dtype=np.float32)
+    return modelo.encode(
+        textos, batch_size=batch_size, normalize_embeddings=True,
+        convert_to_numpy=True, show_progress_bar=False
+    ).astype(np.float32)
+
+
+def embeddings_normalizados(textos: List[str], nome_modelo: str, batch_size: int = 256) -> np.ndarray:
+    """
+    Embeddings de sentença normalizados (norma 1) de cada texto.
+
+    Textos repetidos são codificados uma única vez.
+
+    Args:
+        textos: Textos de entrada
+        nome_modelo: Modelo do sentence-transformers
+        batch_size: Textos por lote do encoder
+
+    Returns:
+        Matriz (textos x dimensão) float32
+    """
+    modelo = obter_modelo_sentencas(nome_modelo)
+    unicos, indices = np.unique(np.asarray(textos, dtype=object), return_inverse=True)
+    return _codificar(modelo, list(unicos), batch_size)[indices]
+
+
+def similaridades_cosseno(predicoes: List[str], referencias: List[str],
+                          nome_modelo: str, batch_size: int = 256) -> np.ndarray:
+    """
+    Similaridade de cosseno entre cada predição e sua referência.
+
+    Predições e referências distintas são codificadas uma única vez (referências ficam
+    em cache no processo); a similaridade de cada par é o produto escalar dos embeddings
+    normalizados alinhados, sem montar a matriz predições x referências.
+
+    Args:
+        predicoes: Textos candidatos
+        referencias: Textos de referência (alinhados às predições)
+        nome_modelo: Modelo do sentence-transformers
+        batch_size: Textos por lote do encoder
+
+    Returns:
+        Vetor com a similaridade de cada par
+    """
+    modelo = obter_modelo_sentencas(nome_modelo)
+
+    preds_unicas, idx_preds = np.unique(np.asarray(predicoes, dtype=object), return_inverse=True)
+    refs_unicas, idx_refs = np.unique(np.asarray(referencias, dtype=object), return_inverse=True)
+
+    chaves = [(nome_modelo, hash_texto(ref)) for ref in refs_unicas]
+    novas = [(chave, ref) for chave, ref in zip(chaves, refs_unicas) if chave not in _embeddings_referencias]
+    if novas:
+        embeddings = _codificar(modelo, [ref for _, ref in novas], batch_size)
+        _embeddings_referencias.update({chave: emb for (chave, _), emb in zip(novas, embeddings)})
+
+    emb_refs = np.stack([_embeddings_referencias[chave] for chave in chaves])
+    emb_preds = _codificar(modelo, list(preds_unicas), batch_size)
+
+    return np.einsum('ij,ij->i', emb_preds[idx_preds], emb_refs[idx_refs])
+
+
+class SemanticSimilarityCalculator:
+    """Calculadora da métrica de similaridade semântica (sentence-transformers)."""
+
+    def __init__(self):
+        self.config = get_config()
+        # Vazão (sentenças/s) do último cálculo, usada na comparação com o BERTScore
+        self.ultima_vazao: Optional[float] = None
+
+    def calcular_similaridade_individual(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula a similaridade semântica para cada linha do DataFrame.
+
+        Args:
+            df: DataFrame com colunas 'prediction' e 'reference'
+
+        Returns:
+            DataFrame com a coluna adicional 'semantic_similarity' (zero nas inválidas;
+            sem ela se o sentence-transformers não estiver instalado)
+
+        Raises:
+            Exception: Falhas da pontuação são propagadas (nunca viram similaridade zerada)
+        """
+        try:
+            import sentence_transformers  # noqa: F401
+        except ImportError as e:
+            print(f"❌ Erro ao importar sentence-transformers: {e}")
+            print("💡 Instale com: pip install sentence-transformers")
+            return df
+
+        df_result = df.copy()
+        df_result[COLUNA_SIMILARIDADE] = 0.0
+
+        mascara_validas = mascara_respostas_validas(df).to_numpy()
+        df_validas = df[mascara_validas]
+        if len(df_validas) == 0:
+            print("⚠️ Nenhuma resposta válida encontrada para similaridade semântica")
+            return df_result
+
+        params = self.config.get_semantic_similarity_params()
+        print(f"🔍 Calculando similaridade semântica para {len(df_validas)} respostas válidas...")
+
+        medicoes = []
+
+        def pontuar(predicoes: List[str], referencias: List[str]) -> np.ndarray:
+            # Carga do modelo fora da medição de vazão
+            obter_modelo_sentencas(params['model'])
+            inicio = time.perf_counter()
+            similaridades = similaridades_cosseno(predicoes, referencias, params['model'], params['batch_size'])
+            medicoes.append((len(predicoes), time.perf_counter() - inicio))
+            return similaridades
+
+        # Pares já pontuados vêm do cache de métricas; só os novos passam pelo modelo
+        versao = versao_metrica(COLUNA_SIMILARIDADE, {'model': params['model'], 'versao': VERSAO_SIMILARIDADE})
+        valores = pontuar_com_cache(
+            COLUNA_SIMILARIDADE, versao,
+            df_validas['prediction'].astype(str).tolist(),
+            df_validas['reference'].astype(str).tolist(),
+            pontuar, 1
+        )[:, 0]
+
+        df_result.loc[mascara_validas, COLUNA_SIMILARIDADE] = valores
+        if medicoes:
+            pontuadas, duracao = medicoes[0]
+            self.ultima_vazao = pontuadas / duracao if duracao > 0 else float('inf')
+            print(f"✅ Similaridade semântica calculada para {len(df_validas)} respostas "
+                  f"({pontuadas} pontuadas a {self.ultima_vazao:.1f} sentenças/s)")
+        else:
+            print(f"✅ Similaridade semântica de {len(df_validas)} respostas reaproveitada do cache")
+
+        return df_result
+
+    def calcular_metricas_por_modelo(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        Calcula a similaridade semântica agregada por modelo.
+
+        Args:
+            df: DataFrame com métricas já calculadas
+
+        Returns:
+            Dicionário com métricas por modelo
+        """
+        if 'model' not in df.columns or COLUNA_SIMILARIDADE not in df.columns:
+            return {}
+
+        metricas_por_modelo = {}
+        for modelo, df_modelo in df.groupby('model', observed=True, sort=False):
+            df_validas = df_modelo[mascara_respostas_validas(df_modelo)]
+            metricas_por_modelo[modelo] = {
+                'semantic_similarity_medio': df_validas[COLUNA_SIMILARIDADE].mean() if len(df_validas) else 0.0,
+                'semantic_similarity_std': df_validas[COLUNA_SIMILARIDADE].std() if len(df_validas) > 1 else 0.0,
+                'total_respostas': len(df_modelo),
+                'respostas_validas': len(df_validas)
+            }
+        return metricas_por_modelo
+
+    def gerar_relatorio_similaridade(self, metricas_por_modelo: Dict[str, Dict]) -> str:
+        """
+        Gera relatório em texto da similaridade semântica.
+
+        Args:
+            metricas_por_modelo: Dicionário com métricas por modelo
+
+        Returns:
+            String com relatório formatado
+        """
+        relatorio = []
+        relatorio.append("## 🧭 Similaridade Semântica (sentence-transformers)")
+        relatorio.append("=" * 50)
+        relatorio.append("")
+
+        for modelo, metricas in sorted(metricas_por_modelo.items(),
+                                       key=lambda x: x[1]['semantic_similarity_medio'], reverse=True):
+            relatorio.append(f"### 🤖 {modelo}")
+            relatorio.append(f"- **Similaridade de cosseno**: {metricas['semantic_similarity_medio']:.4f} ± {metricas['semantic_similarity_std']:.4f}")
+            relatorio.append(f"- **Respostas Válidas**: {metricas['respostas_validas']}/{metricas['total_respostas']}")
+            relatorio.append("")
+
+        return "\n".join(relatorio)
+
+
+def calcular_semantic_similarity_completo(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict], str, Optional[float]]:
+    """
+    Função principal para calcular a similaridade semântica completa.
+
+    Args:
+        df: DataFrame com dados das respostas
+
+    Returns:
+        Tuple com (DataFrame com métricas, métricas por modelo, relatório, sentenças/s)
+    """
+    calculator = SemanticSimilarityCalculator()
+
+    df_com_metricas = calculator.calcular_similaridade_individual(df)
+    metricas_por_modelo = calculator.calcular_metricas_por_modelo(df_com_metricas)
+    relatorio = calculator.gerar_relatorio_similaridade(metricas_por_modelo)
+
+    return df_com_metricas, metricas_por_modelo, relatorio, calculator.ultima_vazao
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Servidor local de métricas (opcional).
+Mantém tokenizadores, o modelo do BERTScore e o cache de referências do BLEU/ROUGE
+carregados entre análises e atende pedidos de pontuação em lote via HTTP em
+localhost. O AnalysisSystem usa o servidor quando ele está no ar e calcula as
+métricas no próprio processo quando não está.
+
+Uso:
+    python -m analysis.servidor_metricas [--host 127.0.0.1] [--porta 8765]
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import get_config
+
+# Import compatível com execução direta e via import
+try:
+    from .bertscore import BertScoreCalculator
+    from .bleu_rouge import estatisticas_lexicas
+    from .tokenizacao import TokenizadorLexico
+except ImportError:
+    from bertscore import BertScoreCalculator
+    from bleu_rouge import estatisticas_lexicas
+    from tokenizacao import TokenizadorLexico
+
+ROTA_SAUDE = "/saude"
+ROTA_BERTSCORE = "/bertscore"
+ROTA_LEXICAS = "/lexicas"
+
+# Tempo máximo para detectar se o servidor está no ar (em segundos)
+TIMEOUT_SAUDE = 0.5
+
+
+def _assinatura_config() -> Dict:
+    """Parâmetros que afetam os valores das métricas (cliente e servidor precisam coincidir)."""
+    config = get_config()
+    params_cpu = config.get_bertscore_cpu_params()
+    return {
+        'bertscore': config.get_bertscore_params(),
+        'janelas': params_cpu['janelas'],
+        'sobreposicao_janela': params_cpu['sobreposicao_janela'],
+        'cache_embeddings': config.BERT_SCORE_CACHE_EMBEDDINGS
+    }
+
+
+class ServicoMetricas:
+    """Estado mantido pelo servidor: calculadora do BERTScore e tokenizador lexical."""
+
+    def __init__(self):
+        config = get_config()
+        self.bertscore = BertScoreCalculator()
+        self.tokenizador = TokenizadorLexico()
+        self.assinatura = _assinatura_config()
+        self.max_ngramas = config.SERVIDOR_METRICAS_MAX_NGRAMAS
+        self.max_referencias = config.SERVIDOR_METRICAS_MAX_REFERENCIAS
+
+    def aquecer(self) -> None:
+        """Carrega o modelo do BERTScore e o stemmer antes do primeiro pedido."""
+        print("🔥 Aquecendo BERTScore e tokenizadores...")
+        self.bertscore.pontuar(["warm up"], ["warm up"])
+        estatisticas_lexicas(["warm up"], ["warm up"], self.tokenizador)
+
+    def _limitar_tokenizador(self) -> None:
+        """
+        Recria o tokenizador lexical quando o estado acumulado passa dos limites da Config.
+
+        O servidor fica no ar por muitas análises: sem limite, vocabulário, n-gramas e
+        referências em cache crescem a cada pedido. A troca acontece entre pedidos, então
+        os IDs usados dentro de um pedido são sempre do mesmo tokenizador.
+        """
+        tokenizador = self.tokenizador
+        ngramas = tokenizador.tamanho_vocabulario + tokenizador.tamanho_ngramas
+        if ngramas > self.max_ngramas or tokenizador.referencias_em_cache > self.max_referencias:
+            print(f"♻️ Recriando tokenizador lexical ({ngramas} tokens/n-gramas, "
+                  f"{tokenizador.referencias_em_cache} referências em cache)")
+            self.tokenizador = TokenizadorLexico()
+
+    def atender(self, rota: str, pedido: Dict) -> Dict:
+        """
+        Executa um pedido de pontuação em lote.
+
+        Args:
+            rota: Rota do pedido (ROTA_BERTSCORE ou ROTA_LEXICAS)
+            pedido: Corpo com listas 'predicoes' e 'referencias'
+
+        Returns:
+            Resposta serializável em JSON
+        """
+        predicoes = [str(p) for p in pedido['predicoes']]
+        referencias = [str(r) for r in pedido['referencias']]
+        if len(predicoes) != len(referencias):
+            raise ValueError("predicoes e referencias devem ter o mesmo tamanho")
+
+        if rota == ROTA_BERTSCORE:
+            valores = self.bertscore.pontuar(predicoes, referencias) if predicoes else np.zeros((0, 3))
+        elif rota == ROTA_LEXICAS:
+            self._limitar_tokenizador()
+            valores = estatisticas_lexicas(predicoes, referencias, self.tokenizador).to_numpy()
+        else:
+            raise KeyError(rota)
+        return {'valores': valores.tolist()}
+
+
+def _criar_manipulador(servico: ServicoMetricas):
+    """Cria a classe de manipulador HTTP ligada ao serviço."""
+
+    class ManipuladorMetricas(BaseHTTPRequestHandler):
+
+        def _responder(self, status: int, corpo: Dict) -> None:
+            dados = json.dumps(corpo).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == ROTA_SAUDE:
+                self._responder(200, {'status': 'ok', 'assinatura': servico.assinatura})
+            else:
+                self._responder(404, {'erro': f"rota desconhecida: {self.path}"})
+
+        def do_POST(self):
+            if self.path not in (ROTA_BERTSCORE, ROTA_LEXICAS):
+                self._responder(404, {'erro': f"rota desconhecida: {self.path}"})
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+                pedido = json.loads(self.rfile.read(tamanho).decode("utf-8"))
+                self._responder(200, servico.atender(self.path, pedido))
+            except Exception as e:
+                self._responder(500, {'erro': str(e)})
+
+        def log_message(self, formato, *args):
+            print(f"📨 {self.address_string()} {formato % args}")
+
+    return ManipuladorMetricas
+
+
+def iniciar_servidor(host: Optional[str] = None, porta: Optional[int] = None) -> None:
+    """
+    Inicia o servidor de métricas e atende pedidos até ser interrompido (Ctrl+C).
+
+    Pedidos são atendidos um por vez, na ordem de chegada, pelo mesmo modelo carregado.
+
+    Args:
+        host: Endereço de escuta (padrão: Config.SERVIDOR_METRICAS_HOST)
+        porta: Porta de escuta (padrão: Config.SERVIDOR_METRICAS_PORTA)
+    """
+    config = get_config()
+    host = host or config.SERVIDOR_METRICAS_HOST
+    porta = porta or config.SERVIDOR_METRICAS_PORTA
+
+    servico = ServicoMetricas()
+    servico.aquecer()
+
+    servidor = HTTPServer((host, porta), _criar_manipulador(servico))
+    print(f"🚀 Servidor de métricas em http://{host}:{porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor de métricas encerrado")
+    finally:
+        servidor.server_close()
+
+
+class ClienteMetricas:
+    """Cliente do servidor local de métricas (usado pelas calculadoras de BLEU/ROUGE e BERTScore)."""
+
+    def __init__(self, host: str, porta: int, timeout: float):
+        self.url = f"http://{host}:{porta}"
+        self.timeout = timeout
+
+    @classmethod
+    def conectar(cls) -> Optional["ClienteMetricas"]:
+        """
+        Retorna um cliente se o servidor estiver no ar com a mesma configuração de métricas.
+
+        Returns:
+            ClienteMetricas ou None (métricas devem ser calculadas no processo)
+        """
+        config = get_config()
+        if not config.USAR_SERVIDOR_METRICAS:
+            return None
+
+        cliente = cls(config.SERVIDOR_METRICAS_HOST, config.SERVIDOR_METRICAS_PORTA,
+                      config.SERVIDOR_METRICAS_TIMEOUT)
+        try:
+            with urllib.request.urlopen(cliente.url + ROTA_SAUDE, timeout=TIMEOUT_SAUDE) as resposta:
+                saude = json.loads(resposta.read().decode("utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if saude.get('assinatura') != json.loads(json.dumps(_assinatura_config())):
+            print("⚠️ Servidor de métricas no ar com outra configuração; calculando no processo")
+            return None
+
+        print(f"🔌 Usando servidor de métricas em {cliente.url}")
+        return cliente
+
+    def _pontuar(self, rota: str, predicoes: List[str], referencias: List[str]) -> np.ndarray:
+        corpo = json.dumps({'predicoes': list(predicoes), 'referencias': list(referencias)}).encode("utf-8")
+        pedido = urllib.request.Request(
+            self.url + rota, data=corpo, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.timeout) as resposta:
+                dados = json.loads(resposta.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read().decode("utf-8")).get('erro', str(e))) from e
+        return np.asarray(dados['valores'])
+
+    def bertscore(self, predicoes: List[str], referencias: List[str]) -> np.ndarray:
+        """Matriz (pares x 3) com precision, recall e F1 calculados pelo servidor."""
+        return self._pontuar(ROTA_BERTSCORE, predicoes, referencias).reshape(-1, 3)
+
+    def estatisticas_lexicas(self, predicoes: List[str], referencias: List[str]) -> np.ndarray:
+        """Matriz (pares x COLUNAS_ESTATISTICAS_LEXICAS) com as estatísticas do BLEU/ROUGE."""
+        return self._pontuar(ROTA_LEXICAS, predicoes, referencias).astype(np.int32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de métricas (BLEU/ROUGE e BERTScore)")
+    parser.add_argument('--host', default=None, help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument('--porta', type=int, default=None, help="Porta de escuta (padrão: 8765)")
+    args = parser.parse_args()
+    iniciar_servidor(args.host, args.porta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Camada de tokenização memoizada para as métricas lexicais (BLEU, ROUGE).
+Converte textos em sequências de IDs inteiros uma única vez por análise: o stemmer
+é cacheado por token e as referências (poucas e repetidas em todos os modelos e
+execuções) são tokenizadas e indexadas (contagens de n-gramas) apenas uma vez,
+indexadas pelo hash do texto.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Mesmas regras do tokenizador padrão do rouge_score: minúsculas, tudo que não é
+# [a-z0-9] vira espaço e apenas palavras com mais de 3 caracteres passam pelo stemmer.
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+_TOKEN_VALIDO = re.compile(r"^[a-z0-9]+$")
+_TAMANHO_MINIMO_STEM = 3
+
+# Tamanho do cache LRU do stemmer (tokens distintos mantidos em memória)
+TAMANHO_CACHE_STEMMER = 100_000
+
+# Ordem máxima de n-gramas indexada para as referências (BLEU usa até 4, ROUGE até 2)
+MAX_N_INDICE = 4
+
+# IDs de tokens e de n-gramas cabem em 32 bits; pares (prefixo, token) e
+# (linha, n-grama) são empacotados em um único int64
+BITS_ID = 32
+MASCARA_ID = (1 << BITS_ID) - 1
+
+
+@lru_cache(maxsize=1)
+def _porter_stemmer():
+    """Instancia o Porter stemmer do nltk uma única vez (import tardio da dependência)."""
+    from nltk.stem import porter
+    return porter.PorterStemmer()
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_STEMMER)
+def stem(token: str) -> str:
+    """Aplica o Porter stemmer (o mesmo usado pelo rouge_score) com cache por token."""
+    return _porter_stemmer().stem(token)
+
+
+def hash_texto(texto: str) -> str:
+    """Retorna o hash SHA-1 de um texto (chave dos caches de referência)."""
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def tokenizar_bleu(texto: str) -> List[str]:
+    """Tokenização usada pelo BLEU (separação por espaços, como no nltk)."""
+    return texto.split()
+
+
+def tokenizar_rouge(texto: str) -> List[str]:
+    """Tokenização usada pelo ROUGE (equivalente ao tokenizador do rouge_score com stemmer)."""
+    tokens = _NAO_ALFANUMERICO.sub(" ", texto.lower()).split()
+    tokens = [stem(token) if len(token) > _TAMANHO_MINIMO_STEM else token for token in tokens]
+    return [token for token in tokens if _TOKEN_VALIDO.match(token)]
+
+
+@dataclass(frozen=True)
+class TextoTokenizado:
+    """Sequências de IDs de um texto nas tokenizações do BLEU e do ROUGE."""
+    bleu: np.ndarray
+    rouge: np.ndarray
+
+
+@dataclass(frozen=True)
+class IndiceNgramas:
+    """
+    Índice de um texto em uma tokenização: IDs dos tokens (usados pela LCS) e, para
+    cada ordem n, os IDs distintos de n-gramas (ordenados) com suas contagens.
+    """
+    ids: np.ndarray
+    ngramas: Tuple[np.ndarray, ...]
+    contagens: Tuple[np.ndarray, ...]
+
+
+@dataclass(frozen=True)
+class ReferenciaIndexada:
+    """Referência pré-processada uma única vez por análise (chave = hash do texto)."""
+    chave: str
+    bleu: IndiceNgramas
+    rouge: IndiceNgramas
+
+
+class TokenizadorLexico:
+    """
+    Tokenizador compartilhado pelas métricas lexicais de uma análise.
+
+    Mantém um vocabulário único (token -> ID inteiro), IDs estáveis para n-gramas e
+    um cache de referências indexado pelo hash do texto, de modo que cada referência
+    é tokenizada, stemizada e tem seus n-gramas contados uma única vez para todos os
+    modelos e execuções.
+    """
+
+    def __init__(self):
+        self._vocabulario: Dict[str, int] = {}
+        self._referencias: Dict[str, ReferenciaIndexada] = {}
+        # Vocabulário de n-gramas por ordem (n >= 2): par empacotado (prefixo, token) -> ID
+        self._ngramas = {n: pd.Index([], dtype=np.int64) for n in range(2, MAX_N_INDICE + 1)}
+
+    @property
+    def tamanho_vocabulario(self) -> int:
+        """Quantidade de tokens distintos já vistos."""
+        return len(self._vocabulario)
+
+    @property
+    def referencias_em_cache(self) -> int:
+        """Quantidade de referências distintas já tokenizadas."""
+        return len(self._referencias)
+
+    @property
+    def tamanho_ngramas(self) -> int:
+        """Quantidade de n-gramas distintos (n >= 2) com ID atribuído."""
+        return sum(len(indice) for indice in self._ngramas.values())
+
+    def ids(self, tokens: List[str]) -> np.ndarray:
+        """
+        Converte uma lista de tokens em IDs inteiros, ampliando o vocabulário se preciso.
+
+        Args:
+            tokens: Tokens do texto
+
+        Returns:
+            Vetor int64 com os IDs dos tokens
+        """
+        vocabulario = self._vocabulario
+        return np.fromiter(
+            (vocabulario.setdefault(token, len(vocabulario)) for token in tokens),
+            dtype=np.int64, count=len(tokens)
+        )
+
+    def tokenizar(self, texto: str) -> TextoTokenizado:
+        """Tokeniza um texto (sem cache) nas duas tokenizações."""
+        return TextoTokenizado(
+            bleu=self.ids(tokenizar_bleu(texto)),
+            rouge=self.ids(tokenizar_rouge(texto))
+        )
+
+    def _ids_ngramas(self, n: int, pares: np.ndarray) -> np.ndarray:
+        """Atribui IDs estáveis a n-gramas (pares prefixo/token empacotados) de ordem n."""
+        indice = self._ngramas[n]
+        ids = indice.get_indexer(pares)
+        novos = ids < 0
+        if novos.any():
+            indice = indice.append(pd.Index(pd.unique(pares[novos])))
+            self._ngramas[n] = indice
+            ids[novos] = indice.get_indexer(pares[novos])
+        return ids.astype(np.int64)
+
+    def ngramas(self, ids: np.ndarray, comprimentos: np.ndarray,
+                max_n: int) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Enumera os n-gramas (n = 1..max_n) de sequências concatenadas, com IDs inteiros.
+
+        O ID de um n-grama combina o ID do seu prefixo (n-1)-grama com o do último token
+        e é estável durante toda a análise, de modo que n-gramas de predições e de
+        referências indexadas em chamadas diferentes são comparáveis diretamente.
+
+        Args:
+            ids: IDs dos tokens de todas as sequências concatenadas
+            comprimentos: Comprimento de cada sequência
+            max_n: Ordem máxima de n-gramas
+
+        Yields:
+            Tuplas (n, sequência de cada n-grama, ID de cada n-grama)
+        """
+        inicios = np.concatenate(([0], np.cumsum(comprimentos)[:-1])).astype(np.int64)
+        sequencia = np.repeat(np.arange(len(comprimentos), dtype=np.int64), comprimentos)
+        restantes = comprimentos[sequencia] - (np.arange(len(ids)) - inicios[sequencia])
+
+        posicoes = np.arange(len(ids))
+        gramas = ids
+        for n in range(1, max_n + 1):
+            if n > 1:
+                manter = restantes[posicoes] >= n
+                posicoes = posicoes[manter]
+                gramas = self._ids_ngramas(n, (gramas[manter] << BITS_ID) | ids[posicoes + n - 1])
+            yield n, sequencia[posicoes], gramas
+
+    def _indexar(self, sequencias: List[np.ndarray]) -> List[IndiceNgramas]:
+        """Conta os n-gramas (n = 1..MAX_N_INDICE) de várias sequências em uma passada."""
+        comprimentos = np.fromiter((len(seq) for seq in sequencias), dtype=np.int64, count=len(sequencias))
+        ids = np.concatenate(sequencias) if comprimentos.sum() else np.zeros(0, dtype=np.int64)
+
+        ngramas = [[] for _ in sequencias]
+        contagens = [[] for _ in sequencias]
+        for _, linhas, gramas in self.ngramas(ids, comprimentos, MAX_N_INDICE):
+            chaves, contagem = np.unique((linhas << BITS_ID) | gramas, return_counts=True)
+            limites = np.searchsorted(chaves >> BITS_ID, np.arange(len(sequencias) + 1))
+            for i in range(len(sequencias)):
+                inicio, fim = limites[i], limites[i + 1]
+                ngramas[i].append(chaves[inicio:fim] & MASCARA_ID)
+                contagens[i].append(contagem[inicio:fim])
+
+        return [
+            IndiceNgramas(ids=seq, ngramas=tuple(ngramas[i]), contagens=tuple(contagens[i]))
+            for i, seq in enumerate(sequencias)
+        ]
+
+    def referencias(self, textos: Sequence[str]) -> List[ReferenciaIndexada]:
+        """
+        Retorna as referências tokenizadas e indexadas, usando o cache pelo hash do texto.
+
+        Referências ainda não vistas são indexadas juntas, em uma única passada.
+
+        Args:
+            textos: Textos das respostas de referência (um por linha; repetições são esperadas)
+
+        Returns:
+            Lista de ReferenciaIndexada (tokens e contagens de n-gramas do BLEU e do ROUGE),
+            na ordem dos textos
+        """
+        chaves = [hash_texto(texto) for texto in textos]
+        novas = {}
+        for chave, texto in zip(chaves, textos):
+            if chave not in self._referencias and chave not in novas:
+                novas[chave] = self.tokenizar(texto)
+
+        if novas:
+            indices_bleu = self._indexar([tokenizado.bleu for tokenizado in novas.values()])
+            indices_rouge = self._indexar([tokenizado.rouge for tokenizado in novas.values()])
+            for chave, bleu, rouge in zip(novas, indices_bleu, indices_rouge):
+                self._referencias[chave] = ReferenciaIndexada(chave=chave, bleu=bleu, rouge=rouge)
+
+        return [self._referencias[chave] for chave in chaves]
+
+    def referencia(self, texto: str) -> ReferenciaIndexada:
+        """Retorna uma única referência tokenizada e indexada (ver ``referencias``)."""
+        return self.referencias([texto])[0]
@@ -43,6 +43,16 @@ class Config:
     PASTA_RESULTADOS = "results"
     PREFIXO_EXECUCAO = "resultado"
     PASTA_TESTS = "tests"
+    # Caches em disco reaproveitados entre análises (ex.: embeddings do BERTScore)
+    PASTA_CACHE = "cache"
+    # Cache de métricas por par (SQLite em PASTA_CACHE): reanálises só pontuam pares novos
+    CACHE_METRICAS = True
+    # Análise incremental: só execuções novas/alteradas são pontuadas; as demais entram
+    # pelos agregados parciais do manifesto em PASTA_CACHE
+    ANALISE_INCREMENTAL = False
+    # Salvar o HTML dos relatórios Evidently (só para inspeção; as métricas do relatório
+    # vêm do snapshot avaliado e vão para evidently_metricas.json)
+    EVIDENTLY_SALVAR_HTML = True
     
     # =============================================================================
     # CONFIGURAÇÕES DE LOGGING
@@ -57,6 +67,77 @@ class Config:
     BERT_SCORE_LANG = "en"
     BERT_SCORE_MODEL_TYPE = "roberta-large"
     BERT_SCORE_USE_FAST_TOKENIZER = True
+    # Camada do encoder usada nos embeddings (None = camada padrão do bert_score para o modelo)
+    BERT_SCORE_NUM_LAYERS = None
+    # Pares pontuados por lote do encoder
+    BERT_SCORE_BATCH_SIZE = 64
+    # Quantização dinâmica int8 das camadas lineares do encoder quando executado em CPU
+    BERT_SCORE_QUANTIZAR_CPU = False
+    # Encoders menores aceitos em BERT_SCORE_MODEL_TYPE para execuções rápidas em CPU
+    # (trade-off de precisão/velocidade medido por analysis/bertscore_benchmark.py)
+    BERT_SCORE_MODELOS_LEVES = ("roberta-base", "distilroberta-base", "distilbert-base-uncased")
+    # Cache em disco dos embeddings por texto (float16, em PASTA_CACHE): só textos novos são codificados
+    BERT_SCORE_CACHE_EMBEDDINGS = True
+    # Orçamento de tokens (com padding) por lote: textos são agrupados por comprimento
+    BERT_SCORE_TOKENS_POR_LOTE = 8192
+    # Threads do PyTorch em CPU (0 = padrão do PyTorch)
+    BERT_SCORE_THREADS = 0
+    BERT_SCORE_INTEROP_THREADS = 0
+    # Respostas acima do limite do encoder (512 tokens) divididas em janelas sobrepostas
+    # em vez de truncadas (sem efeito em textos curtos)
+    BERT_SCORE_JANELAS = False
+    BERT_SCORE_SOBREPOSICAO_JANELA = 128
+    # Limite da memória de trabalho do BERTScore (embeddings e similaridades, sem os pesos), em MB
+    BERT_SCORE_MEMORIA_MAX_MB = 1024
+    
+    # Métricas semânticas calculadas nos prompts textuais: "bertscore" e/ou
+    # "semantic_similarity" (cosseno entre embeddings de sentença, bem mais barato)
+    METRICAS_SEMANTICAS = ("bertscore", "semantic_similarity")
+    # Modelo do sentence-transformers da similaridade semântica e textos por lote
+    SEMANTIC_SIMILARITY_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    SEMANTIC_SIMILARITY_BATCH_SIZE = 256
+    
+    # Assinaturas MinHash (Jaccard estimado entre conjuntos de tokens/shingles)
+    MINHASH_PERMUTACOES = 128
+    MINHASH_SEMENTE = 42
+    # Consistência entre execuções (mesmo modelo e prompt): além do Jaccard via MinHash,
+    # usa a similaridade de cosseno dos embeddings de SEMANTIC_SIMILARITY_MODEL
+    CONSISTENCIA_EMBEDDINGS = True
+    # Detecção de respostas quase duplicadas (MinHash + LSH por bandas): palavras por
+    # shingle, bandas do LSH (MINHASH_PERMUTACOES deve ser múltiplo) e Jaccard mínimo
+    DUPLICATAS_TAMANHO_SHINGLE = 3
+    DUPLICATAS_BANDAS = 16
+    DUPLICATAS_LIMIAR_JACCARD = 0.8
+    # Fração de respostas em templates (grupos que cobrem prompts diferentes) a partir
+    # da qual o modelo é sinalizado como colapsado em poucos templates
+    DUPLICATAS_LIMIAR_COLAPSO = 0.3
+    
+    # Servidor local de métricas (python -m analysis.servidor_metricas): usado pela análise
+    # quando estiver no ar, mantendo o BERTScore e os tokenizadores carregados entre execuções
+    USAR_SERVIDOR_METRICAS = True
+    SERVIDOR_METRICAS_HOST = "127.0.0.1"
+    SERVIDOR_METRICAS_PORTA = 8765
+    # Tempo máximo de espera por um pedido de pontuação (em segundos)
+    SERVIDOR_METRICAS_TIMEOUT = 600
+    # Limites do estado lexical mantido pelo servidor (vocabulário + n-gramas e referências
+    # em cache); ao passar de um deles, o tokenizador é recriado antes do próximo pedido
+    SERVIDOR_METRICAS_MAX_NGRAMAS = 5_000_000
+    SERVIDOR_METRICAS_MAX_REFERENCIAS = 100_000
+    
+    # Configurações para ROUGE
+    # Processos usados no cálculo da LCS (0 = todos os núcleos disponíveis; 1 = serial).
+    # Serial por padrão: a LCS bit-paralela leva milissegundos por lote, menos que subir
+    # um pool de processos por modelo
+    ROUGE_WORKERS = 1
+    # Quantidade de pares referência/predição enviados a cada processo por tarefa
+    ROUGE_CHUNK_SIZE = 64
+    # Abaixo deste número de pares a LCS é serial mesmo com ROUGE_WORKERS != 1
+    ROUGE_MIN_PARES_PARALELO = 5000
+    
+    # Processos da análise por modelo (0 = todos os núcleos disponíveis; 1 = serial).
+    # O BERTScore continua em lote no processo principal; o resto de cada modelo
+    # (métricas lexicais, Evidently, relatórios e CSVs) roda nos processos
+    ANALISE_WORKERS = 1
     
     # =============================================================================
     # CONFIGURAÇÕES DE BENCHMARKS
@@ -117,7 +198,86 @@ class Config:
         return {
             "lang": cls.BERT_SCORE_LANG,
             "model_type": cls.BERT_SCORE_MODEL_TYPE,
-            "use_fast_tokenizer": cls.BERT_SCORE_USE_FAST_TOKENIZER
+            "use_fast_tokenizer": cls.BERT_SCORE_USE_FAST_TOKENIZER,
+            "num_layers": cls.BERT_SCORE_NUM_LAYERS,
+            "batch_size": cls.BERT_SCORE_BATCH_SIZE,
+            "quantizar_cpu": cls.BERT_SCORE_QUANTIZAR_CPU
+        }
+    
+    @classmethod
+    def get_bertscore_cpu_params(cls) -> Dict[str, Any]:
+        """
+        Retorna parâmetros de execução do BERTScore (lotes, threads, janelas e memória).
+        
+        Returns:
+            Dict[str, Any]: Orçamento de tokens por lote, threads do PyTorch, modo de
+            janelas e limite de memória
+        """
+        return {
+            "tokens_por_lote": cls.BERT_SCORE_TOKENS_POR_LOTE,
+            "threads": cls.BERT_SCORE_THREADS,
+            "interop_threads": cls.BERT_SCORE_INTEROP_THREADS,
+            "janelas": cls.BERT_SCORE_JANELAS,
+            "sobreposicao_janela": cls.BERT_SCORE_SOBREPOSICAO_JANELA,
+            "memoria_max_mb": cls.BERT_SCORE_MEMORIA_MAX_MB
+        }
+    
+    @classmethod
+    def get_semantic_similarity_params(cls) -> Dict[str, Any]:
+        """
+        Retorna parâmetros da métrica de similaridade semântica.
+        
+        Returns:
+            Dict[str, Any]: Modelo do sentence-transformers e textos por lote
+        """
+        return {
+            "model": cls.SEMANTIC_SIMILARITY_MODEL,
+            "batch_size": cls.SEMANTIC_SIMILARITY_BATCH_SIZE
+        }
+    
+    @classmethod
+    def get_consistencia_params(cls) -> Dict[str, Any]:
+        """
+        Retorna parâmetros da consistência entre execuções.
+        
+        Returns:
+            Dict[str, Any]: Permutações e semente do MinHash e uso de embeddings
+        """
+        return {
+            "permutacoes": cls.MINHASH_PERMUTACOES,
+            "semente": cls.MINHASH_SEMENTE,
+            "embeddings": cls.CONSISTENCIA_EMBEDDINGS
+        }
+    
+    @classmethod
+    def get_duplicatas_params(cls) -> Dict[str, Any]:
+        """
+        Retorna parâmetros da detecção de respostas quase duplicadas.
+        
+        Returns:
+            Dict[str, Any]: Parâmetros do MinHash/LSH e limiares de similaridade e colapso
+        """
+        return {
+            "permutacoes": cls.MINHASH_PERMUTACOES,
+            "semente": cls.MINHASH_SEMENTE,
+            "tamanho_shingle": cls.DUPLICATAS_TAMANHO_SHINGLE,
+            "bandas": cls.DUPLICATAS_BANDAS,
+            "limiar_jaccard": cls.DUPLICATAS_LIMIAR_JACCARD,
+            "limiar_colapso": cls.DUPLICATAS_LIMIAR_COLAPSO
+        }
+    
+    @classmethod
+    def get_rouge_params(cls) -> Dict[str, Any]:
+        """
+        Retorna parâmetros para o cálculo de ROUGE.
+        
+        Returns:
+            Dict[str, Any]: Parâmetros de paralelismo do ROUGE
+        """
+        return {
+            "workers": cls.ROUGE_WORKERS,
+            "chunk_size": cls.ROUGE_CHUNK_SIZE,
+            "min_pares_paralelo": cls.ROUGE_MIN_PARES_PARALELO
         }
     
     @classmethod
@@ -242,6 +402,105 @@ class ConfigValidator:
         
         if not isinstance(Config.BERT_SCORE_USE_FAST_TOKENIZER, bool):
             raise ValueError("BERT_SCORE_USE_FAST_TOKENIZER deve ser um booleano")
+        
+        if Config.BERT_SCORE_NUM_LAYERS is not None and (
+            not isinstance(Config.BERT_SCORE_NUM_LAYERS, int) or Config.BERT_SCORE_NUM_LAYERS < 1
+        ):
+            raise ValueError("BERT_SCORE_NUM_LAYERS deve ser None ou um inteiro >= 1")
+        
+        if not isinstance(Config.BERT_SCORE_BATCH_SIZE, int) or Config.BERT_SCORE_BATCH_SIZE < 1:
+            raise ValueError("BERT_SCORE_BATCH_SIZE deve ser um inteiro >= 1")
+        
+        if not isinstance(Config.BERT_SCORE_QUANTIZAR_CPU, bool):
+            raise ValueError("BERT_SCORE_QUANTIZAR_CPU deve ser um booleano")
+        
+        if not isinstance(Config.CACHE_METRICAS, bool):
+            raise ValueError("CACHE_METRICAS deve ser um booleano")
+        
+        if not isinstance(Config.ANALISE_INCREMENTAL, bool):
+            raise ValueError("ANALISE_INCREMENTAL deve ser um booleano")
+        
+        if not isinstance(Config.EVIDENTLY_SALVAR_HTML, bool):
+            raise ValueError("EVIDENTLY_SALVAR_HTML deve ser um booleano")
+        
+        if not isinstance(Config.BERT_SCORE_CACHE_EMBEDDINGS, bool):
+            raise ValueError("BERT_SCORE_CACHE_EMBEDDINGS deve ser um booleano")
+        
+        if not isinstance(Config.BERT_SCORE_TOKENS_POR_LOTE, int) or Config.BERT_SCORE_TOKENS_POR_LOTE < 1:
+            raise ValueError("BERT_SCORE_TOKENS_POR_LOTE deve ser um inteiro >= 1")
+        
+        for nome in ("BERT_SCORE_THREADS", "BERT_SCORE_INTEROP_THREADS"):
+            valor = getattr(Config, nome)
+            if not isinstance(valor, int) or valor < 0:
+                raise ValueError(f"{nome} deve ser um inteiro >= 0")
+        
+        if not isinstance(Config.BERT_SCORE_JANELAS, bool):
+            raise ValueError("BERT_SCORE_JANELAS deve ser um booleano")
+        
+        if not isinstance(Config.BERT_SCORE_SOBREPOSICAO_JANELA, int) or Config.BERT_SCORE_SOBREPOSICAO_JANELA < 0:
+            raise ValueError("BERT_SCORE_SOBREPOSICAO_JANELA deve ser um inteiro >= 0")
+        
+        if not isinstance(Config.BERT_SCORE_MEMORIA_MAX_MB, int) or Config.BERT_SCORE_MEMORIA_MAX_MB < 1:
+            raise ValueError("BERT_SCORE_MEMORIA_MAX_MB deve ser um inteiro >= 1")
+        
+        metricas_semanticas = {"bertscore", "semantic_similarity"}
+        if not set(Config.METRICAS_SEMANTICAS) <= metricas_semanticas:
+            raise ValueError(f"METRICAS_SEMANTICAS deve conter apenas {sorted(metricas_semanticas)}")
+        
+        if not isinstance(Config.SEMANTIC_SIMILARITY_MODEL, str) or not Config.SEMANTIC_SIMILARITY_MODEL:
+            raise ValueError("SEMANTIC_SIMILARITY_MODEL deve ser uma string não vazia")
+        
+        if not isinstance(Config.SEMANTIC_SIMILARITY_BATCH_SIZE, int) or Config.SEMANTIC_SIMILARITY_BATCH_SIZE < 1:
+            raise ValueError("SEMANTIC_SIMILARITY_BATCH_SIZE deve ser um inteiro >= 1")
+        
+        if not isinstance(Config.MINHASH_PERMUTACOES, int) or Config.MINHASH_PERMUTACOES < 1:
+            raise ValueError("MINHASH_PERMUTACOES deve ser um inteiro >= 1")
+        
+        if not isinstance(Config.MINHASH_SEMENTE, int):
+            raise ValueError("MINHASH_SEMENTE deve ser um inteiro")
+        
+        if not isinstance(Config.CONSISTENCIA_EMBEDDINGS, bool):
+            raise ValueError("CONSISTENCIA_EMBEDDINGS deve ser um booleano")
+        
+        if not isinstance(Config.DUPLICATAS_TAMANHO_SHINGLE, int) or Config.DUPLICATAS_TAMANHO_SHINGLE < 1:
+            raise ValueError("DUPLICATAS_TAMANHO_SHINGLE deve ser um inteiro >= 1")
+        
+        if (not isinstance(Config.DUPLICATAS_BANDAS, int) or Config.DUPLICATAS_BANDAS < 1
+                or Config.MINHASH_PERMUTACOES % Config.DUPLICATAS_BANDAS != 0):
+            raise ValueError("DUPLICATAS_BANDAS deve ser um inteiro >= 1 que divide MINHASH_PERMUTACOES")
+        
+        if not 0 < Config.DUPLICATAS_LIMIAR_JACCARD <= 1:
+            raise ValueError("DUPLICATAS_LIMIAR_JACCARD deve estar em (0, 1]")
+        
+        if not 0 < Config.DUPLICATAS_LIMIAR_COLAPSO <= 1:
+            raise ValueError("DUPLICATAS_LIMIAR_COLAPSO deve estar em (0, 1]")
+        
+        if not isinstance(Config.USAR_SERVIDOR_METRICAS, bool):
+            raise ValueError("USAR_SERVIDOR_METRICAS deve ser um booleano")
+        
+        if not isinstance(Config.SERVIDOR_METRICAS_PORTA, int) or not 0 < Config.SERVIDOR_METRICAS_PORTA < 65536:
+            raise ValueError("SERVIDOR_METRICAS_PORTA deve ser um inteiro entre 1 e 65535")
+        
+        if Config.SERVIDOR_METRICAS_TIMEOUT <= 0:
+            raise ValueError("SERVIDOR_METRICAS_TIMEOUT deve ser > 0")
+        
+        if not isinstance(Config.SERVIDOR_METRICAS_MAX_NGRAMAS, int) or Config.SERVIDOR_METRICAS_MAX_NGRAMAS < 1:
+            raise ValueError("SERVIDOR_METRICAS_MAX_NGRAMAS deve ser um inteiro >= 1")
+        
+        if not isinstance(Config.SERVIDOR_METRICAS_MAX_REFERENCIAS, int) or Config.SERVIDOR_METRICAS_MAX_REFERENCIAS < 1:
+            raise ValueError("SERVIDOR_METRICAS_MAX_REFERENCIAS deve ser um inteiro >= 1")
+        
+        if not isinstance(Config.ROUGE_WORKERS, int) or Config.ROUGE_WORKERS < 0:
+            raise ValueError("ROUGE_WORKERS deve ser um inteiro >= 0")
+        
+        if not isinstance(Config.ROUGE_CHUNK_SIZE, int) or Config.ROUGE_CHUNK_SIZE < 1:
+            raise ValueError("ROUGE_CHUNK_SIZE deve ser um inteiro >= 1")
+        
+        if not isinstance(Config.ROUGE_MIN_PARES_PARALELO, int) or Config.ROUGE_MIN_PARES_PARALELO < 0:
+            raise ValueError("ROUGE_MIN_PARES_PARALELO deve ser um inteiro >= 0")
+        
+        if not isinstance(Config.ANALISE_WORKERS, int) or Config.ANALISE_WORKERS < 0:
+            raise ValueError("ANALISE_WORKERS deve ser um inteiro >= 0")
     
     @classmethod
     def validate_all(cls) -> None:
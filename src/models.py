@@ -8,6 +8,9 @@ import logging
 import os
 import time
 import random
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
 from groq import Groq
 import google.generativeai as genai
 from .config import get_config
@@ -38,6 +41,68 @@ GEMINI_MODELS = {
 AVAILABLE_MODELS = {**GROQ_MODELS, **GEMINI_MODELS}
 
 
+class ErrorType(str, Enum):
+    """
+    Taxonomia de erros de geração, registrada na coluna 'error_type' dos resultados.
+    """
+    RATE_LIMIT = "rate_limit"
+    AUTHENTICATION = "authentication"
+    PERMISSION_DENIED = "permission_denied"
+    MODEL_NOT_FOUND = "model_not_found"
+    TIMEOUT = "timeout"
+    CONNECTION = "connection"
+    SERVER_ERROR = "server_error"
+    CONTEXT_LENGTH = "context_length"
+    CONTENT_BLOCKED = "content_blocked"
+    EMPTY_RESPONSE = "empty_response"
+    UNSUPPORTED_PROVIDER = "unsupported_provider"
+    UNHANDLED_EXCEPTION = "unhandled_exception"
+    UNKNOWN = "unknown"
+
+
+# Erros transitórios passíveis de retry
+RETRYABLE_ERRORS = {
+    ErrorType.RATE_LIMIT,
+    ErrorType.TIMEOUT,
+    ErrorType.CONNECTION,
+    ErrorType.SERVER_ERROR,
+}
+
+# Mapeamento de status HTTP para tipo de erro
+HTTP_STATUS_ERRORS = {
+    401: ErrorType.AUTHENTICATION,
+    403: ErrorType.PERMISSION_DENIED,
+    404: ErrorType.MODEL_NOT_FOUND,
+    408: ErrorType.TIMEOUT,
+    413: ErrorType.CONTEXT_LENGTH,
+    429: ErrorType.RATE_LIMIT,
+    504: ErrorType.TIMEOUT,
+}
+
+
+@dataclass
+class GenerationResult:
+    """
+    Resultado estruturado de uma geração.
+    
+    Attributes:
+        text: Resposta do modelo ou mensagem normalizada "[ERRO]: ..."
+        error_type: Tipo do erro (None em caso de sucesso)
+        http_status: Status HTTP retornado pela API, se disponível
+        provider_code: Código de erro do provedor (ex: 'rate_limit_exceeded'), se disponível
+        attempts: Número de tentativas realizadas
+    """
+    text: str
+    error_type: Optional[ErrorType] = None
+    http_status: Optional[int] = None
+    provider_code: Optional[str] = None
+    attempts: int = 1
+    
+    @property
+    def is_error(self) -> bool:
+        return self.error_type is not None
+
+
 class ModelRunner:
     """
     Classe para executar modelos do Groq e Google Gemini via API.
@@ -75,48 +140,101 @@ class ModelRunner:
         else:
             raise ValueError(f"Provedor não suportado para modelo '{model_name}'")
 
-    def _is_retryable_error(self, message: str) -> bool:
-        """Define erros transitórios passíveis de retry."""
-        if not message:
-            return False
-        msg = message.lower()
-        retry_patterns = [
-            "rate limit",
-            "rate_limit",
-            "quota",
-            "timeout",
-            "timed out",
-            "429",
-            "503",
-            "temporarily unavailable",
-            "service unavailable",
-            "connection reset",
-            "network",
-        ]
-        return any(p in msg for p in retry_patterns)
-
-    def _format_error(self, error_msg: str) -> str:
-        """Normaliza mensagens de erro para o formato do pipeline."""
-        msg = (error_msg or "").lower()
-        if "rate_limit" in msg or "rate limit" in msg or "quota" in msg:
-            return f"[ERRO]: Rate limit ou quota excedida para {self.model_name}"
-        if "authentication" in msg or "unauthorized" in msg:
-            return f"[ERRO]: Problema de autenticação para {self.model_name}"
+    def _error_result(self, error_type: ErrorType, detail: str = "", **kwargs) -> GenerationResult:
+        """Cria resultado de erro com a mensagem normalizada do pipeline."""
+        return GenerationResult(
+            text=self._format_error(error_type, detail),
+            error_type=error_type,
+            **kwargs
+        )
+
+    def _classify_error(self, message: str, http_status: Optional[int] = None) -> ErrorType:
+        """Classifica um erro a partir do status HTTP e, na falta dele, da mensagem."""
+        if http_status in HTTP_STATUS_ERRORS:
+            return HTTP_STATUS_ERRORS[http_status]
+        if http_status is not None and http_status >= 500:
+            return ErrorType.SERVER_ERROR
+
+        msg = (message or "").lower()
+        if "rate_limit" in msg or "rate limit" in msg or "quota" in msg or "429" in msg:
+            return ErrorType.RATE_LIMIT
+        if "authentication" in msg or "unauthorized" in msg or "api key" in msg:
+            return ErrorType.AUTHENTICATION
         if "not_found" in msg or "404" in msg:
-            return f"[ERRO]: Modelo não encontrado: {self.model_name}"
-        if "timeout" in msg:
-            return f"[ERRO]: Timeout na requisição para {self.model_name}"
+            return ErrorType.MODEL_NOT_FOUND
+        if "timeout" in msg or "timed out" in msg:
+            return ErrorType.TIMEOUT
         if "context_length" in msg or "token" in msg:
-            return f"[ERRO]: Prompt muito longo para {self.model_name}"
+            return ErrorType.CONTEXT_LENGTH
         if "safety" in msg or "blocked" in msg:
-            return f"[ERRO]: Conteúdo bloqueado por filtros de segurança para {self.model_name}"
+            return ErrorType.CONTENT_BLOCKED
         if "permission" in msg:
-            return f"[ERRO]: Sem permissão para acessar {self.model_name}"
-        if not (error_msg or "").strip():
+            return ErrorType.PERMISSION_DENIED
+        if "503" in msg or "unavailable" in msg:
+            return ErrorType.SERVER_ERROR
+        if "connection" in msg or "network" in msg:
+            return ErrorType.CONNECTION
+        return ErrorType.UNKNOWN
+
+    def _format_error(self, error_type: ErrorType, detail: str = "") -> str:
+        """Normaliza mensagens de erro para o formato do pipeline."""
+        messages = {
+            ErrorType.RATE_LIMIT: f"[ERRO]: Rate limit ou quota excedida para {self.model_name}",
+            ErrorType.AUTHENTICATION: f"[ERRO]: Problema de autenticação para {self.model_name}",
+            ErrorType.MODEL_NOT_FOUND: f"[ERRO]: Modelo não encontrado: {self.model_name}",
+            ErrorType.TIMEOUT: f"[ERRO]: Timeout na requisição para {self.model_name}",
+            ErrorType.CONTEXT_LENGTH: f"[ERRO]: Prompt muito longo para {self.model_name}",
+            ErrorType.PERMISSION_DENIED: f"[ERRO]: Sem permissão para acessar {self.model_name}",
+            ErrorType.UNSUPPORTED_PROVIDER: f"[ERRO]: Provedor não suportado para {self.model_name}",
+        }
+        if error_type in messages:
+            return messages[error_type]
+        if error_type == ErrorType.CONTENT_BLOCKED:
+            return f"[ERRO]: {detail or 'Conteúdo bloqueado por filtros de segurança'} para {self.model_name}"
+        if error_type == ErrorType.EMPTY_RESPONSE:
+            return f"[ERRO]: {detail or 'Resposta vazia do modelo'} {self.model_name}".rstrip()
+        if not (detail or "").strip():
             return f"[ERRO]: Erro desconhecido com {self.model_name}"
-        return f"[ERRO]: {error_msg} (modelo: {self.model_name})"
+        return f"[ERRO]: {detail} (modelo: {self.model_name})"
+
+    def _exception_details(self, error: Exception):
+        """Extrai status HTTP e código do provedor de exceções do Groq/Gemini."""
+        http_status = getattr(error, "status_code", None)
+        if http_status is None and isinstance(getattr(error, "code", None), int):
+            # google.api_core.exceptions expõe o status HTTP em .code
+            http_status = error.code
+
+        provider_code = None
+        body = getattr(error, "body", None)
+        if isinstance(body, dict):
+            detail = body.get("error", body)
+            if isinstance(detail, dict):
+                provider_code = detail.get("code") or detail.get("type")
+        if provider_code is None:
+            provider_code = getattr(error, "reason", None) or type(error).__name__
 
-    def _generate_once(self, prompt, **kwargs):
+        return (int(http_status) if http_status is not None else None,
+                str(provider_code) if provider_code is not None else None)
+
+    def _gemini_finish_error(self, candidate) -> GenerationResult:
+        """Converte finish_reason do Gemini em resultado de erro."""
+        finish_reason = candidate.finish_reason
+        if finish_reason == 2:
+            return self._error_result(ErrorType.CONTENT_BLOCKED, "Conteúdo bloqueado por filtros de segurança",
+                                      provider_code="SAFETY")
+        if finish_reason == 3:
+            return self._error_result(ErrorType.CONTENT_BLOCKED, "Conteúdo bloqueado por recitação",
+                                      provider_code="RECITATION")
+        if finish_reason == 4:
+            return self._error_result(ErrorType.CONTENT_BLOCKED, "Resposta bloqueada por outros motivos",
+                                      provider_code="OTHER")
+        return GenerationResult(
+            text=f"[ERRO]: Resposta vazia do modelo {self.model_name} (finish_reason: {finish_reason})",
+            error_type=ErrorType.EMPTY_RESPONSE,
+            provider_code=str(finish_reason),
+        )
+
+    def _generate_once(self, prompt, **kwargs) -> GenerationResult:
         """Realiza uma tentativa única de geração."""
         default_params = config.get_model_params()
         default_params.update(kwargs)
@@ -135,9 +253,9 @@ class ModelRunner:
                 if response.choices and len(response.choices) > 0:
                     content = response.choices[0].message.content
                     if content and content.strip():
-                        return content.strip()
-                    return f"[ERRO]: Resposta vazia do modelo {self.model_name}"
-                return f"[ERRO]: Nenhuma resposta do modelo {self.model_name}"
+                        return GenerationResult(text=content.strip())
+                    return self._error_result(ErrorType.EMPTY_RESPONSE, "Resposta vazia do modelo")
+                return self._error_result(ErrorType.EMPTY_RESPONSE, "Nenhuma resposta do modelo")
 
             if self.provider == "gemini":
                 generation_config = genai.types.GenerationConfig(
@@ -153,54 +271,51 @@ class ModelRunner:
 
                 try:
                     if response.text and response.text.strip():
-                        return response.text.strip()
+                        return GenerationResult(text=response.text.strip())
                     if response.candidates:
-                        candidate = response.candidates[0]
-                        if candidate.finish_reason == 2:
-                            return f"[ERRO]: Conteúdo bloqueado por filtros de segurança para {self.model_name}"
-                        if candidate.finish_reason == 3:
-                            return f"[ERRO]: Conteúdo bloqueado por recitação para {self.model_name}"
-                        if candidate.finish_reason == 4:
-                            return f"[ERRO]: Resposta bloqueada por outros motivos para {self.model_name}"
-                        return f"[ERRO]: Resposta vazia do modelo {self.model_name} (finish_reason: {candidate.finish_reason})"
-                    return f"[ERRO]: Nenhuma resposta do modelo {self.model_name}"
+                        return self._gemini_finish_error(response.candidates[0])
+                    return self._error_result(ErrorType.EMPTY_RESPONSE, "Nenhuma resposta do modelo")
                 except Exception as text_error:
                     if response.candidates:
-                        candidate = response.candidates[0]
-                        if candidate.finish_reason == 2:
-                            return f"[ERRO]: Conteúdo bloqueado por filtros de segurança para {self.model_name}"
-                        if candidate.finish_reason == 3:
-                            return f"[ERRO]: Conteúdo bloqueado por recitação para {self.model_name}"
-                        if candidate.finish_reason == 4:
-                            return f"[ERRO]: Resposta bloqueada por outros motivos para {self.model_name}"
-                        return f"[ERRO]: Resposta vazia do modelo {self.model_name} (finish_reason: {candidate.finish_reason})"
-                    return f"[ERRO]: Erro ao acessar resposta do modelo {self.model_name}: {str(text_error)}"
-
-            return f"[ERRO]: Provedor não suportado para {self.model_name}"
+                        return self._gemini_finish_error(response.candidates[0])
+                    return GenerationResult(
+                        text=f"[ERRO]: Erro ao acessar resposta do modelo {self.model_name}: {str(text_error)}",
+                        error_type=ErrorType.EMPTY_RESPONSE,
+                    )
+
+            return self._error_result(ErrorType.UNSUPPORTED_PROVIDER)
 
         except Exception as e:
-            return self._format_error(str(e))
+            http_status, provider_code = self._exception_details(e)
+            error_type = self._classify_error(str(e), http_status)
+            # Mensagem original só é preservada quando não há texto padronizado para o tipo
+            detail = str(e) if error_type in (ErrorType.UNKNOWN, ErrorType.CONNECTION, ErrorType.SERVER_ERROR) else ""
+            return self._error_result(error_type, detail, http_status=http_status, provider_code=provider_code)
 
-    def generate(self, prompt, **kwargs):
-        """Gera resposta com retry/backoff para erros transitórios."""
+    def generate_result(self, prompt, **kwargs) -> GenerationResult:
+        """Gera resposta estruturada com retry/backoff para erros transitórios."""
         max_retries = int(getattr(config, "MAX_RETRIES", 0))
         retry_delay = float(getattr(config, "RETRY_DELAY", 1))
-        last_result = None
+        result = None
 
         for attempt in range(max_retries + 1):
             result = self._generate_once(prompt, **kwargs)
-            last_result = result
+            result.attempts = attempt + 1
 
-            if not (isinstance(result, str) and result.startswith("[ERRO]")):
+            if not result.is_error:
                 return result
 
-            if attempt >= max_retries or not self._is_retryable_error(result):
+            if attempt >= max_retries or result.error_type not in RETRYABLE_ERRORS:
                 return result
 
             sleep_time = retry_delay * (2 ** attempt) + random.uniform(0, 1)
             time.sleep(sleep_time)
 
-        return last_result or f"[ERRO]: Falha desconhecida em {self.model_name}"
+        return result or self._error_result(ErrorType.UNKNOWN, f"Falha desconhecida em {self.model_name}")
+
+    def generate(self, prompt, **kwargs):
+        """Gera resposta com retry/backoff para erros transitórios (apenas o texto)."""
+        return self.generate_result(prompt, **kwargs).text
 
     def get_model_info(self):
         """Retorna informações sobre o modelo atual."""
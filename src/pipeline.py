@@ -14,7 +14,7 @@ from datetime import datetime
 warnings.filterwarnings("ignore")
 logging.getLogger("groq").setLevel(logging.ERROR)
 
-from .models import ModelRunner, AVAILABLE_MODELS, GEMINI_MODELS
+from .models import ModelRunner, ErrorType, AVAILABLE_MODELS, GEMINI_MODELS
 from .utils import save_results_csv, save_results_json, load_prompts, load_benchmark_prompts, get_next_result_folder
 from .config import get_config
 
@@ -69,8 +69,13 @@ def run_pipeline(api_key=None, model_keys=None, include_benchmarks=False):
             print(f"  Prompt {i+1}/{len(prompts)}: {prompt[:50]}...")
             start = time.time()
             
+            error_type = None
+            http_status = None
             try:
-                prediction = runner.generate(prompt)
+                generation = runner.generate_result(prompt)
+                error_type = generation.error_type.value if generation.is_error else None
+                http_status = generation.http_status
+                prediction = generation.text
                 # Garantir que a predição seja string válida
                 if isinstance(prediction, str):
                     prediction = prediction.encode('utf-8', errors='ignore').decode('utf-8')
@@ -78,13 +83,14 @@ def run_pipeline(api_key=None, model_keys=None, include_benchmarks=False):
                     prediction = str(prediction)
                 
                 # Verificar se é um erro
-                if prediction.startswith("[ERRO]"):
-                    print(f"    ⚠️  Erro: {prediction}")
+                if generation.is_error:
+                    print(f"    ⚠️  Erro ({error_type}): {prediction}")
                 else:
                     print(f"    ✅ Resposta gerada ({len(prediction)} chars)")
                     
             except Exception as e:
                 prediction = f"[ERRO]: Exceção não tratada - {str(e)}"
+                error_type = ErrorType.UNHANDLED_EXCEPTION.value
                 print(f"    ❌ Exceção: {e}")
             
             elapsed = time.time() - start
@@ -98,7 +104,9 @@ def run_pipeline(api_key=None, model_keys=None, include_benchmarks=False):
                 "timestamp": datetime.now().isoformat(),
                 "prompt_length": len(prompt),
                 "response_length": len(prediction),
-                "is_error": prediction.startswith('[ERRO]')
+                "is_error": error_type is not None,
+                "error_type": error_type,
+                "http_status": http_status
             }
             
             # Metadados de benchmark aplicam-se apenas aos prompts de benchmark.
@@ -121,6 +129,9 @@ def run_pipeline(api_key=None, model_keys=None, include_benchmarks=False):
     # Criar DataFrame com encoding correto
     df = pd.DataFrame(all_results)
     
+    # Status HTTP como inteiro anulável (sucessos e erros sem resposta HTTP ficam vazios)
+    df['http_status'] = pd.array(df['http_status'], dtype="Int64")
+    
     # Garantir que todas as colunas de texto tenham encoding correto
     text_columns = ['prompt', 'reference', 'prediction']
     for col in text_columns:
@@ -139,7 +150,7 @@ def run_pipeline(api_key=None, model_keys=None, include_benchmarks=False):
         print(f"\n🔍 Análise de erros:")
         error_analysis = analyze_errors(df)
         for model, errors in error_analysis.items():
-            print(f"  {model}: {len(errors)} erros")
+            print(f"  {model}: {sum(errors.values())} erros")
             for error_type, count in errors.items():
                 print(f"    - {error_type}: {count}")
     
@@ -151,42 +162,20 @@ def analyze_errors(df):
     Analisa erros nos resultados e retorna estatísticas por modelo.
     
     Args:
-        df (pd.DataFrame): DataFrame com os resultados
+        df (pd.DataFrame): DataFrame com os resultados (colunas 'model', 'is_error', 'error_type')
         
     Returns:
-        dict: Análise de erros por modelo
+        dict: Análise de erros por modelo ({modelo: {error_type: quantidade}})
     """
-    error_analysis = {}
+    errors = df[df['is_error']].fillna({'error_type': ErrorType.UNKNOWN.value})
+    if errors.empty:
+        return {}
     
-    for model in df['model'].unique():
-        model_data = df[df['model'] == model]
-        errors = model_data[model_data['is_error']]
-        
-        if len(errors) > 0:
-            error_types = {}
-            for error in errors['prediction']:
-                # Extrair tipo de erro
-                if 'Rate limit' in error:
-                    error_type = 'Rate Limit'
-                elif 'Timeout' in error:
-                    error_type = 'Timeout'
-                elif 'Authentication' in error:
-                    error_type = 'Authentication'
-                elif 'Not found' in error:
-                    error_type = 'Model Not Found'
-                elif 'Safety' in error or 'blocked' in error:
-                    error_type = 'Content Blocked'
-                elif 'Context length' in error or 'token' in error:
-                    error_type = 'Context Length'
-                elif 'Permission' in error:
-                    error_type = 'Permission Denied'
-                else:
-                    error_type = 'Other Error'
-                
-                error_types[error_type] = error_types.get(error_type, 0) + 1
-            
-            error_analysis[model] = error_types
+    counts = errors.groupby(['model', 'error_type']).size()
     
+    error_analysis = {}
+    for (model, error_type), count in counts.items():
+        error_analysis.setdefault(model, {})[error_type] = int(count)
     return error_analysis
 
 
@@ -198,8 +187,7 @@ def evaluate_and_export(df, folder_path):
     print("💾 Exportando resultados das APIs...")
     
     # Salva arquivos por modelo
-    for model in df["model"].unique():
-        sub = df[df["model"] == model]
+    for model, sub in df.groupby("model", observed=True, sort=False):
         csv_path = os.path.join(folder_path, f"resultados_{model}.csv")
         save_results_csv(sub, csv_path)
         print(f"  ✅ {model}: {len(sub)} respostas salvas")
@@ -221,7 +209,7 @@ def evaluate_and_export(df, folder_path):
     stats = {
         "total_respostas": len(df),
         "modelos_unicos": df['model'].nunique(),
-        "respostas_validas": len(df[~df['is_error']]),
+        "respostas_validas": len(df) - int(error_count),
         "respostas_com_erro": error_count,
         "taxa_erro": (error_count / len(df)) * 100 if len(df) > 0 else 0
     }
@@ -242,11 +230,14 @@ def save_error_report(df, folder_path):
     import json
     from datetime import datetime
     
+    # Respostas com erro filtradas uma única vez para a análise e os detalhes
+    errors_df = df[df['is_error']]
+    
     # Análise de erros
-    error_analysis = analyze_errors(df)
+    error_analysis = analyze_errors(errors_df)
     
     # Estatísticas gerais de erro
-    total_errors = df['is_error'].sum()
+    total_errors = len(errors_df)
     total_responses = len(df)
     error_rate = (total_errors / total_responses) * 100 if total_responses > 0 else 0
     
@@ -263,18 +254,16 @@ def save_error_report(df, folder_path):
     }
     
     # Detalhes dos erros
-    for model in df['model'].unique():
-        model_data = df[df['model'] == model]
-        errors = model_data[model_data['is_error']]
-        
-        for _, row in errors.iterrows():
-            error_detail = {
-                "modelo": model,
-                "prompt": row['prompt'][:100] + "..." if len(row['prompt']) > 100 else row['prompt'],
-                "erro": row['prediction'],
-                "tempo": row['time']
-            }
-            error_report["detalhes_erros"].append(error_detail)
+    for _, row in errors_df.iterrows():
+        error_detail = {
+            "modelo": row['model'],
+            "prompt": row['prompt'][:100] + "..." if len(row['prompt']) > 100 else row['prompt'],
+            "erro": row['prediction'],
+            "tipo_erro": row.get('error_type') if pd.notna(row.get('error_type')) else ErrorType.UNKNOWN.value,
+            "http_status": int(row['http_status']) if pd.notna(row.get('http_status')) else None,
+            "tempo": row['time']
+        }
+        error_report["detalhes_erros"].append(error_detail)
     
     # Salva relatório JSON
     error_report_path = os.path.join(folder_path, "relatorio_erros.json")
@@ -306,6 +295,10 @@ def save_error_report(df, folder_path):
             f.write(f"\nModelo: {detail['modelo']}\n")
             f.write(f"Prompt: {detail['prompt']}\n")
             f.write(f"Erro: {detail['erro']}\n")
+            f.write(f"Tipo: {detail['tipo_erro']}")
+            if detail['http_status'] is not None:
+                f.write(f" (HTTP {detail['http_status']})")
+            f.write("\n")
             f.write(f"Tempo: {detail['tempo']:.2f}s\n")
             f.write("-" * 30 + "\n")
     
@@ -347,8 +340,7 @@ def generate_final_report(df, stats, relatorios, tempo_execucao, folder_path):
     }
     
     # Estatísticas por modelo
-    for model in df["model"].unique():
-        model_df = df[df["model"] == model]
+    for model, model_df in df.groupby("model", observed=True, sort=False):
         valid_responses = model_df[~model_df["is_error"]]
         
         report_data["modelos"][model] = {
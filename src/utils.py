@@ -54,8 +54,7 @@ def save_analysis_files(df, metricas, folder_path):
     """
     # Análise comparativa por modelo
     analysis_data = []
-    for modelo in df["model"].unique():
-        df_modelo = df[df["model"] == modelo]
+    for modelo, df_modelo in df.groupby("model", observed=True, sort=False):
         
         # Estatísticas básicas
         tempo_medio = df_modelo["time"].mean()
@@ -129,6 +129,142 @@ def testar_analisador():
         print(f"   ❌ Erro no sistema de análise: {e}")
         return False
 
+# Pares fixos (predição, referência) das comparações com as implementações de referência
+PARES_GOLDEN_BLEU = [
+    ("the cat sat on the mat", "the cat is on the mat"),
+    ("the the the the the the the", "the cat is on the mat"),
+    ("Python is a programming language.", "Python is a high-level programming language."),
+    ("a a a a", "a"),
+    ("hello", "world"),
+    ("x", "x y z w v"),
+    ("one two three four five six", "one two three four five six"),
+    ("It is a guide to action that ensures that the military always obeys the commands of the party",
+     "It is a guide to action which ensures that the military always obeys the commands of the party"),
+    ("", "empty prediction"),
+]
+
+TOLERANCIA_GOLDEN = 1e-6
+
+def _pares_golden_rouge():
+    """Pares fixos do ROUGE-L: curtos, com tokens repetidos e longos (500–1000 tokens)."""
+    import random
+    gerador = random.Random(35)
+    vocabulario = ["model", "answer", "language", "data", "the", "of", "learning", "python",
+                   "network", "value", "test", "result"]
+    
+    def texto(tamanho, palavras):
+        return " ".join(gerador.choice(palavras) for _ in range(tamanho))
+    
+    pares = list(PARES_GOLDEN_BLEU)
+    pares.append(("the the the cat the the", "the cat the cat the"))
+    pares.append((" ".join(["data"] * 600), " ".join(["data"] * 450 + ["model"] * 100)))
+    for tamanho_pred, tamanho_ref in [(500, 520), (800, 1000), (1000, 700)]:
+        pares.append((texto(tamanho_pred, vocabulario), texto(tamanho_ref, vocabulario)))
+        # Vocabulário pequeno: muitos tokens repetidos em ambas as sequências
+        pares.append((texto(tamanho_pred, vocabulario[:3]), texto(tamanho_ref, vocabulario[:3])))
+    return pares
+
+def testar_bleu_golden():
+    """Compara o BLEU em lote (bleu_batch) com o nltk em pares fixos."""
+    print("\n📐 Testando BLEU em lote contra o nltk...")
+    
+    try:
+        import numpy as np
+        from nltk.translate.bleu_score import sentence_bleu, corpus_bleu, SmoothingFunction
+        from analysis.bleu_rouge import (bleu_batch, bleu_de_estatisticas, estatisticas_lexicas,
+                                         COLUNAS_ESTATISTICAS_BLEU)
+        
+        preds = [pred for pred, _ in PARES_GOLDEN_BLEU]
+        refs = [ref for _, ref in PARES_GOLDEN_BLEU]
+        suavizacao = SmoothingFunction().method1
+        
+        esperado = np.array([
+            sentence_bleu([ref.split()], pred.split(), smoothing_function=suavizacao)
+            for pred, ref in PARES_GOLDEN_BLEU
+        ])
+        diferenca = float(np.abs(bleu_batch(preds, refs) - esperado).max())
+        print(f"   📏 sentence_bleu: diferença máxima {diferenca:.2e}")
+        
+        # BLEU de corpus: estatísticas suficientes somadas (como em agregar_metricas_lexicas)
+        somas = estatisticas_lexicas(preds, refs)[list(COLUNAS_ESTATISTICAS_BLEU)].sum().to_frame().T
+        esperado_corpus = corpus_bleu([[ref.split()] for ref in refs], [pred.split() for pred in preds],
+                                      smoothing_function=suavizacao)
+        diferenca_corpus = abs(float(bleu_de_estatisticas(somas)[0]) - esperado_corpus)
+        print(f"   📏 corpus_bleu: diferença {diferenca_corpus:.2e}")
+        
+        if diferenca > TOLERANCIA_GOLDEN or diferenca_corpus > TOLERANCIA_GOLDEN:
+            print(f"   ❌ BLEU diverge do nltk (tolerância {TOLERANCIA_GOLDEN})")
+            return False
+        print("   ✅ BLEU em lote igual ao nltk")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Erro na comparação do BLEU: {e}")
+        return False
+
+def testar_rouge_l_golden():
+    """Compara o ROUGE-L (LCS bit-paralela) com o rouge_score em pares fixos."""
+    print("\n📐 Testando ROUGE-L contra o rouge_score...")
+    
+    try:
+        import numpy as np
+        from rouge_score import rouge_scorer
+        from analysis.bleu_rouge import rouge_batch, ROUGE_TIPOS
+        
+        pares = _pares_golden_rouge()
+        scorer = rouge_scorer.RougeScorer(['rougeL'], use_stemmer=True)
+        esperado = np.array([scorer.score(ref, pred)['rougeL'].fmeasure for pred, ref in pares])
+        obtido = rouge_batch([pred for pred, _ in pares], [ref for _, ref in pares], workers=1)
+        diferenca = float(np.abs(obtido[:, ROUGE_TIPOS.index('rougeL')] - esperado).max())
+        print(f"   📏 {len(pares)} pares (até 1000 tokens): diferença máxima {diferenca:.2e}")
+        
+        if diferenca > TOLERANCIA_GOLDEN:
+            print(f"   ❌ ROUGE-L diverge do rouge_score (tolerância {TOLERANCIA_GOLDEN})")
+            return False
+        print("   ✅ ROUGE-L igual ao rouge_score")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Erro na comparação do ROUGE-L: {e}")
+        return False
+
+# Respostas de benchmark e a alternativa que o extrator deve devolver
+CASOS_EXTRACAO_ALTERNATIVA = [
+    ("B", "B"),
+    ("b", "B"),
+    ("(c)", "C"),
+    ("Answer: B", "B"),
+    ("answer: d", "D"),
+    ("**C**", "C"),
+    ("The correct answer is D.", "D"),
+    ("A) He continues mowing the lawn.", "A"),
+    ("<think>The answer is A, since...</think>", None),
+    ("a group of people gather on the beach", None),
+]
+
+def testar_extracao_alternativas():
+    """Fixa o comportamento do extrator de alternativas dos benchmarks (MMLU/HellaSwag)."""
+    print("\n🔤 Testando extração de alternativas dos benchmarks...")
+    
+    try:
+        from analysis.benchmarks import BaseBenchmark
+        
+        falhas = 0
+        for resposta, esperado in CASOS_EXTRACAO_ALTERNATIVA:
+            extraido = BaseBenchmark.extract_choice(resposta)
+            if extraido != esperado:
+                print(f"   ❌ {resposta!r}: esperado {esperado}, extraído {extraido}")
+                falhas += 1
+        
+        if falhas:
+            return False
+        print(f"   ✅ {len(CASOS_EXTRACAO_ALTERNATIVA)} casos de extração corretos")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Erro no teste de extração: {e}")
+        return False
+
 def testar_modelos_llm():
     """Testa os modelos LLM com uma pergunta simples."""
     print("\n🤖 Testando modelos LLM...")
@@ -230,6 +366,9 @@ def main():
         ("Estrutura de Arquivos", testar_estrutura_arquivos),
         ("Pasta de Resultados", testar_pasta_resultados),
         ("Sistema de Análise", testar_analisador),
+        ("Extração de Alternativas", testar_extracao_alternativas),
+        ("BLEU (golden nltk)", testar_bleu_golden),
+        ("ROUGE-L (golden rouge_score)", testar_rouge_l_golden),
         ("Modelos LLM", testar_modelos_llm)
     ]
     